@@ -8,61 +8,436 @@ Created on Tue Jul 22 16:14:59 2025
 
 #Longstaff-Schwartz-Monte-Carlo (LSMC) Option Pricing For American Options
 
+import multiprocessing as mp
 import numpy as np
-import matplotlib.pyplot as plt
+import Kernels
+from Black_Scholes import Black_Scholes_Comp
+from European_Options import rng_streams
+from Instrumentation import instrumented, stage
 
-def American(S0, K, T, r, q, sigma, n_sim, n_steps, option_type):   #Calculate American Option Prices Using LSMC under geometric brownian motion under continuous dividend yield
+def _simulate_paths(S0, drift, sigma, dt, n_sim, n_steps, rng, dtype = np.float64, kernel = 'numpy'):   #GBM paths stored as one (n_steps, n_sim) array, row t-1 holds the prices at step t
+    
+    S = rng.standard_normal(size = (n_steps, n_sim), dtype = dtype)
+    kernels = Kernels.load(kernel)
+    if kernels is not None:
+        #Same normals, scaled, summed and exponentiated in a single pass, scalars in the dtype of the paths as in the NumPy version
+        scalar = S.dtype.type
+        kernels.gbm_paths(S, scalar(S0), scalar(drift), scalar(sigma * np.sqrt(dt)))
+        return S
+    
+    #Log-paths as a cumulative sum of the increments, computed in place
+    S *= sigma * np.sqrt(dt)
+    S += drift
+    np.cumsum(S, axis = 0, out = S)
+    np.exp(S, out = S)
+    S *= S0
+    return S
+
+
+def _lsmc_shard_init(S0, K, T, r, q, sigma, n_sim, n_steps, option_type, rng, low_memory = False, dtype = np.float64,
+                     basis = 'monomial', degree = 2, solver = 'normal', kernel = 'numpy'):   #Simulates one shard of paths, returns the state that the backward induction works on
     
     dt = T / n_steps    # time step size         
-    discount = np.exp(-r * dt)  #discount factor to move cashflows back one step
-    
-    #Simulate asset price paths
-    Z = np.random.normal(size = (n_sim, n_steps))
-    S = np.zeros((n_sim, n_steps + 1))
-    S[:, 0] = S0
-    for t in range(1, n_steps + 1):
-        S[:, t] = S[:, t - 1] * np.exp((r - q - 0.5 * sigma**2) * dt + sigma * np.sqrt(dt) * Z[:, t - 1])
+    drift = (r - q - 0.5 * sigma**2) * dt
+    state = {
+        'S0' : S0,
+        'K' : K,
+        'option_type' : option_type,
+        'discount' : np.exp(-r * dt),   #discount factor to move cashflows back one step
+        'drift' : drift,
+        'sigma' : sigma,
+        'dt' : dt,
+        'rng' : rng,
+        'low_memory' : low_memory,
+        'basis' : basis,
+        'solver' : solver,
+        'kernels' : Kernels.load(kernel),
+        'basis_buffer' : np.empty((degree + 1, n_sim))
+        }
+    
+    if low_memory:
+        #Only the Brownian motion at the current step is kept, earlier steps are regenerated backward with a Brownian bridge
+        state['W'] = np.sqrt(T) * rng.standard_normal(n_sim)
+        state['step'] = n_steps
+    else:
+        state['S'] = _simulate_paths(S0, drift, sigma, dt, n_sim, n_steps, rng, dtype, kernel)
      
     #Compute payoff at maturity
+    ST = _lsmc_shard_prices(state, n_steps)
     if option_type == 'Put':
-        payoff = np.maximum(K - S[: , -1], 0) 
+        payoff = np.maximum(K - ST, 0) 
     else:
-        payoff = np.maximum(S[:, -1] - K , 0)
-        
-    cashflow = payoff.copy()
-    exercise_time = np.full(n_sim, n_steps)
+        payoff = np.maximum(ST - K , 0)
     
-    #Backward induction using regression
-    for t in range(n_steps - 1, 0, -1):
-        if option_type == 'Put':
-            in_the_money = np.where((K - S[:, t]) > 0)[0]
-            immediate_exercise = K - S[in_the_money, t]
+    state['cashflow'] = payoff
+    state['exercise_time'] = np.full(n_sim, n_steps)
+    return state
+
+
+def _lsmc_shard_prices(state, t):  #Asset prices of all paths in the shard at step t >= 1, in low-memory mode t may only decrease between calls
+    
+    if not state['low_memory']:
+        return np.asarray(state['S'][t - 1], dtype = np.float64)
+    
+    #Brownian bridge: given W at step k+1 (and W = 0 at step 0), W at step k is normal with mean W_(k+1) * k/(k+1) and variance dt * k/(k+1)
+    W = state['W']
+    while state['step'] > t:
+        k = state['step'] - 1
+        W *= k / (k + 1)
+        W += np.sqrt(state['dt'] * k / (k + 1)) * state['rng'].standard_normal(len(W))
+        state['step'] = k
+    return state['S0'] * np.exp(state['drift'] * t + state['sigma'] * W)
+
+
+def _fill_basis(B, S, K, basis, scale):    #Fills the rows of B (degree + 1, m) with the basis functions evaluated at the in-the-money prices S
+    
+    degree = B.shape[0] - 1
+    B[0] = 1
+    if degree == 0:
+        return
+    
+    if basis == 'laguerre':
+        x = S / K   #moneyness, of order 1 whatever the price level
+    elif basis == 'raw' or not scale > 0:
+        x = S   #unnormalized prices, as in the original 1, X, X^2 regression, also when sigma = 0 leaves no volatility to standardize by
+    else:
+        x = np.log(S / K) / scale  #log-moneyness standardized by the volatility up to step t, roughly standard normal
+    
+    if basis == 'laguerre':
+        #L_(k+1) = ((2k + 1 - x) L_k - k L_(k-1)) / (k + 1)
+        np.subtract(1, x, out = B[1])
+        for k in range(1, degree):
+            np.multiply(2 * k + 1 - x, B[k], out = B[k + 1])
+            B[k + 1] -= k * B[k - 1]
+            B[k + 1] /= k + 1
+    elif basis == 'hermite':
+        #Probabilists' Hermite polynomials, He_(k+1) = x He_k - k He_(k-1)
+        B[1] = x
+        for k in range(1, degree):
+            np.multiply(x, B[k], out = B[k + 1])
+            B[k + 1] -= k * B[k - 1]
+    else:
+        for k in range(1, degree + 1):
+            np.multiply(B[k - 1], x, out = B[k])
+
+
+def _lsmc_shard_regression(state, t):     #Regression summary of the discounted cashflows on the basis over the in-the-money paths of the shard, in the form the solver needs
+    
+    S, K = _lsmc_shard_prices(state, t), state['K']
+    if state['option_type'] == 'Put':
+        in_the_money = np.flatnonzero(S < K)
+        X = S[in_the_money]
+        immediate_exercise = K - X
+    else:
+        in_the_money = np.flatnonzero(S > K)
+        X = S[in_the_money]
+        immediate_exercise = X - K
+    
+    m = len(in_the_money)
+    Y = state['cashflow'][in_the_money] * state['discount']
+    
+    #Basis rows are written into a buffer allocated once per shard, B = A^T for the m in-the-money paths
+    B = state['basis_buffer'][:, :m]
+    _fill_basis(B, X, K, state['basis'], state['sigma'] * np.sqrt(t * state['dt']))
+    
+    #Kept for the exercise update once the coefficients of all shards are known
+    state['in_the_money'] = in_the_money
+    state['immediate_exercise'] = immediate_exercise
+    state['B'] = B
+    
+    if state['solver'] == 'normal':
+        return m, B @ B.T, B @ Y     #A^T A and A^T Y, summed over the shards
+    if state['solver'] == 'qr':
+        Q, R = np.linalg.qr(B.T)
+        return m, R, Q.T @ Y    #R factors of the shards are stacked and reduced once more by the parent (TSQR)
+    return m, B.T.copy(), Y     #'lstsq' ships the full design matrix
+
+
+def _lsmc_solve(partials, solver):     #Regression coefficients from the summaries of all shards
+    
+    if solver == 'normal':
+        AtA = sum(partial[1] for partial in partials)
+        AtY = sum(partial[2] for partial in partials)
+        try:
+            return np.linalg.solve(AtA, AtY)
+        except np.linalg.LinAlgError:
+            return np.linalg.lstsq(AtA, AtY, rcond=None)[0]    #too few in-the-money paths to pin down every coefficient
+    
+    A = np.vstack([partial[1] for partial in partials])
+    Y = np.concatenate([partial[2] for partial in partials])
+    return np.linalg.lstsq(A, Y, rcond=None)[0]
+
+
+def _lsmc_shard_exercise(state, t, coeffs):     #Exercises the in-the-money paths where immediate exercise beats the regressed continuation value
+    
+    in_the_money, immediate_exercise = state['in_the_money'], state['immediate_exercise']
+    if len(in_the_money) == 0:
+        return
+    
+    if state.get('kernels') is not None:
+        #One pass over the in-the-money paths instead of a matrix product, a comparison and two scatters
+        state['kernels'].lsmc_exercise(state['cashflow'], state['exercise_time'], in_the_money, immediate_exercise, state['B'], coeffs, t)
+        return
+    
+    continuation_value = coeffs @ state['B']
+    exercise = immediate_exercise > continuation_value
+    index = in_the_money[exercise]
+    state['cashflow'][index] = immediate_exercise[exercise]
+    state['exercise_time'][index] = t  #Update time of early exercise
+
+
+def _lsmc_worker(conn, args):   #Process pool worker holding one shard of paths for the whole backward induction
+    
+    state = _lsmc_shard_init(*args)
+    while True:
+        command, payload = conn.recv()
+        if command == 'regression':
+            conn.send(_lsmc_shard_regression(state, payload))
+        elif command == 'exercise':
+            _lsmc_shard_exercise(state, *payload)
         else:
-            in_the_money = np.where((S[:, t] - K) > 0)[0]
-            immediate_exercise = S[in_the_money, t] - K
+            conn.send((state['cashflow'], state['exercise_time']))
+            conn.close()
+            return
+
+
+@instrumented()
+def American(S0, K, T, r, q, sigma, n_sim, n_steps, option_type, seed = None, backend = 'serial', n_workers = 1, low_memory = False, dtype = np.float64,
+             basis = 'monomial', degree = 2, solver = 'normal', kernel = 'numpy'):   #Calculate American Option Prices Using LSMC under geometric brownian motion under continuous dividend yield
+    
+    #basis is 'monomial' or 'hermite' (on the standardized log-moneyness, powers of S when sigma = 0), 'laguerre' (on the moneyness S/K) or 'raw' (powers of S)
+    #solver is 'normal' (normal equations), 'qr' (QR per shard, reduced once more over the shards) or 'lstsq' (SVD on the full design matrix)
+    #low_memory regenerates the paths backward with a Brownian bridge so peak memory is O(n_sim), otherwise the paths are stored once, optionally as float32
+    #Paths are split into n_workers shards with independent random streams, backend 'process' runs each shard in its own process
+    #The regressions of all shards are combined at every step, so the exercise rule is the same one for every path
+    #kernel 'numba' or 'auto' runs the path generation and exercise update as compiled kernels (see Kernels.py), with the same random numbers
+    dt = T / n_steps    # time step size         
+    shard_args = [(S0, K, T, r, q, sigma, n_sim // n_workers + (1 if i < n_sim % n_workers else 0), n_steps, option_type, rng, low_memory, dtype, basis, degree, solver, kernel)
+                  for i, rng in enumerate(rng_streams(seed, n_workers))]
+    
+    processes = []
+    try:
+        if backend == 'process':
+            connections = []
+            for args in shard_args:
+                parent_conn, child_conn = mp.Pipe()
+                process = mp.Process(target = _lsmc_worker, args = (child_conn, args), daemon = True)
+                process.start()
+                connections.append(parent_conn)
+                processes.append(process)
         
-        if len(in_the_money) == 0:
-            continue
+            def regression(t):
+                for conn in connections:
+                    conn.send(('regression', t))
+                return [conn.recv() for conn in connections]
         
-        X = S[in_the_money, t]
-        Y = cashflow[in_the_money] * discount
+            def exercise(t, coeffs):
+                for conn in connections:
+                    conn.send(('exercise', (t, coeffs)))
         
-        A = np.vstack([np.ones_like(X), X, X**2]).T
-        coeffs = np.linalg.lstsq(A, Y, rcond=None)[0]
-        continuation_value = A @ coeffs
+            def results():
+                for conn in connections:
+                    conn.send(('result', None))
+                shard_results = [conn.recv() for conn in connections]
+                for process in processes:
+                    process.join()
+                return shard_results
+    
+        else:
+            with stage('American.simulate'):
+                states = [_lsmc_shard_init(*args) for args in shard_args]
+            regression = lambda t: [_lsmc_shard_regression(state, t) for state in states]
+            exercise = lambda t, coeffs: [_lsmc_shard_exercise(state, t, coeffs) for state in states]
+            results = lambda: [(state['cashflow'], state['exercise_time']) for state in states]
+    
+        #Backward induction using regression
+        for t in range(n_steps - 1, 0, -1):
+            with stage('American.regression'):
+                partials = regression(t)
+                if sum(partial[0] for partial in partials) == 0:  #no path in the money at this step
+                    continue
+                coeffs = _lsmc_solve(partials, solver)
         
-        exercise = immediate_exercise > continuation_value
-        index = in_the_money[exercise]
-        cashflow[index] = immediate_exercise[exercise]
-        exercise_time[index] = t  #Update time of early exercise
+            with stage('American.exercise'):
+                exercise(t, coeffs)
+    
+        shard_results = results()
+    finally:
+        #Workers still running after an error or an interrupt are stopped here, a clean run has joined them in results
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+    
+    cashflow = np.concatenate([shard[0] for shard in shard_results])
+    exercise_time = np.concatenate([shard[1] for shard in shard_results])
         
     price = np.mean(cashflow * np.exp(-r * dt * exercise_time))
     
+    #At t = 0 every path is at S0, so exercise is decided on the estimated continuation value itself, as at the root of the trees
+    intrinsic = max(K - S0, 0) if option_type == 'Put' else max(S0 - K, 0)
+    if intrinsic > price:
+        cashflow = np.full(cashflow.shape, intrinsic, dtype = cashflow.dtype)
+        exercise_time = np.zeros_like(exercise_time)
+        price = intrinsic
+    
     return price, dt, cashflow, exercise_time
 
 
+def _batch_contracts(S0, K, T, r, q, sigma, option_type):     #Broadcasts the contract arrays to one column per contract, plus the call/put sign and the original shape
+
+    #option_type may be 'Call'/'Put' (or an array of them) or a boolean (array) that is True for calls
+    option_type = np.asarray(option_type)
+    is_call = option_type == 'Call' if option_type.dtype.kind in 'UO' else option_type.astype(bool)
+    S0, K, T, r, q, sigma, is_call = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (S0, K, T, r, q, sigma)), is_call)
+    shape = S0.shape
+    S0, K, T, r, q, sigma, is_call = (x.reshape(-1, 1) for x in (S0, K, T, r, q, sigma, is_call))
+    return S0, K, T, r, q, sigma, np.where(is_call, 1.0, -1.0), shape
+
+
+def _deterministic(S0, K, T, r, q, sign):     #Price, delta, gamma and theta of American contracts without uncertainty (T = 0 or sigma = 0), sign is 1 for calls and -1 for puts
+
+    #The spot follows S0 exp((r - q) t), so exercising at t is worth sign * (S0 exp(-q t) - K exp(-r t)) today. Its largest value over [0, T]
+    #lies at t = 0, at t = T or where its derivative vanishes, t* = log(q S0 / (r K)) / (q - r). An expired contract is worth its intrinsic value
+    S0, K, T, r, q, sign = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (S0, K, T, r, q, sign)))
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        t_star = np.log(q * S0 / (r * K)) / (q - r)
+    t_star = np.where(np.isfinite(t_star) & (t_star > 0) & (t_star < T), t_star, 0.0)
+    times = np.stack([np.zeros(T.shape), T, t_star])
+    values = sign * (S0 * np.exp(-q * times) - K * np.exp(-r * times))
+    best = np.argmax(values, axis = 0)
+    t, value = (np.take_along_axis(x, best[None], axis = 0)[0] for x in (times, values))
+    
+    exercised = value > 0
+    price = np.maximum(value, 0)
+    delta = np.where(exercised, sign * np.exp(-q * t), 0.0)
+    #Only an exercise at maturity moves with T, theta is -dV/dT per trading day
+    theta = np.where(exercised & (best == 1), -sign * (r * K * np.exp(-r * T) - q * S0 * np.exp(-q * T)) / 252, 0.0)
+    return price, delta, np.zeros(price.shape), theta
+
+
+def _crr_backward_batch(S0, K, r, q, sigma, dt, n_steps, sign, levels = (0,)):     #Backward induction on one CRR tree per row of the (M, 1) contract columns, returns the (M, i + 1) node values at the requested levels i
+
+    u = np.exp(sigma * np.sqrt(dt))
+    d = 1 / u
+    p = (np.exp((r - q) * dt) - d) / (u - d)
+    discount = np.exp(-r * dt)
+    
+    #One row of the node price ladder S0 * u^k per contract, sliced exactly as in the single-contract tree
+    S_ladder = S0 * u ** np.arange(-n_steps, n_steps + 1)
+    option_values = np.maximum(sign * (S_ladder[:, ::-2] - K), 0)
+    
+    saved = {}
+    if n_steps in levels:
+        saved[n_steps] = option_values.copy()
+    
+    for i in range(n_steps - 1, min(levels) - 1, -1):
+        option_values = discount * (p * option_values[:, :-1] + (1 - p) * option_values[:, 1:])
+        ST = S_ladder[:, n_steps - i : n_steps + i + 1 : 2][:, ::-1]
+        np.maximum(option_values, sign * (ST - K), out = option_values)
+        if i in levels:
+            saved[i] = option_values.copy()
+    
+    return saved
+
+
+@instrumented()
+def american_binomial_batch(S0, K, T, r, q, sigma, n_nodes, option_type):  #CRR prices for broadcastable arrays of contracts, all trees are rolled back together with n_nodes steps each
+
+    S0, K, T, r, q, sigma, sign, shape = _batch_contracts(S0, K, T, r, q, sigma, option_type)
+    #Contracts without a tree (T = 0 or sigma = 0) are rolled back on a placeholder tree and then priced along their deterministic path
+    degenerate = ~(sigma * np.sqrt(T) > 0)
+    price = _crr_backward_batch(S0, K, r, q, np.where(degenerate, 1.0, sigma), np.where(degenerate, 1.0, T) / n_nodes, n_nodes, sign)[0][:, :1]
+    price = np.where(degenerate, _deterministic(S0, K, T, r, q, sign)[0], price)
+    return price.reshape(shape)
+
+
+@instrumented()
+def american_binomial_greeks_batch(S0, K, T, r, q, sigma, n_nodes, option_type):    #american_binomial_greeks for broadcastable arrays of contracts, returns (price, delta, gamma, theta) arrays
+
+    S0, K, T, r, q, sigma, sign, shape = _batch_contracts(S0, K, T, r, q, sigma, option_type)
+    #Contracts without a tree (T = 0 or sigma = 0) get placeholder trees, their values come from the deterministic path below
+    degenerate = ~(sigma * np.sqrt(T) > 0)
+    tree_sigma = np.where(degenerate, 1.0, sigma)
+    dt = np.where(degenerate, 1.0, T) / n_nodes
+    u = np.exp(tree_sigma * np.sqrt(dt))
+    saved = _crr_backward_batch(S0, K, r, q, tree_sigma, dt, n_nodes + 2, sign, levels = (0, 2))
+    f_uu, f_ud, f_dd = saved[2].T
+    S0_tree, u, dt = S0[:, 0], u[:, 0], dt[:, 0]
+    S_uu, S_dd = S0_tree * u**2, S0_tree / u**2
+    
+    delta = (f_uu - f_dd) / (S_uu - S_dd)
+    gamma = ((f_uu - f_ud) / (S_uu - S0_tree) - (f_ud - f_dd) / (S0_tree - S_dd)) / (0.5 * (S_uu - S_dd))
+    theta = -(((saved[0][:, 0] - f_ud) / (2 * dt)) / 252)
+    
+    deterministic = _deterministic(S0, K, T, r, q, sign)
+    return tuple(np.where(degenerate[:, 0], exact[:, 0], x).reshape(shape) for x, exact in zip((f_ud, delta, gamma, theta), deterministic))
+
+
+@instrumented()
+def American_strip(S0, K, T, r, q, sigma, n_sim, n_steps, option_type, seed = None, dtype = np.float64,
+                   basis = 'monomial', degree = 2, solver = 'normal'):   #LSMC prices for arrays of strikes and maturities from one shared set of simulated paths
+    
+    #K, T and option_type broadcast to one entry per contract, the time grid has n_steps steps up to the longest maturity and every maturity must lie on it
+    K, T, option_type = np.broadcast_arrays(np.asarray(K, dtype = float), np.asarray(T, dtype = float), np.asarray(option_type))
+    K, T, option_type = K.ravel(), T.ravel(), option_type.ravel()
+    dt = T.max() / n_steps
+    maturity_steps = np.rint(T / dt).astype(int)
+    off_grid = np.abs(maturity_steps * dt - T) > 1e-9 * T.max()
+    if np.any(off_grid) or np.any(maturity_steps < 1):
+        raise ValueError(f"Maturities {T[off_grid | (maturity_steps < 1)]} do not fall on the time grid with step {dt}")
+    
+    rng = np.random.default_rng(seed)
+    common = {
+        'S' : _simulate_paths(S0, (r - q - 0.5 * sigma**2) * dt, sigma, dt, n_sim, n_steps, rng, dtype),
+        'discount' : np.exp(-r * dt),
+        'sigma' : sigma,
+        'dt' : dt,
+        'low_memory' : False,
+        'basis' : basis,
+        'solver' : solver,
+        'basis_buffer' : np.empty((degree + 1, n_sim))  #shared, every contract is regressed and exercised before the next one
+        }
+    
+    #One backward-induction state per contract, all reading the same path store
+    states = []
+    for K_c, type_c, steps_c in zip(K, option_type, maturity_steps):
+        ST = _lsmc_shard_prices(common, steps_c)
+        payoff = np.maximum(K_c - ST, 0) if type_c == 'Put' else np.maximum(ST - K_c, 0)
+        states.append({**common, 'K' : K_c, 'option_type' : type_c, 'cashflow' : payoff, 'exercise_time' : np.full(n_sim, steps_c)})
+    
+    #Backward induction using regression, a contract only takes part before its own maturity
+    for t in range(n_steps - 1, 0, -1):
+        for state, steps_c in zip(states, maturity_steps):
+            if t >= steps_c:
+                continue
+            partial = _lsmc_shard_regression(state, t)
+            if partial[0] == 0:     #no path in the money at this step
+                continue
+            _lsmc_shard_exercise(state, t, _lsmc_solve([partial], solver))
+    
+    #At t = 0 every path is at S0, so exercise is decided on the estimated continuation value itself, as at the root of the trees
+    for state, K_c, type_c in zip(states, K, option_type):
+        intrinsic = max(K_c - S0, 0) if type_c == 'Put' else max(S0 - K_c, 0)
+        if intrinsic > np.mean(state['cashflow'] * np.exp(-r * dt * state['exercise_time'])):
+            state['cashflow'] = np.full(n_sim, intrinsic)
+            state['exercise_time'] = np.zeros(n_sim, dtype = int)
+    
+    price = np.array([np.mean(state['cashflow'] * np.exp(-r * dt * state['exercise_time'])) for state in states])
+    mean_exercise_time = np.array([np.mean(state['exercise_time']) * dt for state in states])
+    early_exercise_fraction = np.array([np.mean(state['exercise_time'] < steps_c) for state, steps_c in zip(states, maturity_steps)])
+    
+    return {
+        'price' : price,
+        'mean_exercise_time' : mean_exercise_time,  #in years
+        'early_exercise_fraction' : early_exercise_fraction
+        }
+
+
+@instrumented()
 def plot_american(dt, cashflow, exercise_time): #Plot Histograms of Early Exercise times and Option Payoffs
 
+    import matplotlib.pyplot as plt     #imported here so the pricing engines do not pay for matplotlib
     fig, axs = plt.subplots(2, 1, figsize=(12, 14))
     fig.tight_layout(pad=5.0)
     
@@ -80,60 +455,188 @@ def plot_american(dt, cashflow, exercise_time): #Plot Histograms of Early Exerci
    
     return fig
 
-def american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type):    #Pricing via a Cox-Ross-Rubenstein binomial tree with continuous dividend yield 
+TREES = ('crr', 'lr', 'lrr', 'bbs', 'bbsr')
+RICHARDSON = {'lrr' : 'lr', 'bbsr' : 'bbs'}     #extrapolated tree -> the tree it extrapolates
 
-    dt = T / n_nodes
-    u = np.exp(sigma * np.sqrt(dt))
-    d = 1 / u
-    p = (np.exp((r - q) * dt) - d) / (u - d)
 
-# Initialize stock price tree
-    ST = np.zeros((n_nodes + 1, n_nodes + 1))
-    ST[0, 0] = S0
-    for i in range(1, n_nodes + 1):
-        ST[i, 0] = ST[i-1, 0] * u
-        for j in range(1, i + 1):
-            ST[i, j] = ST[i-1, j-1] * d
-    
-    # Initialize option value at maturity
-    option_values = np.zeros((n_nodes + 1, n_nodes + 1))
-    for j in range(n_nodes + 1):
+def _tree_nodes(S_ladder, growth, n_steps, i):   #Node prices at level i, node j is S_ladder[n_steps + i - 2j] * growth[i], generated on the fly from the ladder
+
+    ST = S_ladder[n_steps - i : n_steps + i + 1 : 2][::-1]
+    return ST if growth is None else ST * growth[i]
+
+
+def _tree_backward(S_ladder, growth, K, p, discount, n_steps, option_type, levels = (0,), kernel = 'numpy', european = None):   #Backward induction on a recombining binomial tree, returns the node values at the requested levels
+
+    #growth is None for a tree centred on S0 (CRR), otherwise the drift of the node prices per level, see _lr_backward
+    #european maps the node prices one step before maturity to the value of the European option over the last step, which replaces the tree there (BBS)
+    ST = _tree_nodes(S_ladder, growth, n_steps, n_steps)
+    if option_type == "Call":
+        option_values = np.maximum(ST - K, 0)
+    else:
+        option_values = np.maximum(K - ST, 0)
+    
+    saved = {}
+    if n_steps in levels:
+        saved[n_steps] = option_values.copy()
+    
+    level = n_steps
+    if european is not None and n_steps > min(levels):
+        level = n_steps - 1
+        ST = _tree_nodes(S_ladder, growth, n_steps, level)
+        option_values = np.maximum(european(ST), ST - K if option_type == "Call" else K - ST)
+        if level in levels:
+            saved[level] = option_values.copy()
+    
+    kernels = Kernels.load(kernel)
+    if kernels is not None:
+        #The compiled kernel rolls the value array back in place from one requested level to the next
+        growth = np.ones(n_steps + 1) if growth is None else growth
+        for stop in sorted({i for i in levels if i < level}, reverse = True):
+            kernels.crr_rollback(option_values, S_ladder, growth, n_steps, level, stop, float(K), 1.0 if option_type == "Call" else -1.0, p, discount)
+            saved[stop] = option_values[:stop + 1].copy()
+            level = stop
+        return saved
+    
+    #Backward induction, rolling a single value array back one level per step
+    for i in range(level - 1, min(levels) - 1, -1):
+        option_values = discount * (p * option_values[:-1] + (1 - p) * option_values[1:])
+        ST = _tree_nodes(S_ladder, growth, n_steps, i)
         if option_type == "Call":
-            option_values[n_nodes, j] = max(ST[n_nodes, j] - K, 0)
+            np.maximum(option_values, ST - K, out = option_values)
         else:
-            option_values[n_nodes, j] = max(K - ST[n_nodes, j], 0)
-    
-    # Backward induction
-    for i in range(n_nodes-1, -1, -1):
-        for j in range(i+1):
-            cont = np.exp(-r * dt) * (p * option_values[i+1, j] + (1 - p) * option_values[i+1, j+1])
-            if option_type == "Call":
-                option_values[i, j] = max(cont, ST[i, j] - K)
-            else:
-                option_values[i, j] = max(cont, K - ST[i, j])
-    
-    return option_values[0, 0]
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
-    
+            np.maximum(option_values, K - ST, out = option_values)
+        if i in levels:
+            saved[i] = option_values.copy()
     
+    return saved
+
+
+def _crr_backward(S0, K, r, q, sigma, dt, n_steps, option_type, levels = (0,), kernel = 'numpy', smooth = False):  #Backward induction on a CRR tree of n_steps steps of size dt rooted at S0, returns the node values at the requested levels
+
+    u = np.exp(sigma * np.sqrt(dt))
+    d = 1 / u
+    p = (np.exp((r - q) * dt) - d) / (u - d)
+    discount = np.exp(-r * dt)
     
+    #Every node price is S0 * u^k for some k in [-n_steps, n_steps], so only this 1-D ladder is stored instead of the full tree
+    S_ladder = S0 * u ** np.arange(-n_steps, n_steps + 1)
     
+    #smooth is the Broadie-Detemple BBS tree: the last step uses Black-Scholes, which removes most of the odd-even oscillation of the CRR price
+    european = (lambda ST: Black_Scholes_Comp(ST, K, dt, r, q, sigma, option_type)) if smooth else None
+    return _tree_backward(S_ladder, None, K, p, discount, n_steps, option_type, levels, kernel, european)
+
+
+def _peizer_pratt(z, n):   #Peizer-Pratt (method 2) inversion of the normal cdf at z on a tree of n steps, n odd
+
+    return 0.5 + np.sign(z) * np.sqrt(0.25 - 0.25 * np.exp(-(z / (n + 1 / 3 + 0.1 / (n + 1)))**2 * (n + 1 / 6)))
+
+
+def _lr_parameters(S0, K, T, r, q, sigma, n_steps):     #Up and down factors and up probability of the Leisen-Reimer tree
+
+    #The binomial distribution matches N(d2) under the risk-neutral measure and N(d1) under the stock measure, which centres the tree on the strike
+    dt = T / n_steps
+    d1 = (np.log(S0 / K) + (r - q + 0.5 * sigma**2) * T) / (sigma * np.sqrt(T))
+    d2 = d1 - sigma * np.sqrt(T)
+    p = _peizer_pratt(d2, n_steps)
+    growth = np.exp((r - q) * dt)
+    u = growth * _peizer_pratt(d1, n_steps) / p
+    d = (growth - p * u) / (1 - p)
+    return u, d, p
+
+
+def _lr_backward(S0, K, T, r, q, sigma, n_steps, option_type, levels = (0,), kernel = 'numpy'):     #Backward induction on a Leisen-Reimer tree of n_steps (odd) steps, returns the node values at the requested levels
+
+    #u * d != 1, so node j at level i is S0 * u^(i - j) * d^j = S0 * sqrt(u d)^i * sqrt(u / d)^(i - 2j): the CRR ladder times a growth factor per level
+    u, d, p = _lr_parameters(S0, K, T, r, q, sigma, n_steps)
+    S_ladder = S0 * np.sqrt(u / d) ** np.arange(-n_steps, n_steps + 1)
+    growth = np.sqrt(u * d) ** np.arange(n_steps + 1)
+    return _tree_backward(S_ladder, growth, K, p, np.exp(-r * T / n_steps), n_steps, option_type, levels, kernel)
+
+
+def _richardson(fine, coarse, n_fine, n_coarse):    #Two-point Richardson extrapolation of results with an error of order 1 / n
+
+    #Leisen-Reimer converges as 1 / n^2 for European payoffs only, for American options the early exercise boundary falls between nodes
+    #and leaves an error of order 1 / n (halving per doubling of n against a 5000-step reference), so both trees use 1 / n weights
+
+    return (n_fine * np.asarray(fine) - n_coarse * np.asarray(coarse)) / (n_fine - n_coarse)
+
+
+def _tree_steps(n_nodes, tree):     #Number of steps the tree is built with, Leisen-Reimer needs an odd number
+
+    if tree not in TREES:
+        raise ValueError(f"tree must be one of {', '.join(TREES)}, not {tree!r}")
+    return n_nodes + 1 - n_nodes % 2 if tree == 'lr' else n_nodes
+
+
+def _extrapolated(func, n_nodes, tree, args):   #Richardson extrapolation of func(*args, n, base tree) from n_nodes and n_nodes // 2 steps
+
+    base = RICHARDSON[tree]
+    n_fine, n_coarse = _tree_steps(n_nodes, base), _tree_steps(max(1, n_nodes // 2), base)
+    fine = func(*args, n_fine, base)
+    if n_coarse >= n_fine:
+        return fine
+    return _richardson(fine, func(*args, n_coarse, base), n_fine, n_coarse)
+
+
+def _binomial_price(S0, K, T, r, q, sigma, option_type, kernel, n_nodes, tree):
+
+    n_nodes = _tree_steps(n_nodes, tree)
+    if not sigma * np.sqrt(T) > 0:
+        #No tree without a time step or volatility, the spot path is known
+        return float(_deterministic(S0, K, T, r, q, 1.0 if option_type == "Call" else -1.0)[0])
+    if tree in RICHARDSON:
+        return float(_extrapolated(_binomial_price, n_nodes, tree, (S0, K, T, r, q, sigma, option_type, kernel)))
+    if tree == 'lr':
+        return _lr_backward(S0, K, T, r, q, sigma, n_nodes, option_type, kernel = kernel)[0][0]
+    return _crr_backward(S0, K, r, q, sigma, T / n_nodes, n_nodes, option_type, kernel = kernel, smooth = tree == 'bbs')[0][0]
+
+
+@instrumented()
+def american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type, kernel = 'numpy', tree = 'crr'):    #Pricing via a binomial tree with continuous dividend yield, Cox-Ross-Rubenstein by default
+
+    #tree is 'crr' (Cox-Ross-Rubenstein), 'lr' (Leisen-Reimer, n_nodes is rounded up to an odd number), 'bbs' (CRR with a Black-Scholes last step),
+    #or 'lrr' and 'bbsr', LR and BBS Richardson-extrapolated from n_nodes and n_nodes // 2 steps. These reach penny accuracy with 50-100 nodes where CRR needs 500+
+    return _binomial_price(S0, K, T, r, q, sigma, option_type, kernel, n_nodes, tree)
+
+
+def _binomial_greeks(S0, K, T, r, q, sigma, option_type, kernel, n_nodes, tree):
+
+    n_nodes = _tree_steps(n_nodes, tree)
+    if not sigma * np.sqrt(T) > 0:
+        return tuple(float(x) for x in _deterministic(S0, K, T, r, q, 1.0 if option_type == "Call" else -1.0))
+    if tree in RICHARDSON:
+        return tuple(float(x) for x in _extrapolated(_binomial_greeks, n_nodes, tree, (S0, K, T, r, q, sigma, option_type, kernel)))
+    
+    if tree == 'lr':
+        #The LR tree is centred on the strike rather than on S0 and cannot be extended back in time around S0. Delta and gamma come from
+        #the three nodes at level 2 and theta from the middle one, moved from S0 * u * d back to S0 along delta and gamma
+        dt = T / n_nodes
+        u, d, _ = _lr_parameters(S0, K, T, r, q, sigma, n_nodes)
+        saved = _lr_backward(S0, K, T, r, q, sigma, n_nodes, option_type, levels = (0, 2), kernel = kernel)
+        f_uu, f_ud, f_dd = saved[2]
+        S_uu, S_ud, S_dd = S0 * u**2, S0 * u * d, S0 * d**2
+        price = saved[0][0]
+        delta = (f_uu - f_dd) / (S_uu - S_dd)
+        gamma = ((f_uu - f_ud) / (S_uu - S_ud) - (f_ud - f_dd) / (S_ud - S_dd)) / (0.5 * (S_uu - S_dd))
+        theta = (((f_ud - delta * (S_ud - S0) - 0.5 * gamma * (S_ud - S0)**2) - price) / (2 * dt)) / 252
+        return price, delta, gamma, theta
+    
+    #The tree starts two steps before today, so level 2 holds the nodes S0*u^2, S0, S0*d^2 at time 0 and the middle node is the price at S0
+    dt = T / n_nodes
+    u = np.exp(sigma * np.sqrt(dt))
+    saved = _crr_backward(S0, K, r, q, sigma, dt, n_nodes + 2, option_type, levels = (0, 2), kernel = kernel, smooth = tree == 'bbs')
+    f_uu, f_ud, f_dd = saved[2]
+    S_uu, S_dd = S0 * u**2, S0 / u**2
     
+    price = f_ud
+    delta = (f_uu - f_dd) / (S_uu - S_dd)
+    gamma = ((f_uu - f_ud) / (S_uu - S0) - (f_ud - f_dd) / (S0 - S_dd)) / (0.5 * (S_uu - S_dd))
+    theta = -(((saved[0][0] - f_ud) / (2 * dt)) / 252)  #Root has the same spot and 2*dt more time to maturity, divided by 252 for daily theta
     
+    return price, delta, gamma, theta
+
+
+@instrumented()
+def american_binomial_greeks(S0, K, T, r, q, sigma, n_nodes, option_type, kernel = 'numpy', tree = 'crr'):  #Price, delta, gamma and theta read off a single binomial tree, for CRR and BBS extended two steps back in time around S0
+
+    return _binomial_greeks(S0, K, T, r, q, sigma, option_type, kernel, n_nodes, tree)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 19:36:05 2026
+
+@author: jesseruijer
+"""
+
+#Finite-difference American engine: Crank-Nicolson in x = log S on a uniform grid, with Rannacher start-up steps against the payoff kink
+#and the early exercise constraint applied by a Brennan-Schwartz solve (default) or projected SOR
+#One solve gives the price, delta, gamma and theta at every node of the grid, vega and rho take one bumped solve each on the same grid,
+#so a Greek profile against spot costs 3 solves instead of a few trees per spot
+
+import numpy as np
+import Kernels
+from Instrumentation import instrumented
+
+SOLVERS = ('brennan_schwartz', 'psor')
+
+
+def _grid(S0, K, T, sigma, n_space, width, S_range):    #Uniform log-spot grid with S0 on the middle node, reaching width standard deviations beyond K and S_range
+
+    reach = [abs(np.log(K / S0))]
+    if S_range is not None:
+        reach += [abs(np.log(np.min(S_range) / S0)), abs(np.log(np.max(S_range) / S0))]
+    half_width = max(reach) + width * sigma * np.sqrt(T)
+    n = max(n_space // 2, 2)
+    dx = half_width / n
+    return np.log(S0) + dx * np.arange(-n, n + 1), dx
+
+
+def _brennan_schwartz(lower, diagonal, upper, rhs, payoff, guess, sign, kernels, factors, **_):   #Constrained tridiagonal solve, the exercise region is at the low end for puts and at the high end for calls
+
+    if sign > 0:
+        #Reversing the grid puts the call exercise region at the low end, and swaps the lower and upper diagonals
+        return _brennan_schwartz(upper, diagonal, lower, rhs[::-1], payoff[::-1], None, -sign, kernels, factors)[::-1]
+    #The elimination factors are the same for every step of one length and scheme
+    key = (lower, diagonal, upper)
+    if key not in factors:
+        factors[key] = Kernels.brennan_schwartz_factors(lower, diagonal, upper, len(rhs))
+    pivots, multipliers = factors[key]
+    if kernels is not None:
+        out = np.empty(len(rhs))
+        kernels.brennan_schwartz(lower, pivots, multipliers, np.ascontiguousarray(rhs), np.ascontiguousarray(payoff), out)
+        return out
+    #The interpreted loop runs fastest on lists
+    if not isinstance(pivots, list):
+        factors[key] = pivots, multipliers = pivots.tolist(), multipliers.tolist()
+    out = [0.0] * len(rhs)
+    Kernels.brennan_schwartz(lower, pivots, multipliers, rhs.tolist(), payoff.tolist(), out)
+    return np.array(out)
+
+
+def _psor(lower, diagonal, upper, rhs, payoff, guess, sign, kernels, factors, omega, tol, max_iter):   #Constrained tridiagonal solve by projected SOR, starting from guess
+
+    #Red-black ordering: the even nodes only depend on odd ones and vice versa, so each half sweep is one vectorized update
+    v = np.maximum(guess, payoff)
+    neighbours = np.zeros(len(v) + 2)
+    for _ in range(max_iter):
+        change = 0.0
+        for parity in (0, 1):
+            neighbours[1:-1] = v
+            gauss_seidel = (rhs[parity::2] - lower * neighbours[parity:-2:2] - upper * neighbours[parity + 2::2]) / diagonal
+            updated = np.maximum(payoff[parity::2], v[parity::2] + omega * (gauss_seidel - v[parity::2]))
+            change = max(change, np.max(np.abs(updated - v[parity::2])))
+            v[parity::2] = updated
+        if change < tol:
+            break
+    return v
+
+
+def _solve(x, dx, K, T, r, q, sigma, sign, n_time, solver, rannacher_steps, kernels, omega, tol, max_iter):   #Option values on the grid x at maturity T and one time step before, with that step
+
+    S = np.exp(x)
+    payoff = np.maximum(sign * (S - K), 0)
+    interior_payoff = payoff[1:-1]
+
+    #The Black-Scholes operator in log-spot has constant coefficients a V[i - 1] + b V[i] + c V[i + 1]
+    mu = r - q - 0.5 * sigma**2
+    a = 0.5 * sigma**2 / dx**2 - mu / (2 * dx)
+    b = -sigma**2 / dx**2 - r
+    c = 0.5 * sigma**2 / dx**2 + mu / (2 * dx)
+
+    #Rannacher: each of the first rannacher_steps Crank-Nicolson steps is replaced by two fully implicit half steps
+    dt = T / n_time
+    rannacher_steps = min(rannacher_steps, n_time)
+    steps = [(0.5 * dt, 1.0)] * (2 * rannacher_steps) + [(dt, 0.5)] * (n_time - rannacher_steps)
+
+    if omega is None:
+        #Optimal SOR factor of the Crank-Nicolson matrix, from the spectral radius of its Jacobi iteration
+        rho_jacobi = min(2 * np.sqrt(abs(a * c)) * 0.5 * dt / abs(1 - 0.5 * dt * b), 1 - 1e-12)
+        omega = 2 / (1 + np.sqrt(1 - rho_jacobi**2))
+    solve = _brennan_schwartz if solver == 'brennan_schwartz' else _psor
+
+    V, tau, factors = payoff, 0.0, {}
+    for k, theta in steps:
+        tau += k
+        #Dirichlet boundaries: the larger of the intrinsic value and the European asymptote at the edges of the grid
+        edges = np.maximum(np.maximum(sign * (S[[0, -1]] * np.exp(-q * tau) - K * np.exp(-r * tau)), sign * (S[[0, -1]] - K)), 0)
+        rhs = V[1:-1] + (1 - theta) * k * (a * V[:-2] + b * V[1:-1] + c * V[2:])
+        rhs[0] += theta * k * a * edges[0]
+        rhs[-1] += theta * k * c * edges[1]
+        interior = solve(-theta * k * a, 1 - theta * k * b, -theta * k * c, rhs, interior_payoff, V[1:-1], sign, kernels, factors,
+                         omega = omega, tol = tol, max_iter = max_iter)
+        previous, V = V, np.concatenate((edges[:1], interior, edges[1:]))
+
+    return V, previous, k
+
+
+@instrumented()
+def american_pde(S0, K, T, r, q, sigma, option_type, n_space = 401, n_time = 200, solver = 'brennan_schwartz', rannacher_steps = 2,
+                 S_range = None, width = 5, kernel = 'numpy', omega = None, tol = 1e-10, max_iter = 1000):   #Price and Greeks at every node of a Crank-Nicolson grid
+
+    #Returns a dict of arrays over the interior nodes: 'S', 'price', 'delta', 'gamma', 'vega', 'rho', 'theta' (same units as compute_greeks_american),
+    #and 'index', the node of S0. The grid reaches width standard deviations beyond K and, if given, the spots in S_range.
+    #solver 'brennan_schwartz' is exact for the single exercise boundary of a vanilla option, 'psor' iterates to tol (omega None picks the optimal factor)
+    #kernel 'numba' or 'auto' compiles the Brennan-Schwartz loop (see Kernels.py)
+    if solver not in SOLVERS:
+        raise ValueError(f"solver must be one of {', '.join(SOLVERS)}, not {solver!r}")
+    if T <= 0 or sigma <= 0:
+        raise ValueError("american_pde needs T > 0 and sigma > 0")
+
+    sign = 1 if option_type == 'Call' else -1
+    kernels = Kernels.load(kernel) if solver == 'brennan_schwartz' else None
+    x, dx = _grid(S0, K, T, sigma, n_space, width, S_range)
+    solve = lambda r, sigma: _solve(x, dx, K, T, r, q, sigma, sign, n_time, solver, rannacher_steps, kernels, omega, tol, max_iter)
+
+    #One-sided bumps: the bumped solves share the grid, so small bumps carry no discretization noise and keep the one-sided bias small
+    h_sigma = 0.0001
+    h_r = 0.0001
+    V, previous, k = solve(r, sigma)
+    vega = (solve(r, sigma + h_sigma)[0] - V) / h_sigma / 100    #Per 1% change in volatility
+    rho = (solve(r + h_r, sigma)[0] - V) / h_r / 100    #Per 1% change in interest rates
+
+    S = np.exp(x[1:-1])
+    V_x = (V[2:] - V[:-2]) / (2 * dx)
+    V_xx = (V[2:] - 2 * V[1:-1] + V[:-2]) / dx**2
+
+    return {
+        'S' : S,
+        'price' : V[1:-1],
+        'delta' : V_x / S,
+        'gamma' : (V_xx - V_x) / S**2,
+        'vega' : vega[1:-1],
+        'rho' : rho[1:-1],
+        'theta' : -((V[1:-1] - previous[1:-1]) / k / 252),    #Daily theta, from the last time step
+        'index' : len(x) // 2 - 1
+        }
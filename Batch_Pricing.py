@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 09:26:44 2026
+
+@author: jesseruijer
+"""
+
+#Command-line batch pricing of a file of contracts, streamed in chunks so memory stays bounded for any number of rows
+#
+#   python Batch_Pricing.py contracts.csv prices.csv --greeks
+#   python Batch_Pricing.py contracts.parquet prices.parquet --chunk-size 200000    (Parquet needs pyarrow)
+#
+#Input columns: style (European/American), type (Call/Put), S0, K, T, r, q, sigma and optionally n_nodes (tree steps of an American row)
+#European rows are priced with Black-Scholes, American rows with the CRR binomial tree, both vectorized over the chunk
+#--american auto prices American rows with the Bjerksund-Stensland approximation where it is within a cent and with the tree elsewhere (prices only)
+#The output has the input columns followed by price (and delta, gamma, vega, rho, theta with --greeks, in the units of Greeks.py)
+#Rows that cannot be priced (missing or out-of-range inputs) get NaN results and are counted in the summary
+
+import argparse
+import csv
+import os
+import sys
+import time
+import numpy as np
+from Black_Scholes import Black_Scholes_Chain
+from American_Options import american_binomial_batch, american_binomial_greeks_batch
+from American_Approximations import american_approximation, american_fast
+
+REQUIRED = ['style', 'type', 'S0', 'K', 'T', 'r', 'q', 'sigma']
+NUMERIC = ['S0', 'K', 'T', 'r', 'q', 'sigma', 'n_nodes']
+GREEKS = ['delta', 'gamma', 'vega', 'rho', 'theta']
+PARQUET = ('.parquet', '.pq')
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Reading or writing Parquet needs pyarrow, install it with 'pip install pyarrow' or use CSV files") from None
+    return pyarrow
+
+
+def read_chunks(path, chunk_size):    #Yields the contracts of a CSV or Parquet file as dicts of column name -> list or array, chunk_size rows at a time
+
+    if path.lower().endswith(PARQUET):
+        parquet = _pyarrow().parquet.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size = chunk_size):
+            yield {name : batch.column(name).to_numpy(zero_copy_only = False) for name in batch.schema.names}
+        return
+
+    with open(path, newline = '') as file:
+        reader = csv.reader(file)
+        header = [name.strip() for name in next(reader)]
+        rows = []
+        for row in reader:
+            if not row:     #blank line
+                continue
+            if len(row) != len(header):
+                raise ValueError(f"{path}, line {reader.line_num}: expected {len(header)} fields, found {len(row)}")
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield _csv_columns(header, rows)
+                rows = []
+        if rows:
+            yield _csv_columns(header, rows)
+
+
+def _csv_columns(header, rows):     #Columns of a chunk of CSV rows
+    return dict(zip(header, (list(column) for column in zip(*rows))))
+
+
+class ResultWriter:     #Appends priced chunks to a CSV or Parquet file, the Parquet schema is fixed by the first chunk
+
+    def __init__(self, path, float_format = '%.12g'):
+        self.path = path
+        self.float_format = float_format    #CSV only, formatting the floats up front is about twice as fast as letting the csv module do it
+        self.parquet = path.lower().endswith(PARQUET)
+        self._file = None
+        self._writer = None
+
+    def write(self, columns):
+        if self.parquet:
+            pyarrow = _pyarrow()
+            #Numeric input columns read from CSV are stored as numbers, not as their text
+            table = pyarrow.table({name : _float_column(values) if name in NUMERIC and np.asarray(values).dtype.kind in 'UO' else np.asarray(values)
+                                   for name, values in columns.items()})
+            if self._writer is None:
+                self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+            return
+
+        if self._writer is None:
+            self._file = open(self.path, 'w', newline = '')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(columns)
+        self._writer.writerows(zip(*(self._text(values) for values in columns.values())))
+
+    def _text(self, values):
+        if isinstance(values, np.ndarray) and values.dtype.kind == 'f':
+            return [self.float_format % value for value in values.tolist()]
+        return values.tolist() if isinstance(values, np.ndarray) else values
+
+    def close(self):
+        if self.parquet and self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+
+
+def _float_column(values):  #Float array of a column, empty or unparsable entries become NaN
+    try:
+        return np.asarray(values, dtype = float)
+    except ValueError:
+        return np.array([_to_float(value) for value in values])
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _american_rows(S0, K, T, r, q, sigma, is_call, n_nodes, greeks):     #Price (and Greeks as in compute_greeks_american) of American rows sharing n_nodes, in one batch of trees per quantity
+
+    if not greeks:
+        return {'price' : american_binomial_batch(S0, K, T, r, q, sigma, n_nodes, is_call)}
+
+    #Delta, gamma and theta from the extended trees, vega and rho from bumped trees with the bump sizes of compute_greeks_american.
+    #The vol bump is narrowed where sigma - 0.01 would take the CRR probability outside [0, 1], down to half the distance to that limit
+    price, delta, gamma, theta = american_binomial_greeks_batch(S0, K, T, r, q, sigma, n_nodes, is_call)
+    tree = lambda r, sigma: american_binomial_batch(S0, K, T, r, q, sigma, n_nodes, is_call)
+    h_sigma = np.minimum(0.01, 0.5 * (sigma - np.abs(r - q) * np.sqrt(T / n_nodes)))
+    vega = (tree(r, sigma + h_sigma) - tree(r, sigma - h_sigma)) / (2 * h_sigma) / 100
+    rho = (tree(r + 0.0001, sigma) - tree(np.maximum(1e-7, r - 0.0001), sigma)) / (2 * 0.0001) / 100
+    return {'price' : price, 'delta' : delta, 'gamma' : gamma, 'vega' : vega, 'rho' : rho, 'theta' : theta}
+
+
+def price_chunk(columns, greeks = False, n_nodes = 200, tree_batch = 2048, american_method = 'tree'):    #Prices one chunk of contracts, returns the result columns and the number of rows that could not be priced
+
+    missing = [name for name in REQUIRED if name not in columns]
+    if missing:
+        raise ValueError(f"Input is missing the column(s) {', '.join(missing)}")
+
+    style = np.char.lower(np.char.strip(np.asarray(columns['style'], dtype = str)))
+    option_type = np.char.lower(np.char.strip(np.asarray(columns['type'], dtype = str)))
+    S0, K, T, r, q, sigma = (_float_column(columns[name]) for name in REQUIRED[2:])
+    nodes = _float_column(columns['n_nodes']) if 'n_nodes' in columns else np.full(len(S0), float(n_nodes))
+    nodes = np.where(np.isfinite(nodes) & (nodes >= 1), nodes, n_nodes).astype(int)
+    is_call = option_type == 'call'
+
+    valid = (np.isin(style, ('european', 'american')) & np.isin(option_type, ('call', 'put'))
+             & (S0 > 0) & (K > 0) & (T >= 0) & (sigma >= 0) & np.isfinite(r) & np.isfinite(q))
+    european = valid & (style == 'european')
+    #The tree needs a positive time step and volatility, and sigma > |r - q| * sqrt(dt) to keep the CRR probability inside [0, 1]
+    american = valid & (style == 'american') & (T > 0) & (sigma > np.abs(r - q) * np.sqrt(np.where(T > 0, T, 0) / nodes))
+
+    names = ['price'] + (GREEKS if greeks else [])
+    results = {name : np.full(len(S0), np.nan) for name in names}
+
+    index = np.flatnonzero(european)
+    if len(index):
+        chain = Black_Scholes_Chain(S0[index], K[index], T[index], r[index], q[index], sigma[index], is_call[index])
+        for name in names:
+            results[name][index] = chain[name]
+
+    #Without Greeks, american_method 'bs2002' or 'baw' prices every American row with that approximation and 'auto' the rows where it is safe
+    tree = american
+    if american_method != 'tree' and not greeks:
+        index = np.flatnonzero(american)
+        if american_method == 'auto':
+            approximation = american_approximation(S0[index], K[index], T[index], r[index], q[index], sigma[index], is_call[index])
+            index = index[approximation['safe']]
+            results['price'][index] = approximation['price'][approximation['safe']]
+        else:
+            results['price'][index] = american_fast(S0[index], K[index], T[index], r[index], q[index], sigma[index], is_call[index], american_method)
+        tree = american.copy()
+        tree[index] = False
+    
+    #American rows are grouped by tree size and priced tree_batch rows at a time, the ladders take tree_batch * (2 * n_nodes + 1) floats
+    for steps in np.unique(nodes[tree]):
+        group = np.flatnonzero(tree & (nodes == steps))
+        for start in range(0, len(group), tree_batch):
+            index = group[start : start + tree_batch]
+            values = _american_rows(S0[index], K[index], T[index], r[index], q[index], sigma[index], is_call[index], steps, greeks)
+            for name in names:
+                results[name][index] = values[name]
+
+    return results, int(np.sum(~(european | american)))
+
+
+def price_file(input_path, output_path, chunk_size = 100000, greeks = False, n_nodes = 200, tree_batch = 2048, progress = sys.stderr,
+               float_format = '%.12g', american_method = 'tree'):     #Streams input_path through price_chunk into output_path, returns (rows, unpriced rows, seconds)
+
+    writer = ResultWriter(output_path, float_format)
+    n_rows = n_failed = 0
+    start = time.perf_counter()
+    try:
+        for columns in read_chunks(input_path, chunk_size):
+            results, failed = price_chunk(columns, greeks, n_nodes, tree_batch, american_method)
+            writer.write({**columns, **results})
+            n_rows += len(results['price'])
+            n_failed += failed
+            if progress:
+                elapsed = time.perf_counter() - start
+                print(f"{n_rows:,} contracts priced, {n_rows / elapsed:,.0f} contracts/s", file = progress, flush = True)
+    finally:
+        writer.close()
+
+    return n_rows, n_failed, time.perf_counter() - start
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(prog = 'python Batch_Pricing.py', description = "Price a CSV or Parquet file of European and American options in chunks")
+    parser.add_argument('input', help = "CSV or Parquet (.parquet, .pq) file of contracts")
+    parser.add_argument('output', help = "CSV or Parquet file for the results, the format follows the extension")
+    parser.add_argument('--greeks', action = 'store_true', help = "also compute delta, gamma, vega, rho and theta")
+    parser.add_argument('--chunk-size', type = int, default = 100000, help = "rows read, priced and written at a time (default 100000)")
+    parser.add_argument('--n-nodes', type = int, default = 200, help = "binomial tree steps for American rows without an n_nodes column (default 200)")
+    parser.add_argument('--tree-batch', type = int, default = 2048, help = "American rows rolled back together in one batch of trees (default 2048)")
+    parser.add_argument('--american', choices = ('tree', 'auto', 'bs2002', 'baw'), default = 'tree',
+                        help = "American prices from the binomial tree (default), the Bjerksund-Stensland or Barone-Adesi-Whaley approximation, "
+                               "or auto: the approximation where it is within a cent and the tree elsewhere (the tree is always used with --greeks)")
+    parser.add_argument('--float-format', default = '%.12g', help = "printf-style format of the CSV results (default %%.12g)")
+    parser.add_argument('--quiet', action = 'store_true', help = "no progress output")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("input and output must be different files")
+
+    try:
+        n_rows, n_failed, seconds = price_file(args.input, args.output, args.chunk_size, args.greeks, args.n_nodes, args.tree_batch,
+                                               progress = None if args.quiet else sys.stderr, float_format = args.float_format,
+                                               american_method = args.american)
+    except (OSError, ImportError, ValueError) as error:
+        print(f"error: {error}", file = sys.stderr)
+        return 1
+
+    print(f"Priced {n_rows:,} contracts in {seconds:.2f} s ({n_rows / max(seconds, 1e-9):,.0f} contracts/s)"
+          + (f", {n_failed:,} rows could not be priced and have NaN results" if n_failed else ""), file = sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
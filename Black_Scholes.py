@@ -7,7 +7,11 @@ Created on Tue Jul 22 16:17:29 2025
 """
 
 import numpy as np
-import scipy.stats as sts
+from scipy.special import ndtr as norm_cdf  #the function behind scipy.stats.norm.cdf, without the import time of scipy.stats
+from Instrumentation import instrumented
+
+def norm_pdf(x):    #Standard normal density, as scipy.stats.norm.pdf
+    return np.exp(-0.5 * x**2) / np.sqrt(2 * np.pi)
 
 #Calculate Black-Scholes analytical price
 
@@ -16,14 +20,48 @@ def Black_Scholes_Comp(S0, K, T, r, q, sigma, option_type):
     d2 = d1 - sigma * np.sqrt(T)
     
     if option_type == 'Call':
-        return S0 * sts.norm.cdf(d1) - K * np.exp(-r * T) * sts.norm.cdf(d2)
+        return S0 * np.exp(-q * T) * norm_cdf(d1) - K * np.exp(-r * T) * norm_cdf(d2)
         
     elif option_type == 'Put':
-        return K * np.exp(-r * T) * sts.norm.cdf(-d2) - S0 * sts.norm.cdf(-d1)
+        return K * np.exp(-r * T) * norm_cdf(-d2) - S0 * np.exp(-q * T) * norm_cdf(-d1)
     
     
+@instrumented()
+def Black_Scholes_Chain(S0, K, T, r, q, sigma, option_type):   #Prices and analytic Greeks for broadcastable arrays of contracts in one pass
+
+    #option_type may be 'Call'/'Put' (or an array of them) or a boolean (array) that is True for calls
+    option_type = np.asarray(option_type)
+    if option_type.dtype.kind in 'UO':
+        is_call = option_type == 'Call'
+    else:
+        is_call = option_type.astype(bool)
+
+    S0, K, T, r, q, sigma, is_call = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (S0, K, T, r, q, sigma)), is_call)
+    sign = np.where(is_call, 1.0, -1.0)
+
+    sqrt_T = np.sqrt(T)
+    vol = sigma * sqrt_T
+    degenerate = vol <= 0   #T = 0 or sigma = 0, the option is worth its discounted intrinsic value on the forward
+    safe_vol = np.where(degenerate, 1.0, vol)
+    safe_sqrt_T = np.where(sqrt_T > 0, sqrt_T, 1.0)
+
+    disc_r = np.exp(-r * T)
+    disc_q = np.exp(-q * T)
+    moneyness = np.log(S0 / K) + (r - q) * T
 
+    d1 = np.where(degenerate, np.where(moneyness > 0, np.inf, -np.inf), (moneyness + 0.5 * sigma**2 * T) / safe_vol)
+    d2 = d1 - np.where(degenerate, 0.0, vol)
 
- 
+    #The cdf and pdf are evaluated once and shared by the price and every Greek
+    Nd1 = norm_cdf(sign * d1)
+    Nd2 = norm_cdf(sign * d2)
+    pdf_d1 = norm_pdf(d1)
 
-    
\ No newline at end of file
+    return {
+        'price' : sign * (S0 * disc_q * Nd1 - K * disc_r * Nd2),
+        'delta' : sign * disc_q * Nd1,
+        'gamma' : disc_q * pdf_d1 / (S0 * safe_vol),
+        'vega' : S0 * disc_q * pdf_d1 * sqrt_T / 100,   #Per 1% change in volatility, same units as Greeks.py
+        'rho' : sign * K * T * disc_r * Nd2 / 100,  #Per 1% change in interest rates
+        'theta' : (-S0 * disc_q * pdf_d1 * sigma / (2 * safe_sqrt_T) + sign * (q * S0 * disc_q * Nd1 - r * K * disc_r * Nd2)) / 252  #Daily theta
+        }
@@ -8,15 +8,19 @@ Created on Tue Jul 22 16:13:19 2025
 
 #MONTECARLO OPTION PRICING FOR EUROPEAN OPTIONS
 
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
+from scipy.special import ndtri     #inverse normal cdf, scipy.stats, scipy.stats.qmc and matplotlib are imported where they are used so the engines import quickly
+from Instrumentation import instrumented
 
 
-def European(S0, K, T, r, q, sigma, N, option_type): #Calculate European Option Prices Using Monte Carlo Simulation
+@instrumented()
+def European(S0, K, T, r, q, sigma, N, option_type, seed = 69, return_ST = True): #Calculate European Option Prices Using Monte Carlo Simulation
 
 #Simulate end of period prices using Geometric Brownian Motion
-    np.random.seed(69)  #setting seed for reproducibility
-    Z = np.random.standard_normal(N)    #simulates N standard normal random variables
+    rng = np.random.default_rng(seed)   #local generator for reproducibility, leaves the global NumPy random state alone
+    Z = rng.standard_normal(N)    #simulates N standard normal random variables
     ST = S0*np.exp((r - q - 0.5 * sigma**2) * T + sigma* np.sqrt(T) * Z) #Simulates final stock price ST under GBM, Uses Continuous Yield Dividend Model
 
     if option_type == 'Call':
@@ -27,12 +31,305 @@ def European(S0, K, T, r, q, sigma, N, option_type): #Calculate European Option
         #Discount expected payoff under risk-neutral rate
     option_price = np.exp(-r * T) * np.mean(payoffs)
 
-    return option_price, ST 
+    return option_price, ST if return_ST else None
 
-def plot_european(K, ST):   #Plots Histogram of simulated final stock price
+@instrumented()
+def European_greeks(S0, K, T, r, q, sigma, N, option_types = ("Call", "Put"), seed = 69):    #Price and Greeks with standard errors from one common set of simulated paths
 
+    Z = np.random.default_rng(seed).standard_normal(N)  #same seed and sample as European, so the price matches it exactly
+    ST = S0*np.exp((r - q - 0.5 * sigma**2) * T + sigma* np.sqrt(T) * Z)
+    discount = np.exp(-r * T)
+    
+    #Derivatives of ST along each path, reused by every Greek
+    if sigma * np.sqrt(T) > 0:
+        dST_dsigma = ST * (np.sqrt(T) * Z - sigma * T)
+        dST_dT = ST * ((r - q - 0.5 * sigma**2) + sigma * Z / (2 * np.sqrt(T)))
+        score = (Z / (sigma * np.sqrt(T)) - 1) / S0**2  #Likelihood-ratio weight turning the pathwise delta into gamma
+    else:
+        #T = 0 or sigma = 0: ST is the forward S0 * exp((r - q) T) on every path, the Greeks are those of the discounted intrinsic value
+        dST_dsigma = np.zeros(N)
+        dST_dT = ST * (r - q)
+        score = np.zeros(N)
+    
+    prices = {}
+    greeks = {}
+    std_errors = {}
+    
+    for option_type in option_types:
+        
+        if option_type == 'Call':
+            in_the_money = ST > K
+            sign = 1
+        else:
+            in_the_money = ST < K
+            sign = -1
+        
+        payoffs = discount * np.maximum(sign * (ST - K), 0)
+        weight = discount * sign * in_the_money     #derivative of the discounted payoff with respect to ST
+        
+        samples = {
+            'price' : payoffs,
+            'delta' : weight * ST / S0,     #Pathwise
+            'gamma' : weight * ST * score,  #Mixed pathwise / likelihood-ratio
+            'vega' : weight * dST_dsigma / 100,     #Per 1% change in volatility
+            'rho' : weight * K * T / 100,   #Per 1% change in interest rates
+            'theta' : -((weight * dST_dT - r * payoffs) / 252)  #Daily theta, the sign flips since theta is minus the derivative to T
+            }
+        
+        prices[option_type] = np.mean(payoffs)
+        greeks[option_type] = {greek : np.mean(values) for greek, values in samples.items() if greek != 'price'}
+        std_errors[option_type] = {greek : np.std(values, ddof = 1) / np.sqrt(N) for greek, values in samples.items()}
+    
+    return prices, greeks, std_errors
+
+@instrumented()
+def European_grid(S0, K, T, r, q, sigma, N, option_type, seed = 69):   #Monte Carlo prices for broadcastable grids of contracts from one normal sample, equal to calling European on each contract
+
+    #option_type may be 'Call'/'Put' (or an array of them) or a boolean (array) that is True for calls
+    option_type = np.asarray(option_type)
+    is_call = option_type == 'Call' if option_type.dtype.kind in 'UO' else option_type.astype(bool)
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (S0, K, T, r, q, sigma)), is_call)
+    shape = arrays[0].shape
+    S0, K, T, r, q, sigma, is_call = (x.ravel() for x in arrays)
+
+    Z = np.random.default_rng(seed).standard_normal(N)     #same seed and sample as European
+    prices = np.empty(len(S0))
+
+    #ST = S0 * G with a growth factor G that only depends on (T, r, q, sigma), so G is simulated and sorted once per distinct combination
+    #and the payoffs of every spot and strike sharing it follow from the tail sums of G at the threshold K / S0
+    combos, inverse = np.unique(np.stack((T, r, q, sigma), axis = 1), axis = 0, return_inverse = True)
+    groups = np.split(np.argsort(inverse.ravel(), kind = 'stable'), np.cumsum(np.bincount(inverse.ravel()))[:-1])
+
+    for (t, rate, div, vol), index in zip(combos, groups):
+        growth = np.sort(np.exp((rate - div - 0.5 * vol**2) * t + vol * np.sqrt(t) * Z))
+        head = np.concatenate(([0.0], np.cumsum(growth)))   #head[j] is the sum of the j smallest growth factors
+        tail = np.concatenate((np.cumsum(growth[::-1])[::-1], [0.0]))  #tail[j] is the sum of all but the j smallest
+
+        S, strike = S0[index], K[index]
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            below = np.searchsorted(growth, strike / S, side = 'right')     #number of paths with ST <= K, S0 = 0 puts every path below
+
+        call = S * tail[below] - strike * (N - below)
+        put = strike * below - S * head[below]
+        prices[index] = np.exp(-rate * t) * np.where(is_call[index], call, put) / N
+
+    return prices.reshape(shape)
+
+def rng_streams(seed, n_streams):  #Independent random number generators spawned from one seed, one per chunk of work or worker
+    return [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(n_streams)]
+
+
+def _merge_moments(moments_a, moments_b):  #Combines (count, mean, M2) of two samples, the parallel form of Welford's algorithm
+    
+    n_a, mean_a, m2_a = moments_a
+    n_b, mean_b, m2_b = moments_b
+    n = n_a + n_b
+    if n == 0:
+        return moments_a
+    delta = mean_b - mean_a
+    return n, mean_a + delta * n_b / n, m2_a + m2_b + delta**2 * n_a * n_b / n
+
+
+def _histogram_edges(S0, T, r, q, sigma, bins):    #Fixed histogram bins covering all but ~1e-7 of the terminal price distribution, known before any path is drawn
+    
+    z = ndtri(1e-7)
+    drift = (r - q - 0.5 * sigma**2) * T
+    return np.linspace(S0 * np.exp(drift + sigma * np.sqrt(T) * z), S0 * np.exp(drift - sigma * np.sqrt(T) * z), bins + 1)
+
+
+def _stream_partial(S0, K, T, r, q, sigma, n_paths, option_type, rng, chunk_size, edges):  #Running (count, mean, M2) of the payoffs and histogram counts for one random stream
+    
+    moments = (0, 0.0, 0.0)
+    counts = np.zeros(len(edges) - 1, dtype = np.int64) if edges is not None else None
+    
+    while n_paths > 0:
+        n = min(chunk_size, n_paths)
+        n_paths -= n
+        
+        ST = S0*np.exp((r - q - 0.5 * sigma**2) * T + sigma* np.sqrt(T) * rng.standard_normal(n))
+        if option_type == 'Call':
+            payoffs = np.maximum(ST - K, 0)
+        else:
+            payoffs = np.maximum(K - ST, 0)
+        
+        mean = np.mean(payoffs)
+        moments = _merge_moments(moments, (n, mean, np.sum((payoffs - mean)**2)))
+        if edges is not None:
+            counts += np.histogram(ST, bins = edges)[0]
+    
+    return moments, counts
+
+
+@instrumented()
+def European_stream(S0, K, T, r, q, sigma, N, option_type, seed = 69, chunk_size = 2**20, n_streams = 1, hist_bins = None, alpha = 0.05,
+                    backend = 'serial', n_workers = None):   #Monte Carlo in fixed-size chunks with running moments, memory stays O(chunk_size) for any N
+    
+    #Paths are split evenly over n_streams independent streams, backend 'process' runs the streams on a pool of n_workers processes
+    #The partial moments are merged in stream order, so the result only depends on the seed and the number of streams
+    edges = _histogram_edges(S0, T, r, q, sigma, hist_bins) if hist_bins else None
+    stream_args = [(S0, K, T, r, q, sigma, N // n_streams + (1 if i < N % n_streams else 0), option_type, rng, chunk_size, edges)
+                   for i, rng in enumerate(rng_streams(seed, n_streams))]
+    
+    if backend == 'process':
+        with ProcessPoolExecutor(max_workers = n_workers or n_streams) as pool:
+            partials = list(pool.map(_stream_partial, *zip(*stream_args)))
+    else:
+        partials = [_stream_partial(*args) for args in stream_args]
+    
+    moments = (0, 0.0, 0.0)
+    counts = np.zeros(hist_bins, dtype = np.int64) if hist_bins else None
+    for partial_moments, partial_counts in partials:
+        moments = _merge_moments(moments, partial_moments)
+        if hist_bins:
+            counts += partial_counts
+    
+    n, mean, m2 = moments
+    price = np.exp(-r * T) * mean
+    std_error = np.exp(-r * T) * np.sqrt(m2 / (n - 1) / n) if n > 1 else np.nan
+    z = ndtri(1 - alpha / 2)
+    hist = (counts, edges) if hist_bins else None
+    
+    return price, std_error, (price - z * std_error, price + z * std_error), hist
+
+
+def _sobol_size(n):    #Sobol batches are rounded down to a power of two to keep the points balanced
+    return 2 ** max(int(np.log2(max(n, 2))), 1)
+
+
+def _vr_batch(rng, S0, K, T, r, q, sigma, n, option_type, method):   #Draws one batch of n paths, returns the observations Y and the control X (None unless method is 'control')
+
+    if method == 'sobol':
+        #Scrambled Sobol points mapped to normals, a batch is one randomized replicate so its mean is a single observation
+        from scipy.stats import qmc
+        u = qmc.Sobol(d = 1, scramble = True, seed = rng).random(_sobol_size(n))[:, 0]
+        Z = ndtri(u)
+    elif method == 'antithetic':
+        Z = rng.standard_normal(max(n // 2, 1))
+        Z = np.concatenate([Z, -Z])
+    else:
+        Z = rng.standard_normal(n)
+    
+    ST = S0*np.exp((r - q - 0.5 * sigma**2) * T + sigma* np.sqrt(T) * Z)
+    if option_type == 'Call':
+        Y = np.exp(-r * T) * np.maximum(ST - K, 0)
+    else:
+        Y = np.exp(-r * T) * np.maximum(K - ST, 0)
+    
+    if method == 'sobol':
+        return np.array([np.mean(Y)]), None
+    if method == 'antithetic':
+        half = len(Y) // 2
+        return 0.5 * (Y[:half] + Y[half:]), None    #Pairs are independent, the paths within a pair are not
+    if method == 'control':
+        return Y, np.exp(-r * T) * ST   #Discounted terminal stock, its mean S0*exp(-qT) is known exactly
+    return Y, None
+
+
+def _merge_comoments(moments_a, moments_b):    #Combines (count, mean Y, mean X, M2 of Y, M2 of X, co-moment of X and Y) of two samples, Chan's pairwise update
+    
+    n_a, mean_ya, mean_xa, m2_ya, m2_xa, c_a = moments_a
+    n_b, mean_yb, mean_xb, m2_yb, m2_xb, c_b = moments_b
+    n = n_a + n_b
+    if n == 0:
+        return moments_a
+    delta_y, delta_x = mean_yb - mean_ya, mean_xb - mean_xa
+    weight = n_a * n_b / n
+    return (n, mean_ya + delta_y * n_b / n, mean_xa + delta_x * n_b / n,
+            m2_ya + m2_yb + delta_y**2 * weight, m2_xa + m2_xb + delta_x**2 * weight, c_a + c_b + delta_x * delta_y * weight)
+
+
+def _vr_estimate(moments, control_mean, alpha):   #Price, standard error and confidence interval from the merged moments of the observations
+    
+    n, mean_y, mean_x, m2_y, m2_x, c_xy = moments
+    var_y = m2_y / (n - 1)
+    
+    if m2_x > 0:
+        #Control variate with the optimal coefficient beta = Cov(Y, X) / Var(X)
+        cov_xy = c_xy / (n - 1)
+        var_x = m2_x / (n - 1)
+        beta = cov_xy / var_x
+        price = mean_y - beta * (mean_x - control_mean)
+        variance = max(var_y - beta * cov_xy, 0)
+    else:
+        price = mean_y
+        variance = max(var_y, 0)
+    
+    std_error = np.sqrt(variance / n)
+    z = ndtri(1 - alpha / 2)
+    return price, std_error, (price - z * std_error, price + z * std_error)
+
+
+@instrumented()
+def European_VR(S0, K, T, r, q, sigma, N, option_type, method = 'antithetic', seed = 69, alpha = 0.05, n_replicates = 16):    #Variance-reduced Monte Carlo price with standard error, confidence interval and the number of paths simulated
+    
+    #method is 'plain', 'antithetic', 'control' (discounted terminal stock as control variate) or 'sobol' (randomized quasi-Monte Carlo)
+    #N is rounded down to whole antithetic pairs, or to n_replicates Sobol scrambles of a power of two points each, never up
+    min_paths = {'antithetic' : 2, 'sobol' : 2 * n_replicates}.get(method, 1)
+    if N < min_paths:
+        raise ValueError(f"Method '{method}' needs at least {min_paths} paths, got N = {N}")
+    if method == 'sobol':
+        #N is split over independent scrambles, the spread of their means gives the standard error
+        batch_size = N // n_replicates
+        max_paths = n_replicates * _sobol_size(batch_size)
+        min_batches = n_replicates
+    else:
+        batch_size, max_paths, min_batches = N, N, 1
+        
+    return European_adaptive(S0, K, T, r, q, sigma, option_type, method = method, target_se = 0, batch_size = batch_size,
+                             max_paths = max_paths, min_batches = min_batches, seed = seed, alpha = alpha)
+
+
+@instrumented()
+def European_adaptive(S0, K, T, r, q, sigma, option_type, method = 'antithetic', target_se = 1e-3, time_budget = None,
+                      batch_size = 10000, max_paths = 10**7, min_batches = 2, seed = 69, alpha = 0.05):    #Keeps simulating batches until the standard error is below target_se, the time budget (seconds) or max_paths is reached
+    
+    rng = np.random.default_rng(seed)
+    control_mean = S0 * np.exp(-q * T)
+    moments = (0, 0.0, 0.0, 0.0, 0.0, 0.0)  #n, mean Y, mean X, M2 of Y, M2 of X, co-moment of X and Y, merged batch by batch as in European_stream
+    #Paths drawn per batch: antithetic batches are whole pairs (at least one), Sobol batches a power of two
+    if method == 'antithetic':
+        batch_size = max(2, 2 * (batch_size // 2))
+    batch_paths = _sobol_size(batch_size) if method == 'sobol' else batch_size
+    n_paths = 0
+    n_batches = 0
+    start = time.perf_counter()
+    
+    while True:
+        Y, X = _vr_batch(rng, S0, K, T, r, q, sigma, batch_size, option_type, method)
+        n_paths += batch_paths
+        n_batches += 1
+        mean_y = np.mean(Y)
+        mean_x = np.mean(X) if X is not None else 0.0
+        batch = (len(Y), mean_y, mean_x, np.sum((Y - mean_y)**2),
+                 np.sum((X - mean_x)**2) if X is not None else 0.0, np.sum((X - mean_x) * (Y - mean_y)) if X is not None else 0.0)
+        moments = _merge_comoments(moments, batch)
+        
+        #Stop before a batch that would take the paths past max_paths
+        exhausted = n_paths + batch_paths > max_paths
+        if n_batches < min_batches:
+            continue
+        if moments[0] < 2:
+            if not exhausted:
+                continue
+            return moments[1], np.nan, (np.nan, np.nan), n_paths     #a single observation has no standard error
+        price, std_error, ci = _vr_estimate(moments, control_mean, alpha)
+        if std_error <= target_se or exhausted:
+            break
+        if time_budget is not None and time.perf_counter() - start >= time_budget:
+            break
+    
+    return price, std_error, ci, n_paths
+
+@instrumented()
+def plot_european(K, ST):   #Plots Histogram of simulated final stock price, ST is either the simulated prices or a (counts, edges) histogram from European_stream
+
+    import matplotlib.pyplot as plt
     fig, ax = plt.subplots(dpi=2048)
-    ax.hist(ST, bins=50 , color='blue')
+    if isinstance(ST, tuple):
+        counts, edges = ST
+        ax.hist(edges[:-1], bins=edges, weights=counts, color='blue')
+    else:
+        ax.hist(ST, bins=50 , color='blue')
     ax.axvline(K, color='red', label = 'Strike Price')
     ax.set_title("Simulated distribution of final stock price")
     ax.set_xlabel("Price at maturity")
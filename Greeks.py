@@ -8,13 +8,16 @@ Created on Tue Jul 22 16:15:54 2025
 
 #Calcation and plotting of option greeks
 
+import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib.pyplot as plt
-import streamlit as st
-from European_Options import European
-from American_Options import american_binomial
+from European_Options import European, European_greeks
+from American_Options import american_binomial, american_binomial_greeks, american_binomial_batch, american_binomial_greeks_batch
+from American_PDE import american_pde
+from Instrumentation import instrumented
 
-def compute_greeks_european(S0, K, r, q, sigma, T, N, option_type, h):      #Computes Greeks for European options
+@instrumented()
+def compute_greeks_european(S0, K, r, q, sigma, T, N, option_type, h, method = 'pathwise'):      #Computes Greeks for European options, option_type 'Both' returns Call and Put
     
     #Use different bump sizes for different scales
     h_S0 = h
@@ -23,8 +26,15 @@ def compute_greeks_european(S0, K, r, q, sigma, T, N, option_type, h):      #Com
     h_T = T * 1e-3 # Small bump in time
     
     greeks = {}
+    
+    option_types = ["Call", "Put"] if option_type == "Both" else [option_type]
+    
+    if method == 'pathwise':
+        #One simulation for all Greeks of both sides instead of 9 per side
+        _, greeks, _ = European_greeks(S0, K, T, r, q, sigma, N, option_types)
+        return greeks
         
-    for option_type in ["Call", "Put"]: 
+    for option_type in option_types: 
     
         #Delta 
         price_up, _ = European(S0 + h_S0, K, T, r, q, sigma, N, option_type) 
@@ -64,40 +74,60 @@ def compute_greeks_european(S0, K, r, q, sigma, T, N, option_type, h):      #Com
     
     
     
-def compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h):    #Computes Greeks for American options
+@instrumented()
+def compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h, method = 'tree', kernel = 'numpy', tree = 'crr'):    #Computes Greeks for American options, option_type 'Both' returns Call and Put
+    
+    #tree selects the binomial tree of american_binomial: 'crr', 'lr', 'lrr', 'bbs' or 'bbsr', the latter give stable Greeks at 50-100 nodes
+    #method 'pde' takes all Greeks from the Crank-Nicolson grid of american_pde with n_nodes time steps and 2 * n_nodes + 1 spot nodes,
+    #an expired contract (T = 0) or one without volatility has no grid, and falls back to the tree, which values it along its deterministic spot path
+    if method == 'pde' and not (T > 0 and sigma > 0):
+        method = 'tree'
         
     #Use different bump sizes for different scales
     h_S0 = h
     h_sigma = 0.01 # Bumps vol by 1%
     h_r = 0.0001 # Bumps rates by 1 basis point (1bp)
-    h_T = T * 1e-3 # Small bump in time
+    h_T = max(T * 1e-3, 1e-6) # Small bump in time, also for an expired contract
     greeks = {}
-        
-    for option_type in ["Call", "Put"]: 
     
-        #Delta
-        price_up= american_binomial(S0 + h_S0, K, T, r, q, sigma, n_nodes, option_type)
-        price_down = american_binomial(max(1e-7,S0 - h_S0), K, T, r, q, sigma, n_nodes, option_type)
-        delta = (price_up- price_down) / (2 * h_S0)
+    option_types = ["Call", "Put"] if option_type == "Both" else [option_type]
+        
+    for option_type in option_types: 
     
-        #Gamma 
-        price_center = american_binomial(S0, K, T, r, q, sigma, n_nodes,option_type)
-        gamma = (price_up + price_down - 2 * price_center) / (h_S0**2)
+        if method == 'pde':
+            grid = american_pde(S0, K, T, r, q, sigma, option_type, n_space = 2 * n_nodes + 1, n_time = n_nodes, kernel = kernel)
+            greeks[option_type] = {greek : grid[greek][grid['index']] for greek in ('delta', 'gamma', 'vega', 'rho', 'theta')}
+            continue
+        
+        if method == 'tree':
+            #Delta, gamma and theta from the first levels of one extended tree, 1 tree instead of 6
+            _, delta, gamma, theta = american_binomial_greeks(S0, K, T, r, q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+        
+        else:
+            #Delta
+            price_up= american_binomial(S0 + h_S0, K, T, r, q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+            price_down = american_binomial(max(1e-7,S0 - h_S0), K, T, r, q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+            delta = (price_up- price_down) / (2 * h_S0)
+        
+            #Gamma 
+            price_center = american_binomial(S0, K, T, r, q, sigma, n_nodes,option_type, kernel = kernel, tree = tree)
+            gamma = (price_up + price_down - 2 * price_center) / (h_S0**2)
+            
+            #Theta 
+            price_up = american_binomial(S0 , K, T + h_T, r, q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+            price_down = american_binomial(S0 , K, max(0, T - h_T), r, q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+            theta = -(((price_up - price_down) / (T + h_T - max(0, T - h_T)))/252) #Divided by 252 (number of trading days in a year) to obtain daily theta (since variable T is measured in years) 
     
         #Vega 
-        price_up = american_binomial(S0 , K, T, r, q, sigma + h_sigma, n_nodes, option_type)
-        price_down = american_binomial(S0 , K, T, r, q, max(1e-7,sigma - h_sigma), n_nodes,option_type)
-        vega = ((price_up - price_down) / (2 * h_sigma)/100) #Divided by 100 to report per 1%change itstead of per 100%change in volatility
+        price_up = american_binomial(S0 , K, T, r, q, sigma + h_sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+        #The down bump stops at sigma = 0, where the tree prices the deterministic path, the difference is taken over the actual bump
+        price_down = american_binomial(S0 , K, T, r, q, max(0, sigma - h_sigma), n_nodes,option_type, kernel = kernel, tree = tree)
+        vega = ((price_up - price_down) / (sigma + h_sigma - max(0, sigma - h_sigma))/100) #Divided by 100 to report per 1%change itstead of per 100%change in volatility
     
         #Rho 
-        price_up = american_binomial(S0 , K, T, r + h_r, q, sigma, n_nodes, option_type)
-        price_down = american_binomial(S0 , K, T, max(1e-7,r - h_r), q, sigma, n_nodes, option_type)
-        rho = ((price_up - price_down) / (2 * h_r)/100) #Divided by 100 to report per 1%change itstead of per 100%change in interest rates
-    
-        #Theta 
-        price_up = american_binomial(S0 , K, T + h_T, r, q, sigma, n_nodes, option_type)
-        price_down = american_binomial(S0 , K, max(1e-7,T - h_T), r, q, sigma, n_nodes, option_type)
-        theta = -(((price_up - price_down) / (2 * h_T))/252) #Divided by 252 (number of trading days in a year) to obtain daily theta (since variable T is measured in years) 
+        price_up = american_binomial(S0 , K, T, r + h_r, q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+        price_down = american_binomial(S0 , K, T, max(1e-7,r - h_r), q, sigma, n_nodes, option_type, kernel = kernel, tree = tree)
+        rho = ((price_up - price_down) / (r + h_r - max(1e-7, r - h_r))/100) #Divided by 100 to report per 1%change itstead of per 100%change in interest rates
     
         greeks[option_type] = {
             'delta' : delta,
@@ -111,223 +141,152 @@ def compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h):
     return greeks
 
 
-def plot_greeks_european(S0, K, r, q, sigma, T, N, option_type,h):    #Plots for European Greeks
+#Layout of the Greek profiles: axis 1 follows GREEKS, axis 2 follows SIDES
+GREEKS = ('delta', 'gamma', 'vega', 'rho', 'theta')
+SIDES = ('Call', 'Put')
+
+
+@instrumented()
+def greeks_profile_european(S_range, K, r, q, sigma, T, N, seed = 69):    #Pathwise Greeks of the call and put at every spot in S_range, returns a (len(S_range), 5, 2) array laid out as GREEKS x SIDES
+
+    #All spots share one normal sample, as they would with compute_greeks_european. ST = S * G with a growth factor G that
+    #does not depend on the spot, so after sorting the sample once every Greek is a combination of prefix sums of 1, G and G * Z
+    #over the in-the-money paths, found by a binary search on K / S
+    S_range = np.asarray(S_range, dtype = float)
+    vol = sigma * np.sqrt(T)
+    drift = r - q - 0.5 * sigma**2
+    discount = np.exp(-r * T)
     
-    #Range of spot prices
-    S_range = np.linspace(max(0, S0 - 30), S0 + 30, 30)
+    Z = np.sort(np.random.default_rng(seed).standard_normal(N))
+    G = np.exp(drift * T + vol * Z)
+    sums = np.zeros((3, N + 1))
+    np.cumsum(np.ones(N), out = sums[0, 1:])
+    np.cumsum(G, out = sums[1, 1:])
+    np.cumsum(G * Z, out = sums[2, 1:])
     
-   
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        threshold = K / S_range
+        call_itm = sums[:, [-1]] - sums[:, np.searchsorted(G, threshold, side = 'right')]    #paths with ST > K
+        put_itm = sums[:, np.searchsorted(G, threshold, side = 'left')]     #paths with ST < K
+        
+        profile = np.empty((len(S_range), len(GREEKS), len(SIDES)))
+        for j, (sign, (count, sum_G, sum_GZ)) in enumerate(zip((1, -1), (call_itm, put_itm))):
+            price = discount * sign * (S_range * sum_G - K * count) / N
+            profile[:, 0, j] = discount * sign * sum_G / N
+            profile[:, 3, j] = discount * sign * K * T * count / N / 100    #Per 1% change in interest rates
+            if vol > 0:
+                profile[:, 1, j] = np.where(S_range > 0, discount * sign * (sum_GZ / vol - sum_G) / (S_range * N), 0.0)
+                profile[:, 2, j] = discount * sign * S_range * (np.sqrt(T) * sum_GZ - sigma * T * sum_G) / N / 100     #Per 1% change in volatility
+                profile[:, 4, j] = -((discount * sign * S_range * (drift * sum_G + sigma / (2 * np.sqrt(T)) * sum_GZ) / N - r * price) / 252)  #Daily theta
+            else:
+                #T = 0 or sigma = 0: Greeks of the discounted intrinsic value on the forward, as European_greeks returns them
+                profile[:, 1, j] = 0.0
+                profile[:, 2, j] = 0.0
+                profile[:, 4, j] = -((discount * sign * S_range * (r - q) * sum_G / N - r * price) / 252)
     
-    call_deltas, put_deltas, call_gammas, put_gammas, call_vegas, put_vegas, call_rhos, put_rhos, call_thetas, put_thetas = [], [], [], [], [], [], [], [], [], []
-        
-    #Compute for each S
-        
-    for S0 in S_range:
-        greeks = compute_greeks_european(S0, K, r, q, sigma, T, N, option_type, h)        
-        delta_call = greeks["Call"]["delta"]
-        gamma_call = greeks["Call"]["gamma"]
-        vega_call = greeks["Call"]["vega"]
-        rho_call = greeks["Call"]["rho"]
-        theta_call = greeks["Call"]["theta"]
-    
-        delta_put = greeks["Put"]["delta"]
-        gamma_put = greeks["Put"]["gamma"]
-        vega_put = greeks["Put"]["vega"]
-        rho_put = greeks["Put"]["rho"]
-        theta_put = greeks["Put"]["theta"]
-            
-        call_deltas.append(delta_call)
-        put_deltas.append(delta_put)
-        call_gammas.append(gamma_call)
-        put_gammas.append(gamma_put)
-        call_vegas.append(vega_call)
-        put_vegas.append(vega_put)
-        call_rhos.append(rho_call)
-        put_rhos.append(rho_put)
-        call_thetas.append(theta_call)
-        put_thetas.append(theta_put)
-                
-        
-    #Plotting
-        
-    fig, axs = plt.subplots(5, 2, figsize=(12, 14))
+    return profile
+
+
+def _american_profile_pde(S_range, K, r, q, sigma, T, n_nodes, kernel):     #American Greeks of the call and put from the Crank-Nicolson grids of american_pde, interpolated onto S_range
+    
+    #The grid is centred on the geometric middle of S_range and reaches 5 standard deviations beyond it, so the interpolation never extrapolates
+    S0 = np.sqrt(np.min(S_range) * np.max(S_range))
+    profile = np.empty((len(S_range), len(GREEKS), len(SIDES)))
+    for j, side in enumerate(SIDES):
+        grid = american_pde(S0, K, T, r, q, sigma, side, n_space = 2 * n_nodes + 1, n_time = n_nodes, S_range = S_range, kernel = kernel)
+        for i, greek in enumerate(GREEKS):
+            profile[:, i, j] = np.interp(np.log(S_range), np.log(grid['S']), grid[greek])
+    return profile
+
+
+def _american_profile_chunk(S_range, K, r, q, sigma, T, n_nodes, h, method):     #American Greeks of the call and put for a chunk of spots, all trees of a Greek are rolled back as one batch
+    
+    #Same bump sizes as compute_greeks_american
+    h_sigma = 0.01
+    h_r = 0.0001
+    h_T = max(T * 1e-3, 1e-6)
+    
+    S = S_range[:, None]
+    sides = np.array([[True, False]])
+    tree = lambda S, T, r, sigma: american_binomial_batch(S, K, T, r, q, sigma, n_nodes, sides)
+    profile = np.empty((len(S_range), len(GREEKS), len(SIDES)))
+    
+    if method == 'tree':
+        _, profile[:, 0], profile[:, 1], profile[:, 4] = american_binomial_greeks_batch(S, K, T, r, q, sigma, n_nodes, sides)
+    else:
+        price_up = tree(S + h, T, r, sigma)
+        price_down = tree(np.maximum(1e-7, S - h), T, r, sigma)
+        profile[:, 0] = (price_up - price_down) / (2 * h)
+        profile[:, 1] = (price_up + price_down - 2 * tree(S, T, r, sigma)) / h**2
+        profile[:, 4] = -(((tree(S, T + h_T, r, sigma) - tree(S, max(0, T - h_T), r, sigma)) / (T + h_T - max(0, T - h_T))) / 252)
+    
+    profile[:, 2] = (tree(S, T, r, sigma + h_sigma) - tree(S, T, r, max(0, sigma - h_sigma))) / (sigma + h_sigma - max(0, sigma - h_sigma)) / 100
+    profile[:, 3] = (tree(S, T, r + h_r, sigma) - tree(S, T, max(1e-7, r - h_r), sigma)) / (r + h_r - max(1e-7, r - h_r)) / 100
+    
+    return profile
+
+
+@instrumented()
+def greeks_profile_american(S_range, K, r, q, sigma, T, n_nodes, h, method = 'tree', backend = 'serial', n_workers = None, kernel = 'numpy'):   #Greeks of the call and put at every spot in S_range as in compute_greeks_american, returns a (len(S_range), 5, 2) array laid out as GREEKS x SIDES
+    
+    #backend 'process' splits the spots over a pool of n_workers processes, each pricing its chunk in batched trees
+    #method 'pde' covers all spots with 3 Crank-Nicolson solves per side (price, vega and rho grids) and always runs serially, kernel 'numba' or 'auto' compiles its solver (the tree batches are NumPy throughout)
+    S_range = np.asarray(S_range, dtype = float)
+    
+    #The grid needs T > 0, sigma > 0 and positive spots, the tree covers the other profiles (along the deterministic spot path when T = 0 or sigma = 0)
+    if method == 'pde' and T > 0 and sigma > 0 and np.min(S_range) > 0:
+        return _american_profile_pde(S_range, K, r, q, sigma, T, n_nodes, kernel)
+    
+    if backend == 'process':
+        chunks = np.array_split(S_range, n_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers = n_workers) as pool:
+            partials = pool.map(_american_profile_chunk, chunks, *([arg] * len(chunks) for arg in (K, r, q, sigma, T, n_nodes, h, method)))
+            return np.concatenate(list(partials))
+    
+    return _american_profile_chunk(S_range, K, r, q, sigma, T, n_nodes, h, method)
+
+
+def _greeks_figure(S_range, profile):   #Figure with one panel per Greek and side, from a profile of greeks_profile_*
+    
+    import matplotlib.pyplot as plt     #matplotlib and streamlit are only imported by the plotting functions, the Greeks themselves run headless
+    fig, axs = plt.subplots(len(GREEKS), len(SIDES), figsize=(12, 14))
     fig.tight_layout(pad=5.0)
-        
-    axs[0,0].plot(S_range, call_deltas)
-    axs[0,0].grid(True)
-    axs[0,0].set_title("Delta vs Spot prices for call")
-    axs[0,0].set_xlabel("Spot Price")
-    axs[0,0].set_ylabel("Delta")
-        
-    axs[0,1].plot(S_range, put_deltas)
-    axs[0,1].grid(True)
-    axs[0,1].set_title("Delta vs Spot prices for put")
-    axs[0,1].set_xlabel("Spot Price")
-    axs[0,1].set_ylabel("Delta")
-            
-    axs[1,0].plot(S_range, call_gammas)
-    axs[1,0].grid(True)
-    axs[1,0].set_title("Gamma vs Spot prices for call")
-    axs[1,0].set_xlabel("Spot Price")
-    axs[1,0].set_ylabel("Gamma")
-    
-    axs[1,1].plot(S_range, put_gammas)
-    axs[1,1].grid(True)
-    axs[1,1].set_title("Gamma vs Spot prices for put")
-    axs[1,1].set_xlabel("Spot Price")
-    axs[1,1].set_ylabel("Gamma")
-        
-    axs[2,0].plot(S_range, call_vegas)
-    axs[2,0].grid(True)
-    axs[2,0].set_title("Vega vs Spot prices for call")
-    axs[2,0].set_xlabel("Spot Price")
-    axs[2,0].set_ylabel("Vega")
-        
-    axs[2,1].plot(S_range, put_vegas)
-    axs[2,1].grid(True)
-    axs[2,1].set_title("Vega vs Spot prices for put")
-    axs[2,1].set_xlabel("Spot Price")
-    axs[2,1].set_ylabel("Vega")
-        
-    axs[3,0].plot(S_range, call_rhos)
-    axs[3,0].grid(True)
-    axs[3,0].set_title("Rho vs Spot prices for call")
-    axs[3,0].set_xlabel("Spot Price")
-    axs[3,0].set_ylabel("Rho")
-        
-    axs[3,1].plot(S_range, put_rhos)
-    axs[3,1].grid(True)
-    axs[3,1].set_title("Rho vs Spot prices for put")
-    axs[3,1].set_xlabel("Spot Price")
-    axs[3,1].set_ylabel("Rho")
-        
-        
-    axs[4,0].plot(S_range, call_thetas)
-    axs[4,0].grid(True)
-    axs[4,0].set_title("Theta vs Spot prices for call")
-    axs[4,0].set_xlabel("Spot Price")
-    axs[4,0].set_ylabel("Theta")
-        
-        
-    axs[4,1].plot(S_range, put_thetas)
-    axs[4,1].grid(True)
-    axs[4,1].set_title("Theta vs Spot prices for put")
-    axs[4,1].set_xlabel("Spot Price")
-    axs[4,1].set_ylabel("Theta")
-        
-    st.pyplot(fig)
     
+    for i, greek in enumerate(GREEKS):
+        for j, side in enumerate(SIDES):
+            axs[i,j].plot(S_range, profile[:, i, j])
+            axs[i,j].grid(True)
+            axs[i,j].set_title(f"{greek.capitalize()} vs Spot prices for {side.lower()}")
+            axs[i,j].set_xlabel("Spot Price")
+            axs[i,j].set_ylabel(greek.capitalize())
+    
+    return fig
+
+
+@instrumented()
+def greeks_figure_european(S0, K, r, q, sigma, T, N, option_type, h, n_points = 30):    #Figure of European Greeks versus spot
+    
+    #Range of spot prices
+    S_range = np.linspace(max(0, S0 - 30), S0 + 30, n_points)
+    return _greeks_figure(S_range, greeks_profile_european(S_range, K, r, q, sigma, T, N))
     
     
+def plot_greeks_european(S0, K, r, q, sigma, T, N, option_type, h, n_points = 30):    #Plots for European Greeks
     
-def plot_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h):  #Plots for American Greeks
+    import streamlit as st
+    st.pyplot(greeks_figure_european(S0, K, r, q, sigma, T, N, option_type, h, n_points))
+    
+    
+@instrumented()
+def greeks_figure_american(S0, K, r, q, sigma, T, n_nodes, option_type, h, n_points = 30, method = 'tree', kernel = 'numpy'):  #Figure of American Greeks versus spot
         
+    #method and kernel as in greeks_profile_american
     #Range of spot prices
-    S_range = np.linspace(max(0, S0 - 30), S0 + 30, 30)
-        
-       
-        
-        #Store Greeks
-    call_deltas, put_deltas, call_gammas, put_gammas, call_vegas, put_vegas, call_rhos, put_rhos, call_thetas, put_thetas = [], [], [], [], [], [], [], [], [], []
-        
-    #Compute for each S
-        
-    for S0 in S_range:
-        greeks = compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h)            
-        delta_call = greeks["Call"]["delta"]
-        gamma_call = greeks["Call"]["gamma"]
-        vega_call = greeks["Call"]["vega"]
-        rho_call = greeks["Call"]["rho"]
-        theta_call = greeks["Call"]["theta"]
-    
-        delta_put = greeks["Put"]["delta"]
-        gamma_put = greeks["Put"]["gamma"]
-        vega_put = greeks["Put"]["vega"]
-        rho_put = greeks["Put"]["rho"]
-        theta_put = greeks["Put"]["theta"]
-            
-        call_deltas.append(delta_call)
-        put_deltas.append(delta_put)
-        call_gammas.append(gamma_call)
-        put_gammas.append(gamma_put)
-        call_vegas.append(vega_call)
-        put_vegas.append(vega_put)
-        call_rhos.append(rho_call)
-        put_rhos.append(rho_put)
-        call_thetas.append(theta_call)
-        put_thetas.append(theta_put)
-                
-        
-    #Plotting
-        
-    fig, axs = plt.subplots(5, 2, figsize=(12, 14))
-    fig.tight_layout(pad=5.0)
-        
-    axs[0,0].plot(S_range, call_deltas)
-    axs[0,0].grid(True)
-    axs[0,0].set_title("Delta vs Spot prices for call")
-    axs[0,0].set_xlabel("Spot Price")
-    axs[0,0].set_ylabel("Delta")
-        
-    axs[0,1].plot(S_range, put_deltas)
-    axs[0,1].grid(True)
-    axs[0,1].set_title("Delta vs Spot prices for put")
-    axs[0,1].set_xlabel("Spot Price")
-    axs[0,1].set_ylabel("Delta")
-            
-    axs[1,0].plot(S_range, call_gammas)
-    axs[1,0].grid(True)
-    axs[1,0].set_title("Gamma vs Spot prices for call")
-    axs[1,0].set_xlabel("Spot Price")
-    axs[1,0].set_ylabel("Gamma")
-    
-    axs[1,1].plot(S_range, put_gammas)
-    axs[1,1].grid(True)
-    axs[1,1].set_title("Gamma vs Spot prices for put")
-    axs[1,1].set_xlabel("Spot Price")
-    axs[1,1].set_ylabel("Gamma")
-        
-    axs[2,0].plot(S_range, call_vegas)
-    axs[2,0].grid(True)
-    axs[2,0].set_title("Vega vs Spot prices for call")
-    axs[2,0].set_xlabel("Spot Price")
-    axs[2,0].set_ylabel("Vega")
-        
-    axs[2,1].plot(S_range, put_vegas)
-    axs[2,1].grid(True)
-    axs[2,1].set_title("Vega vs Spot prices for put")
-    axs[2,1].set_xlabel("Spot Price")
-    axs[2,1].set_ylabel("Vega")
-        
-    axs[3,0].plot(S_range, call_rhos)
-    axs[3,0].grid(True)
-    axs[3,0].set_title("Rho vs Spot prices for call")
-    axs[3,0].set_xlabel("Spot Price")
-    axs[3,0].set_ylabel("Rho")
-        
-    axs[3,1].plot(S_range, put_rhos)
-    axs[3,1].grid(True)
-    axs[3,1].set_title("Rho vs Spot prices for put")
-    axs[3,1].set_xlabel("Spot Price")
-    axs[3,1].set_ylabel("Rho")
-        
-        
-    axs[4,0].plot(S_range, call_thetas)
-    axs[4,0].grid(True)
-    axs[4,0].set_title("Theta vs Spot prices for call")
-    axs[4,0].set_xlabel("Spot Price")
-    axs[4,0].set_ylabel("Theta")
-        
-        
-    axs[4,1].plot(S_range, put_thetas)
-    axs[4,1].grid(True)
-    axs[4,1].set_title("Theta vs Spot prices for put")
-    axs[4,1].set_xlabel("Spot Price")
-    axs[4,1].set_ylabel("Theta")
-        
-    st.pyplot(fig)
-   
-       
-   
-        
+    S_range = np.linspace(max(0, S0 - 30), S0 + 30, n_points)
+    return _greeks_figure(S_range, greeks_profile_american(S_range, K, r, q, sigma, T, n_nodes, h, method = method, kernel = kernel))
+    
+    
+def plot_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h, n_points = 30, method = 'tree', kernel = 'numpy'):  #Plots for American Greeks
     
+    import streamlit as st
+    st.pyplot(greeks_figure_american(S0, K, r, q, sigma, T, n_nodes, option_type, h, n_points, method, kernel))
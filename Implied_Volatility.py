@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:30:14 2026
+
+@author: jesseruijer
+"""
+
+#Implied volatility for whole option chains, Black-Scholes (European) and CRR binomial tree (American)
+
+import numpy as np
+from Black_Scholes import norm_cdf, norm_pdf
+from American_Options import american_binomial_batch
+from Instrumentation import instrumented
+
+#Convergence status per quote
+CONVERGED = 0
+MAX_ITERATIONS = 1
+OUT_OF_BOUNDS = 2    #price below intrinsic value or above the no-arbitrage upper bound, no volatility reproduces it
+ILL_CONDITIONED = 3    #the rounding of the quote alone moves the volatility by more than tol (deep in the money, little time value), the volatility is unreliable
+
+def _contracts(price, S0, K, T, r, q, option_type):  #Broadcasts the quote arrays to one flat float array per input, plus the call/put sign and the original shape
+
+    option_type = np.asarray(option_type)
+    is_call = option_type == 'Call' if option_type.dtype.kind in 'UO' else option_type.astype(bool)
+    arrays = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (price, S0, K, T, r, q)), is_call)
+    shape = arrays[0].shape
+    price, S0, K, T, r, q, is_call = (x.ravel() for x in arrays)
+    return price, S0, K, T, r, q, np.where(is_call, 1.0, -1.0), shape
+
+
+def _bs_price_vega(S_fwd, K_fwd, T, sigma, sign):  #Black-Scholes price, vega and d1, d2 on discounted spot S*exp(-qT) and strike K*exp(-rT)
+
+    vol = sigma * np.sqrt(T)
+    d1 = np.log(S_fwd / K_fwd) / vol + 0.5 * vol
+    d2 = d1 - vol
+    price = sign * (S_fwd * norm_cdf(sign * d1) - K_fwd * norm_cdf(sign * d2))
+    vega = S_fwd * norm_pdf(d1) * np.sqrt(T)
+    return price, vega, d1, d2
+
+
+@instrumented()
+def implied_vol(price, S0, K, T, r, q, option_type, tol = 1e-8, max_iter = 50):   #Implied Black-Scholes volatility for arrays of quotes to within tol in volatility, returns (volatility, status) arrays
+
+    price, S0, K, T, r, q, sign, shape = _contracts(price, S0, K, T, r, q, option_type)
+    S_fwd = S0 * np.exp(-q * T)
+    K_fwd = K * np.exp(-r * T)
+
+    sigma = np.full(price.shape, np.nan)
+    status = np.full(price.shape, MAX_ITERATIONS)
+
+    #No-arbitrage bounds: discounted intrinsic value on the forward and the discounted spot (call) or strike (put)
+    lower = np.maximum(sign * (S_fwd - K_fwd), 0)
+    upper = np.where(sign > 0, S_fwd, K_fwd)
+    valid = (price - lower > 4 * np.finfo(float).eps * price) & (price < upper) & (T > 0)    #a time value lost in rounding does not pin down a volatility
+    status[~valid] = OUT_OF_BOUNDS
+
+    #In-the-money quotes are inverted as the out-of-the-money option of the other side (put-call parity): the time value is then the whole price,
+    #instead of cancelling against the intrinsic value in every model - price difference
+    intrinsic = sign * (S_fwd - K_fwd)
+    otm_price = np.where(intrinsic > 0, price - intrinsic, price)
+    otm_sign = np.where(intrinsic > 0, -sign, sign)
+    #Rounding error of the quote, the time value is only known to within it
+    noise = 4 * np.finfo(float).eps * price
+
+    #Rational initial guess of Corrado-Miller on the equivalent call price (put-call parity)
+    call = np.where(otm_sign > 0, otm_price, otm_price + S_fwd - K_fwd)
+    half_gap = 0.5 * (S_fwd - K_fwd)
+    root = np.sqrt(np.maximum((call - half_gap)**2 - (S_fwd - K_fwd)**2 / np.pi, 0))
+    guess = np.sqrt(2 * np.pi / T) / (S_fwd + K_fwd) * (call - half_gap + root)
+    guess = np.clip(np.nan_to_num(guess, nan = 0.2), 1e-3, 5)
+
+    #Halley iterations on the quotes that are still active, with a bracket that falls back to bisection
+    active = np.flatnonzero(valid)
+    x = guess[active]
+    lo = np.zeros(len(active))
+    hi = np.full(len(active), 10.0)
+
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+
+        model, vega, d1, d2 = _bs_price_vega(S_fwd[active], K_fwd[active], T[active], x, otm_sign[active])
+        f = model - otm_price[active]
+
+        #The price increases in volatility, so the sign of f tells which side of the root x is on
+        hi = np.where(f > 0, np.minimum(hi, x), hi)
+        lo = np.where(f < 0, np.maximum(lo, x), lo)
+
+        #Converged once the Newton estimate of the volatility error, or the bracket, is below tol
+        done = (np.abs(f) <= tol * vega) | (hi - lo <= tol)
+
+        #Halley step, with the second derivative volga = vega * d1 * d2 / sigma
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            newton = f / vega
+            step = newton / (1 - 0.5 * newton * d1 * d2 / x)
+        x_new = x - step
+        outside = ~np.isfinite(x_new) | (x_new <= lo) | (x_new >= hi)
+        x_new = np.where(outside, 0.5 * (lo + hi), x_new)
+
+        sigma[active[done]] = x[done]
+        status[active[done]] = np.where(noise[active[done]] > tol * vega[done], ILL_CONDITIONED, CONVERGED)
+
+        keep = ~done
+        active, x, lo, hi = active[keep], x_new[keep], lo[keep], hi[keep]
+
+    #Quotes that ran out of iterations keep their last iterate
+    sigma[active] = x
+
+    return sigma.reshape(shape), status.reshape(shape)
+
+
+@instrumented()
+def implied_vol_american(price, S0, K, T, r, q, option_type, n_nodes = 200, tol = 1e-6, max_iter = 60, bounds = (1e-3, 3.0)):  #Implied volatility of American quotes under the CRR tree to within tol in volatility, returns (volatility, status) arrays
+
+    price, S0, K, T, r, q, sign, shape = _contracts(price, S0, K, T, r, q, option_type)
+    tree = lambda sigma, index: american_binomial_batch(S0[index], K[index], T[index], r[index], q[index], sigma, n_nodes, sign[index] > 0)
+
+    sigma = np.full(price.shape, np.nan)
+    status = np.full(price.shape, MAX_ITERATIONS)
+
+    #Every quote is priced at both ends of the volatility bracket, quotes outside that price range cannot be inverted
+    active = np.arange(len(price))
+    lo = np.maximum(bounds[0], 1.01 * np.abs(r - q) * np.sqrt(T / n_nodes))  #below |r - q| * sqrt(dt) the CRR probability leaves [0, 1]
+    hi = np.full(len(price), bounds[1])
+    f_lo = tree(lo, active) - price
+    f_hi = tree(hi, active) - price
+    valid = (f_lo < 0) & (f_hi > 0)
+    status[~valid] = OUT_OF_BOUNDS
+
+    active = np.flatnonzero(valid)
+    lo, hi, f_lo, f_hi = lo[valid], hi[valid], f_lo[valid], f_hi[valid]
+    side = np.zeros(len(active))   #which end was kept last time, for the Illinois modification
+
+    #Illinois regula falsi, each iteration prices all active quotes in one batch of trees
+    for _ in range(max_iter):
+        if len(active) == 0:
+            break
+
+        x = (lo * f_hi - hi * f_lo) / (f_hi - f_lo)
+        f = tree(x, active) - price[active]
+
+        #Converged once the volatility error estimated with the secant slope, or the bracket, is below tol
+        done = (np.abs(f) * (hi - lo) <= tol * (f_hi - f_lo)) | (hi - lo <= tol)
+        sigma[active[done]] = x[done]
+        status[active[done]] = CONVERGED
+
+        #Replace the end with the same sign as f, and halve the other end's value if it was kept twice in a row
+        upper = f > 0
+        f_lo = np.where(upper & (side == 1), 0.5 * f_lo, f_lo)
+        f_hi = np.where(~upper & (side == -1), 0.5 * f_hi, f_hi)
+        hi, f_hi = np.where(upper, x, hi), np.where(upper, f, f_hi)
+        lo, f_lo = np.where(upper, lo, x), np.where(upper, f_lo, f)
+        side = np.where(upper, 1, -1)
+
+        keep = ~done
+        active, lo, hi, f_lo, f_hi, side = active[keep], lo[keep], hi[keep], f_lo[keep], f_hi[keep], side[keep]
+
+    sigma[active] = 0.5 * (lo + hi)
+
+    return sigma.reshape(shape), status.reshape(shape)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:02:44 2026
+
+@author: jesseruijer
+"""
+
+#Incremental repricing for tick-driven use: between full valuations only the spot and the time to maturity move, so each contract is
+#repriced from a second-order Taylor expansion (delta, gamma, theta) around its last full valuation. Every contract carries an estimate of the
+#truncation error, and is revalued in full once that estimate exceeds tol or the spot moved by more than max_move since its last valuation.
+#   repricer = IncrementalRepricer(K, r, q, sigma, option_type, style = 'American')
+#   result = repricer.price(S0, T)   #{'price', 'delta', 'gamma', 'theta', 'error', 'full'}, full marks the contracts revalued on this call
+
+import numpy as np
+from Black_Scholes import Black_Scholes_Chain, norm_pdf
+from American_Options import american_binomial_greeks, american_binomial_greeks_batch
+from Instrumentation import instrumented
+
+STYLES = ('European', 'American')
+
+
+def _higher_order(S0, K, T, r, q, sigma, is_call):   #Black-Scholes speed (dGamma/dS), dDelta/dT and d2V/dT2, the scale of the terms the expansion leaves out
+
+    #All are nan for expired contracts (T = 0 or sigma = 0), which are then revalued on every call
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        vol = sigma * np.sqrt(T)
+        d1 = (np.log(S0 / K) + (r - q + 0.5 * sigma**2) * T) / vol
+        gamma = np.exp(-q * T) * norm_pdf(d1) / (S0 * vol)
+        speed = -gamma / S0 * (1 + d1 / vol)
+        #|dDelta/dT| = |-q delta + exp(-qT) pdf(d1) dd1/dT| is at most |q| + |exp(-qT) pdf(d1) dd1/dT| for calls and puts alike
+        charm = np.abs(q) + np.exp(-q * T) * norm_pdf(d1) * np.abs((r - q) / vol - (d1 - vol) / (2 * T))
+        #d2V/dT2 from the change of the Black-Scholes theta of the contract's own side over 1% of the maturity
+        h_T = 0.01 * T
+        curvature = 252 * (Black_Scholes_Chain(S0, K, T - h_T, r, q, sigma, is_call)['theta'] - Black_Scholes_Chain(S0, K, T, r, q, sigma, is_call)['theta']) / h_T
+    return (np.where(vol > 0, x, np.nan) for x in (speed, charm, curvature))
+
+
+class IncrementalRepricer:   #Prices a fixed book of contracts at changing spots and maturities, revaluing a contract in full only when its expansion is no longer accurate
+
+    def __init__(self, K, r, q, sigma, option_type, style = 'European', tol = 0.01, max_move = 0.1, n_nodes = 200, tree = 'lrr', kernel = 'numpy'):
+
+        #K, r, q, sigma, option_type and style broadcast to the shape of the book. option_type may be 'Call'/'Put' (or an array of them)
+        #or a boolean (array) that is True for calls, style 'European' (Black-Scholes) or 'American' (binomial tree of n_nodes steps, as compute_greeks_american).
+        #tree 'lrr' (default) and 'bbsr' (see american_binomial) revalue American contracts one at a time, with Greeks smooth enough to keep the expansion
+        #within a cent over larger moves. 'crr' revalues them all in one batch, but its Greeks oscillate with the spot by a few cents, more than the default tol
+        option_type = np.asarray(option_type)
+        is_call = option_type == 'Call' if option_type.dtype.kind in 'UO' else option_type.astype(bool)
+        style = np.asarray(style)
+        if not np.isin(style, STYLES).all():
+            raise ValueError(f"style must be one of {', '.join(STYLES)}")
+        contracts = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (K, r, q, sigma)), is_call, style == 'American')
+        self.shape = contracts[0].shape
+        self.K, self.r, self.q, self.sigma, self.is_call, self.american = (x.reshape(-1) for x in contracts)
+        self.tol = tol
+        self.max_move = max_move
+        self.n_nodes = n_nodes
+        self.tree = tree
+        self.kernel = kernel
+        self.full_valuations = 0
+        self.incremental_valuations = 0
+        self._anchor = None     #last full valuation of every contract: spot, maturity, price, Greeks and third-order scales
+
+    def _revalue(self, S0, T, index):   #Full valuation of the contracts in index at spots S0 and maturities T, becomes their new expansion point
+
+        if self._anchor is None:
+            self._anchor = {name : np.zeros(len(self.K)) for name in ('S0', 'T', 'price', 'delta', 'gamma', 'theta', 'speed', 'charm', 'curvature')}
+        anchor = self._anchor
+        K, r, q, sigma, is_call, american = (x[index] for x in (self.K, self.r, self.q, self.sigma, self.is_call, self.american))
+        S0, T = S0[index], T[index]
+
+        chain = Black_Scholes_Chain(S0, K, T, r, q, sigma, is_call)
+        price, delta, gamma, theta = (chain[name] for name in ('price', 'delta', 'gamma', 'theta'))
+        american &= T > 0      #expired contracts are worth their intrinsic value, which Black_Scholes_Chain returns
+        if american.any():
+            contracts = (x[american] for x in (S0, K, T, r, q, sigma))
+            if self.tree == 'crr':
+                tree = american_binomial_greeks_batch(*contracts, self.n_nodes, is_call[american])
+            else:
+                tree = np.array([american_binomial_greeks(*contract, self.n_nodes, 'Call' if call else 'Put', kernel = self.kernel, tree = self.tree)
+                                 for *contract, call in zip(*contracts, is_call[american])]).T
+            for values, tree_values in zip((price, delta, gamma, theta), tree):
+                values[american] = tree_values
+
+        anchor['S0'][index], anchor['T'][index] = S0, T
+        anchor['price'][index], anchor['delta'][index], anchor['gamma'][index], anchor['theta'][index] = price, delta, gamma, theta
+        anchor['speed'][index], anchor['charm'][index], anchor['curvature'][index] = _higher_order(S0, K, T, r, q, sigma, is_call)
+
+    def _error(self, dS, dT):  #Estimated truncation error of the expansion: the third-order spot term, the spot-time cross term and the second-order time term
+        anchor = self._anchor
+        return np.abs(anchor['speed']) * np.abs(dS)**3 / 6 + anchor['charm'] * np.abs(dS * dT) + 0.5 * np.abs(anchor['curvature']) * dT**2
+
+    @instrumented()
+    def price(self, S0, T):    #Prices and Greeks of the book at spots S0 and maturities T (broadcast to the book), revaluing the contracts that need it
+
+        S0, T = (np.broadcast_to(np.asarray(x, dtype = float), self.shape).reshape(-1) for x in (S0, T))
+        if self._anchor is None:
+            full = np.ones(len(S0), dtype = bool)
+        else:
+            dS = S0 - self._anchor['S0']
+            full = ~(self._error(dS, T - self._anchor['T']) <= self.tol) | (np.abs(dS) > self.max_move * self._anchor['S0'])    #a nan estimate also revalues
+        if full.any():
+            self._revalue(S0, T, np.flatnonzero(full))
+        self.full_valuations += int(full.sum())
+        self.incremental_valuations += int(len(full) - full.sum())
+
+        anchor = self._anchor
+        dS, dT = S0 - anchor['S0'], T - anchor['T']
+        result = {
+            'price' : anchor['price'] + anchor['delta'] * dS + 0.5 * anchor['gamma'] * dS**2 - 252 * anchor['theta'] * dT,  #theta is daily and -dV/dT
+            'delta' : anchor['delta'] + anchor['gamma'] * dS,
+            'gamma' : anchor['gamma'].copy(),
+            'theta' : anchor['theta'].copy(),
+            'error' : self._error(dS, dT),
+            'full' : full
+            }
+        return {name : values.reshape(self.shape) for name, values in result.items()}
+
+    def revalue(self):     #Forces a full valuation of every contract on the next call of price
+        self._anchor = None
+
+    def stats(self):
+        return {'full' : self.full_valuations, 'incremental' : self.incremental_valuations}
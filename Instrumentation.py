@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 15:02:31 2026
+
+@author: jesseruijer
+"""
+
+#Opt-in instrumentation of the pricing hot paths: per-stage wall time, call counts, peak allocations and output array sizes
+#Off by default, a disabled stage or decorated function costs one context variable lookup. Usage:
+#   import Instrumentation
+#   Instrumentation.enable(memory = True)
+#   price, _ = European(...)
+#   Instrumentation.report()    #{stage name : {'calls', 'total_s', 'max_s', 'peak_bytes', 'output_bytes'}}
+#Every finished stage is also logged as one JSON line on the 'option_pricing.instrumentation' logger at DEBUG level
+#
+#The switch and the statistics belong to a recorder held in a context variable, so every thread (one per Streamlit session rerun) and every
+#asyncio task records on its own and sessions do not reset or read each other's stages. Work handed to worker processes (backend 'process',
+#ProcessPoolExecutor) is not recorded, only the time the calling stage waits for it. tracemalloc is process-wide, so peak memory is only
+#meaningful while a single recorder traces memory
+
+import contextvars
+import functools
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+import numpy as np
+
+logger = logging.getLogger('option_pricing.instrumentation')
+
+_local = threading.local()  #per-thread stack of open stages
+_off = nullcontext()
+_tracing = 0    #number of recorders tracing memory, tracemalloc runs while it is positive
+_tracing_lock = threading.Lock()
+
+
+class _Recorder:    #Switch and statistics of one context
+
+    def __init__(self):
+        self.enabled = False
+        self.memory = False
+        self.stats = {}
+        self.lock = threading.Lock()
+
+
+_recorder = contextvars.ContextVar('instrumentation_recorder', default = None)
+
+
+def _current():    #Recorder of the current context, created on first use
+    recorder = _recorder.get()
+    if recorder is None:
+        recorder = _Recorder()
+        _recorder.set(recorder)
+    return recorder
+
+
+def _active():     #Recorder of the current context if it is recording, else None
+    recorder = _recorder.get()
+    return recorder if recorder is not None and recorder.enabled else None
+
+
+def _trace_memory(recorder, memory):   #Switches memory tracing of recorder, tracemalloc is started by the first tracing recorder and stopped by the last
+    global _tracing
+    with _tracing_lock:
+        if memory and not recorder.memory:
+            _tracing += 1
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+        elif recorder.memory and not memory:
+            _tracing -= 1
+            if _tracing == 0 and tracemalloc.is_tracing():
+                tracemalloc.stop()
+        recorder.memory = memory
+
+
+def enable(memory = False):    #Starts recording in the current context, memory also traces the peak allocations of every stage with tracemalloc (slows the stages down)
+    recorder = _current()
+    _trace_memory(recorder, memory)
+    recorder.enabled = True
+
+
+def disable():
+    recorder = _current()
+    _trace_memory(recorder, False)
+    recorder.enabled = False
+
+
+def is_enabled():
+    return _active() is not None
+
+
+def reset():    #Clears the statistics recorded in the current context
+    recorder = _current()
+    with recorder.lock:
+        recorder.stats.clear()
+
+
+def report():   #Statistics recorded in the current context per stage, sorted by total time
+    recorder = _current()
+    with recorder.lock:
+        return dict(sorted(((name, dict(entry)) for name, entry in recorder.stats.items()), key = lambda item: -item[1]['total_s']))
+
+
+def _output_bytes(result):     #Size of the NumPy arrays a stage returned, also inside tuples, lists and dicts
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, (tuple, list)):
+        return sum(_output_bytes(item) for item in result)
+    if isinstance(result, dict):
+        return sum(_output_bytes(item) for item in result.values())
+    return 0
+
+
+def _record(recorder, name, elapsed, peak_bytes, output_bytes):
+    with recorder.lock:
+        entry = recorder.stats.setdefault(name, {'calls' : 0, 'total_s' : 0.0, 'max_s' : 0.0, 'peak_bytes' : 0, 'output_bytes' : 0})
+        entry['calls'] += 1
+        entry['total_s'] += elapsed
+        entry['max_s'] = max(entry['max_s'], elapsed)
+        entry['peak_bytes'] = max(entry['peak_bytes'], peak_bytes)
+        entry['output_bytes'] = max(entry['output_bytes'], output_bytes)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps({'stage' : name, 'seconds' : elapsed, 'peak_bytes' : peak_bytes, 'output_bytes' : output_bytes}))
+
+
+class _Stage:   #One open stage, result may be set to record the size of the arrays the stage produced
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.result = None
+        self.start_bytes = 0
+        self.max_peak = 0
+
+    def __enter__(self):
+        stack = _local.__dict__.setdefault('stack', [])
+        if self.recorder.memory:
+            #The peak of the enclosing stage is saved before the peak is reset for this one, and handed back on exit
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].max_peak = max(stack[-1].max_peak, peak)
+            tracemalloc.reset_peak()
+            self.start_bytes, self.max_peak = current, current
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+        stack = _local.stack
+        stack.pop()
+        peak_bytes = 0
+        if self.recorder.memory and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(peak, self.max_peak) - self.start_bytes
+            if stack:
+                stack[-1].max_peak = max(stack[-1].max_peak, peak, self.max_peak)
+        _record(self.recorder, self.name, elapsed, peak_bytes, _output_bytes(self.result))
+        return False
+
+
+def stage(name):   #Context manager timing the enclosed block as stage name, a no-op while instrumentation is off, times are inclusive of nested stages
+    recorder = _active()
+    return _Stage(recorder, name) if recorder is not None else _off
+
+
+def instrumented(name = None):     #Decorator recording every call of the function as a stage, named after the function by default
+
+    def decorator(func):
+        stage_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            recorder = _active()
+            if recorder is None:
+                return func(*args, **kwargs)
+            with _Stage(recorder, stage_name) as current:
+                current.result = func(*args, **kwargs)
+            return current.result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def recording(memory = False):   #Records the enclosed block only, read the statistics with report() afterwards in the same context
+    recorder = _current()
+    was_enabled, was_memory = recorder.enabled, recorder.memory
+    reset()
+    enable(memory)
+    try:
+        yield
+    finally:
+        disable()
+        if was_enabled:
+            enable(was_memory)
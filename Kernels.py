@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 14:08:53 2026
+
+@author: jesseruijer
+"""
+
+#Optional compiled kernels for the loops of the tree and LSMC engines that stay interpreter-bound after vectorization:
+#the CRR backward induction, GBM path generation, the LSMC exercise update and the Brennan-Schwartz solve of the PDE engine
+#The engines take kernel = 'numpy' (default), 'numba' or 'auto'. Numba is optional and only imported on the first call that asks for it,
+#without it 'auto' quietly and 'numba' with a warning fall back to the NumPy implementation
+#The functions below are plain Python and are compiled with numba.njit on first use, compiled code is cached in __pycache__
+
+import warnings
+from types import SimpleNamespace
+import numpy as np
+
+KERNELS = ('numpy', 'numba', 'auto')
+
+_compiled = None
+_missing = False
+
+
+def crr_rollback(values, S_ladder, growth, n_steps, start, stop, K, sign, p, discount):  #Rolls the binomial tree values at level start back to level stop in place, values[:i + 1] holds level i
+
+    #Value j only depends on the old values j and j + 1, so the update can run in place
+    #Values that underflow below 1e-280 are set to 0: far out-of-the-money nodes would otherwise decay through subnormal numbers,
+    #which are many times slower to compute with, while changing the price by less than 1e-280
+    q = 1 - p
+    for i in range(start - 1, stop - 1, -1):
+        ST = S_ladder[n_steps - i : n_steps + i + 1 : 2][::-1]     #node prices at level i divided by growth[i], as in the NumPy version
+        for j in range(i + 1):
+            value = max(discount * (p * values[j] + q * values[j + 1]), sign * (ST[j] * growth[i] - K))
+            values[j] = value if value > 1e-280 else 0.0
+
+
+def gbm_paths(S, S0, drift, vol):     #Turns the standard normals in S (n_steps, n_sim) into GBM prices in place, in one pass instead of five
+
+    n_steps, n_sim = S.shape
+    log_S = np.zeros_like(S[0])     #running log-return of every path, in the dtype of S
+    for t in range(n_steps):
+        for k in range(n_sim):
+            log_S[k] += S[t, k] * vol + drift
+            S[t, k] = S0 * np.exp(log_S[k])
+
+
+def lsmc_exercise(cashflow, exercise_time, in_the_money, immediate_exercise, B, coeffs, t):    #Exercises the in-the-money paths where immediate exercise beats the continuation value coeffs @ B
+
+    for k in range(len(in_the_money)):
+        continuation_value = 0.0
+        for d in range(B.shape[0]):
+            continuation_value += coeffs[d] * B[d, k]
+        if immediate_exercise[k] > continuation_value:
+            cashflow[in_the_money[k]] = immediate_exercise[k]
+            exercise_time[in_the_money[k]] = t
+
+
+def brennan_schwartz(lower, pivots, multipliers, rhs, payoff, out):   #Solves lower v[i - 1] + diagonal v[i] + upper v[i + 1] = rhs[i] with v >= payoff, for an exercise region at the low end of the grid
+
+    #Brennan-Schwartz: eliminate the upper diagonal from the top of the grid down, then substitute back from the bottom up
+    #and apply the exercise constraint on the way, exact for one contiguous exercise region that contains the first node
+    #pivots and multipliers of the elimination only depend on the matrix and come from brennan_schwartz_factors
+    #rhs, payoff and out may be NumPy arrays or lists, out first holds the eliminated right-hand side
+    n = len(rhs)
+    out[n - 1] = rhs[n - 1]
+    for i in range(n - 2, -1, -1):
+        out[i] = rhs[i] - multipliers[i] * out[i + 1]
+    value = max(out[0] / pivots[0], payoff[0])
+    out[0] = value
+    for i in range(1, n):
+        value = max((out[i] - lower * value) / pivots[i], payoff[i])
+        out[i] = value
+
+
+def brennan_schwartz_factors(lower, diagonal, upper, n):     #Pivots and multipliers of the Brennan-Schwartz elimination of an n x n tridiagonal matrix with constant diagonals
+
+    pivots, multipliers = np.empty(n), np.zeros(n)
+    pivots[n - 1] = diagonal
+    for i in range(n - 2, -1, -1):
+        multipliers[i] = upper / pivots[i + 1]
+        pivots[i] = diagonal - multipliers[i] * lower
+    return pivots, multipliers
+
+
+def available():    #True when Numba can be imported
+    return _load_numba() is not None
+
+
+def _load_numba():
+    global _compiled, _missing
+    if _compiled is None and not _missing:
+        try:
+            import numba
+        except ImportError:
+            _missing = True
+            return None
+        jit = numba.njit(cache = True, nogil = True)
+        _compiled = SimpleNamespace(crr_rollback = jit(crr_rollback), gbm_paths = jit(gbm_paths), lsmc_exercise = jit(lsmc_exercise),
+                                    brennan_schwartz = jit(brennan_schwartz))
+    return _compiled
+
+
+def load(kernel = 'numpy'):    #The compiled kernels for kernel 'numba' or 'auto' when Numba is installed, None when the NumPy implementation is to be used
+
+    if kernel not in KERNELS:
+        raise ValueError(f"kernel must be one of {', '.join(KERNELS)}, not {kernel!r}")
+    if kernel == 'numpy':
+        return None
+    compiled = _load_numba()
+    if compiled is None and kernel == 'numba':
+        warnings.warn("Numba is not installed, using the NumPy implementation instead ('pip install numba' for the compiled kernels)", RuntimeWarning, stacklevel = 3)
+    return compiled
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 11:40:29 2026
+
+@author: jesseruijer
+"""
+
+#Option portfolios over one or more underlyings and full-revaluation scenario analysis:
+#P&L vectors under spot, volatility and rate shocks, historical and Monte Carlo VaR and expected shortfall
+#
+#   book = Portfolio(spot = [100, 50], style = ['European', 'American'], option_type = ['Call', 'Put'], K = [105, 48], T = [0.5, 1],
+#                    sigma = [0.2, 0.3], quantity = [10, -5], underlying = [0, 1], r = 0.04, q = [0.01, 0.0])
+#   book.scenario_pnl(spot_shocks)    #one P&L per scenario, spot_shocks are relative moves (n_scenarios, n_underlyings)
+#   book.historical_var(returns, alpha = 0.99)    #{'var', 'es', 'pnl'}
+#
+#Europeans are revalued with Black-Scholes and Americans with american_fast, both vectorized over a block of scenarios x positions.
+#Blocks hold at most chunk_size contracts (about 20 MB at the default), so memory does not grow with the number of scenarios
+
+import numpy as np
+from Black_Scholes import Black_Scholes_Chain
+from American_Approximations import american_fast
+from Instrumentation import instrumented
+
+STYLES = ('European', 'American')
+
+#Shocked volatilities are floored here (or at the position's own vol when that is lower), also keeping the CRR probabilities of the tree fallback inside [0, 1]
+_MIN_VOL = 0.01
+
+
+def var_es(pnl, alpha = 0.99):     #Value at risk and expected shortfall at confidence alpha of a P&L sample, both reported as positive losses
+
+    pnl = np.asarray(pnl, dtype = float)
+    var = -np.quantile(pnl, 1 - alpha)
+    tail = pnl[pnl <= -var]
+    return {'var' : var, 'es' : -np.mean(tail) if len(tail) else var}
+
+
+class Portfolio:    #Arrays of option positions (style, type, strike, maturity, implied vol, quantity) on the underlyings in spot
+
+    def __init__(self, spot, style, option_type, K, T, sigma, quantity, underlying = 0, r = 0.0, q = 0.0, american_method = 'bs2002', n_nodes = 200):
+
+        #spot and q hold one value per underlying (q may be a scalar), underlying is the index of the underlying of each position.
+        #The position arrays broadcast against each other, option_type may be 'Call'/'Put' (or an array of them) or a boolean (array) that is True for calls.
+        #american_method is the method of american_fast: 'bs2002' (default) and 'baw' price the base and every scenario with one smooth approximation,
+        #so its bias largely cancels in the P&L, 'tree' (n_nodes steps) and 'auto' are more accurate per price but 15-30 times slower
+        self.spot = np.atleast_1d(np.asarray(spot, dtype = float))
+        self.q = np.broadcast_to(np.asarray(q, dtype = float), self.spot.shape)
+        self.r = float(r)
+
+        option_type = np.asarray(option_type)
+        is_call = option_type == 'Call' if option_type.dtype.kind in 'UO' else option_type.astype(bool)
+        style = np.asarray(style)
+        if not np.isin(style, STYLES).all():
+            raise ValueError(f"style must be one of {', '.join(STYLES)}")
+        positions = np.broadcast_arrays(*(np.asarray(x, dtype = float) for x in (K, T, sigma, quantity)), np.asarray(underlying), is_call, style == 'American')
+        self.K, self.T, self.sigma, self.quantity, underlying, self.is_call, self.american = (np.atleast_1d(x).reshape(-1) for x in positions)
+        self.underlying = underlying.astype(int)
+        if np.any((self.underlying < 0) | (self.underlying >= len(self.spot))):
+            raise ValueError(f"underlying must index the {len(self.spot)} spot(s)")
+
+        self.american_method = american_method
+        self.n_nodes = n_nodes
+        self._values = None     #position prices at the current market, the base of every P&L
+
+    def __len__(self):
+        return len(self.K)
+
+    def _prices(self, S, T, r, sigma, index):  #Prices of the positions in index for broadcastable market arrays of shape (scenarios, len(index))
+
+        K, is_call, american = self.K[index], self.is_call[index], self.american[index]
+        q = self.q[self.underlying[index]]
+        S, T, r, sigma = np.broadcast_arrays(S, T, r, sigma)
+        prices = np.empty(S.shape)
+
+        #Expired positions are worth their intrinsic value, which Black_Scholes_Chain returns
+        american = american & (T > 0)
+        european = ~american
+        if european.any():
+            prices[european] = Black_Scholes_Chain(S[european], np.broadcast_to(K, S.shape)[european], T[european], r[european],
+                                                   np.broadcast_to(q, S.shape)[european], sigma[european], np.broadcast_to(is_call, S.shape)[european])['price']
+        if american.any():
+            prices[american] = american_fast(S[american], np.broadcast_to(K, S.shape)[american], T[american], r[american],
+                                             np.broadcast_to(q, S.shape)[american], sigma[american], np.broadcast_to(is_call, S.shape)[american],
+                                             method = self.american_method, n_nodes = self.n_nodes)
+        return prices
+
+    def values(self):  #Price of every position at the current market, computed once
+        if self._values is None:
+            self._values = self._prices(self.spot[self.underlying][None], self.T, self.r, self.sigma, np.arange(len(self)))[0]
+        return self._values
+
+    def value(self):   #Value of the portfolio at the current market
+        return float(self.values() @ self.quantity)
+
+    @instrumented()
+    def scenario_pnl(self, spot_shocks, vol_shocks = 0.0, rate_shocks = 0.0, horizon = 0.0, chunk_size = 100_000):   #Full-revaluation P&L of the portfolio in every scenario
+
+        #spot_shocks are relative moves of the underlyings, S = spot * (1 + shock), shaped (n_scenarios, n_underlyings) or (n_scenarios,) for one underlying.
+        #vol_shocks are absolute changes of the implied vols, per scenario (n_scenarios,) or per scenario and underlying, rate_shocks absolute changes of r per scenario.
+        #horizon (years) ages every position before the revaluation, positions that expire in it are worth their intrinsic value
+        spot_shocks = np.asarray(spot_shocks, dtype = float)
+        n_scenarios = len(spot_shocks)
+        spot_shocks = spot_shocks.reshape(n_scenarios, -1)
+        if spot_shocks.shape[1] not in (1, len(self.spot)):
+            raise ValueError(f"spot_shocks must have one column per underlying ({len(self.spot)}), not {spot_shocks.shape[1]}")
+        vol_shocks = np.broadcast_to(np.asarray(vol_shocks, dtype = float).reshape(-1, 1) if np.ndim(vol_shocks) == 1 else vol_shocks, (n_scenarios, len(self.spot)))
+        rate_shocks = np.broadcast_to(np.asarray(rate_shocks, dtype = float), (n_scenarios,))
+        spot_shocks = np.broadcast_to(spot_shocks, (n_scenarios, len(self.spot)))
+        base = self.values()
+
+        #Blocks of scenarios x positions with at most chunk_size contracts, the positions are split too when there are more than chunk_size of them
+        pnl = np.zeros(n_scenarios)
+        position_block = min(len(self), chunk_size)
+        scenario_block = max(1, chunk_size // position_block)
+        for p in range(0, len(self), position_block):
+            index = np.arange(p, min(p + position_block, len(self)))
+            underlying = self.underlying[index]
+            T = np.maximum(self.T[index] - horizon, 0)
+            for s in range(0, n_scenarios, scenario_block):
+                block = slice(s, s + scenario_block)
+                S = self.spot[underlying] * (1 + spot_shocks[block][:, underlying])
+                #Only the shock is floored: a position quoted below _MIN_VOL keeps its own vol, so zero shocks give zero P&L
+                sigma = np.maximum(self.sigma[index] + vol_shocks[block][:, underlying], np.minimum(self.sigma[index], _MIN_VOL))
+                r = self.r + rate_shocks[block][:, None]
+                pnl[block] += (self._prices(S, T, r, sigma, index) - base[index]) @ self.quantity[index]
+        return pnl
+
+    def historical_var(self, returns, alpha = 0.99, vol_shocks = 0.0, rate_shocks = 0.0, horizon = 0.0, chunk_size = 100_000):  #VaR and ES from historical relative moves of the underlyings
+
+        #returns has one row per historical scenario and one column per underlying, as spot_shocks of scenario_pnl
+        pnl = self.scenario_pnl(returns, vol_shocks, rate_shocks, horizon, chunk_size)
+        return {**var_es(pnl, alpha), 'pnl' : pnl}
+
+    def monte_carlo_var(self, n_scenarios = 10_000, horizon = 1 / 252, alpha = 0.99, vol = None, correlation = None, vol_of_vol = 0.0, seed = 69,
+                        chunk_size = 100_000):   #VaR and ES over simulated lognormal moves of the underlyings during horizon
+
+        #vol is the volatility of each underlying (default the mean implied vol of its positions), correlation the correlation matrix of their log-returns.
+        #vol_of_vol > 0 adds a parallel implied vol shock per scenario and underlying, normal with standard deviation vol_of_vol * sqrt(horizon)
+        rng = np.random.default_rng(seed)
+        n_underlyings = len(self.spot)
+        if vol is None:
+            counts = np.bincount(self.underlying, minlength = n_underlyings)
+            vol = np.bincount(self.underlying, weights = self.sigma, minlength = n_underlyings) / np.maximum(counts, 1)
+        vol = np.broadcast_to(np.asarray(vol, dtype = float), (n_underlyings,))
+        cholesky = np.linalg.cholesky(np.asarray(correlation, dtype = float)) if correlation is not None else np.eye(n_underlyings)
+
+        Z = rng.standard_normal((n_scenarios, n_underlyings)) @ cholesky.T
+        returns = np.expm1((self.r - self.q - 0.5 * vol**2) * horizon + vol * np.sqrt(horizon) * Z)
+        vol_shocks = vol_of_vol * np.sqrt(horizon) * rng.standard_normal((n_scenarios, n_underlyings)) if vol_of_vol > 0 else 0.0
+        pnl = self.scenario_pnl(returns, vol_shocks, 0.0, horizon, chunk_size)
+        return {**var_es(pnl, alpha), 'pnl' : pnl}
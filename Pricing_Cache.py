@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:14:22 2026
+
+@author: jesseruijer
+"""
+
+#Memoized pricing with a bounded LRU cache, shared by the Streamlit reruns and usable from plain Python
+
+import inspect
+import threading
+from collections import OrderedDict
+import numpy as np
+
+def _normalize(value):     #Turns a pricing input into a hashable key part, floats are rounded to 12 significant digits so 0.1 + 0.2 and 0.3 hit the same entry
+
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, np.integer)):
+        return float(value)     #100 and 100.0 price the same contract
+    if isinstance(value, (float, np.floating)):
+        return float(f"{float(value):.12g}")
+    if isinstance(value, np.ndarray):
+        return ('array', value.shape, value.dtype.str, value.tobytes())
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _normalize(item)) for key, item in value.items()))
+    return value
+
+
+class PricingCache:     #Least-recently-used cache of pricing results keyed on the normalized inputs, results are shared so treat them as read-only
+
+    def __init__(self, maxsize = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()   #Streamlit runs reruns in threads
+
+    def key(self, func, *args, **kwargs):  #Cache key of func(*args, **kwargs), defaults are filled in so positional and keyword calls give the same key
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        return (func.__module__, func.__qualname__, tuple((name, _normalize(value)) for name, value in bound.arguments.items()))
+
+    def call(self, func, *args, **kwargs):     #Returns func(*args, **kwargs), computing it only on a cache miss
+
+        key = self.key(func, *args, **kwargs)
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+
+        result = func(*args, **kwargs)  #computed outside the lock, so other reruns are not blocked
+
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)     #evict the least recently used entry
+        return result
+
+    def cached(self, func):    #Decorator version of call
+
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+
+        wrapper.__name__ = func.__name__
+        wrapper.__doc__ = func.__doc__
+        wrapper.__wrapped__ = func
+        return wrapper
+
+    def stats(self):
+        with self._lock:
+            return {'hits' : self.hits, 'misses' : self.misses, 'size' : len(self._entries), 'maxsize' : self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+#Module-level cache, lives as long as the Python process so it survives Streamlit reruns
+pricing_cache = PricingCache()
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 13:08:51 2026
+
+@author: jesseruijer
+"""
+
+#Local HTTP/JSON pricing service on asyncio, standard library only
+#
+#   python Pricing_Service.py serve --port 8765                   #or --unix /tmp/pricing.sock
+#   python Pricing_Service.py load --port 8765 --requests 5000    #load generator against a running service
+#   python Pricing_Service.py load --spawn                        #starts a service in the same process and loads it
+#
+#POST /price with one contract or {"contracts" : [...]}. A contract has style, type, S0, K, T, r, q, sigma and optionally
+#engine ('black_scholes' or 'monte_carlo' for European, 'binomial' or 'lsmc' for American), greeks, n_nodes, n_paths, n_steps, method and seed
+#(n_nodes, n_paths and n_steps up to LIMITS). A contract that cannot be priced gets {"error" : message} without failing the rest of the request
+#GET /stats returns the latency percentiles, queue depth and batch sizes, GET /health returns {"status" : "ok"}
+#
+#Black-Scholes and binomial contracts of concurrent requests are coalesced into micro-batches for the vectorized engines,
+#Monte Carlo and LSMC contracts run on a process pool
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+from Batch_Pricing import price_chunk, GREEKS
+from European_Options import European_VR, European_greeks
+from American_Options import American
+
+ANALYTIC = {'European' : 'black_scholes', 'American' : 'binomial'}   #default engine per style, priced in micro-batches
+SIMULATION = {'European' : 'monte_carlo', 'American' : 'lsmc'}  #priced one contract per task on the process pool
+REASONS = {200 : 'OK', 400 : 'Bad Request', 404 : 'Not Found', 405 : 'Method Not Allowed', 500 : 'Internal Server Error'}
+FIELDS = ['S0', 'K', 'T', 'r', 'q', 'sigma']
+#Largest path, time step and tree step counts a client may ask for, and the largest LSMC path store (n_paths * n_steps, 8 bytes each)
+LIMITS = {'n_paths' : 2_000_000, 'n_steps' : 1000, 'n_nodes' : 5000}
+MAX_PATH_STEPS = 20_000_000
+
+
+def _count(value):  #Integer value of a count field, 0 when it is not a number
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def _simulate(contract):   #Monte Carlo (European) or LSMC (American) price of one contract, runs in a worker process
+
+    S0, K, T, r, q, sigma = (float(contract[name]) for name in FIELDS)
+    option_type = contract['type']
+    seed = contract.get('seed', 69)
+
+    if contract['style'] == 'European':
+        N = int(contract.get('n_paths', 100000))
+        price, std_error, ci, n_paths = European_VR(S0, K, T, r, q, sigma, N, option_type, method = contract.get('method', 'antithetic'), seed = seed)
+        result = {'price' : float(price), 'std_error' : float(std_error), 'ci' : [float(ci[0]), float(ci[1])], 'n_paths' : int(n_paths)}
+        if contract.get('greeks'):
+            _, greeks, _ = European_greeks(S0, K, T, r, q, sigma, N, (option_type,), seed = seed)
+            result.update({greek : float(value) for greek, value in greeks[option_type].items()})
+        return result
+
+    if contract.get('greeks'):
+        raise ValueError("Greeks are not available for engine 'lsmc', use engine 'binomial'")
+    price, _, _, _ = American(S0, K, T, r, q, sigma, int(contract.get('n_paths', 10000)), int(contract.get('n_steps', 100)), option_type, seed = seed)
+    return {'price' : float(price)}
+
+
+def _price_batch(contracts, n_nodes):     #Prices a micro-batch of analytic contracts with price_chunk, one pass with and one without Greeks
+
+    results = [None] * len(contracts)
+    for greeks in (False, True):
+        index = [i for i, contract in enumerate(contracts) if bool(contract.get('greeks')) == greeks]
+        if not index:
+            continue
+        columns = {name : [contracts[i].get(name) for i in index] for name in ['style', 'type', 'n_nodes'] + FIELDS}
+        values, _ = price_chunk(columns, greeks, n_nodes)
+        for row, i in enumerate(index):
+            if np.isnan(values['price'][row]):
+                results[i] = {'error' : "contract could not be priced, check style, type and that the inputs are in range"}
+            else:
+                results[i] = {name : float(values[name][row]) for name in ['price'] + (GREEKS if greeks else [])}
+    return results
+
+
+class MicroBatcher:     #Collects analytic contracts from concurrent requests and prices them together, at most max_batch at a time
+
+    def __init__(self, n_nodes = 200, max_batch = 4096, max_delay = 0.002):
+        self.n_nodes = n_nodes
+        self.max_batch = max_batch
+        self.max_delay = max_delay  #how long the first contract of a batch waits for company, in seconds
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.batched_contracts = 0
+
+    async def submit(self, contract):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((contract, future))
+        return await future
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            self._drain(batch)
+            if len(batch) < self.max_batch and self.max_delay > 0:
+                await asyncio.sleep(self.max_delay)
+                self._drain(batch)
+
+            #Priced on a thread so the event loop keeps accepting requests, which then form the next batch
+            try:
+                results = await loop.run_in_executor(None, _price_batch, [contract for contract, _ in batch], self.n_nodes)
+            except Exception as error:
+                results = [{'error' : f"pricing failed: {error}"}] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.batches += 1
+            self.batched_contracts += len(batch)
+
+
+class PricingService:   #HTTP/1.1 JSON front end with keep-alive, the micro-batcher and the simulation pool
+
+    def __init__(self, n_workers = None, n_nodes = 200, max_batch = 4096, max_delay = 0.002, latency_window = 10000):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.batcher_args = (n_nodes, max_batch, max_delay)
+        self.latencies = collections.deque(maxlen = latency_window)   #seconds per request, most recent latency_window requests
+        self.requests = 0
+        self.contracts = 0
+        self.errors = 0
+        self.simulations_in_flight = 0
+        self.started = time.time()
+        self._connections = {}  #open client connections, writer -> handler task
+
+    async def start(self, host = '127.0.0.1', port = 8765, unix = None):   #Starts listening, returns the asyncio server
+        self.batcher = MicroBatcher(*self.batcher_args)
+        self.pool = ProcessPoolExecutor(max_workers = self.n_workers)
+        self._batcher_task = asyncio.create_task(self.batcher.run())
+        if unix:
+            self.server = await asyncio.start_unix_server(self._handle, path = unix)
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def close(self):    #Stops listening, closes the open connections and lets their handlers finish
+        self.server.close()
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*self._connections.values(), return_exceptions = True)
+        await self.server.wait_closed()
+        self._batcher_task.cancel()
+        self.pool.shutdown(cancel_futures = True)
+
+    async def price_contract(self, contract):  #Result dict of one contract, errors are returned as {'error' : message}
+
+        if not isinstance(contract, dict):
+            return {'error' : "a contract must be a JSON object"}
+        style = contract.get('style')
+        engine = contract.get('engine') or (ANALYTIC.get(style) if isinstance(style, str) else None)
+        if not isinstance(style, str) or style not in ANALYTIC or engine not in (ANALYTIC[style], SIMULATION[style]):
+            return {'error' : f"unknown style {style!r} or engine {engine!r}, styles are European (black_scholes, monte_carlo) and American (binomial, lsmc)"}
+        if contract.get('type') not in ('Call', 'Put'):
+            return {'error' : f"unknown type {contract.get('type')!r}, use Call or Put"}
+        missing = [name for name in FIELDS if name not in contract]
+        if missing:
+            return {'error' : f"missing field(s) {', '.join(missing)}"}
+        for name, limit in LIMITS.items():
+            if name in contract and not 1 <= _count(contract[name]) <= limit:
+                return {'error' : f"{name} must be a whole number from 1 to {limit:,}, not {contract[name]!r}"}
+        if engine == 'lsmc' and _count(contract.get('n_paths', 10000)) * _count(contract.get('n_steps', 100)) > MAX_PATH_STEPS:
+            return {'error' : f"n_paths * n_steps must be at most {MAX_PATH_STEPS:,} for engine 'lsmc'"}
+
+        if engine == ANALYTIC[style]:
+            return await self.batcher.submit(contract)
+
+        self.simulations_in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, _simulate, contract)
+        except (ValueError, TypeError, KeyError) as error:
+            return {'error' : str(error)}
+        except BrokenProcessPool:
+            #A worker died (out of memory, killed), the pool is replaced so the next simulations can run
+            self.pool = ProcessPoolExecutor(max_workers = self.n_workers)
+            return {'error' : "pricing failed: the simulation worker stopped unexpectedly"}
+        except Exception as error:
+            return {'error' : f"pricing failed: {type(error).__name__}: {error}"}
+        finally:
+            self.simulations_in_flight -= 1
+
+    def stats(self):
+        latencies = np.array(self.latencies) * 1000
+        percentiles = dict(zip(['p50', 'p90', 'p99', 'max'], np.percentile(latencies, [50, 90, 99, 100]).tolist())) if len(latencies) else {}
+        return {
+            'requests' : self.requests,
+            'contracts' : self.contracts,
+            'errors' : self.errors,
+            'latency_ms' : percentiles,
+            'queue_depth' : self.batcher.queue.qsize(),
+            'simulations_in_flight' : self.simulations_in_flight,
+            'batches' : self.batcher.batches,
+            'mean_batch_size' : self.batcher.batched_contracts / self.batcher.batches if self.batcher.batches else 0,
+            'uptime_s' : time.time() - self.started
+            }
+
+    async def _route(self, method, path, body):    #Returns (status, JSON payload)
+
+        if path == '/health':
+            return 200, {'status' : 'ok'}
+        if path == '/stats':
+            return 200, self.stats()
+        if path != '/price':
+            return 404, {'error' : f"unknown path {path}"}
+        if method != 'POST':
+            return 405, {'error' : "use POST for /price"}
+
+        try:
+            payload = json.loads(body)
+        except ValueError as error:
+            return 400, {'error' : f"invalid JSON: {error}"}
+
+        batch = isinstance(payload, dict) and 'contracts' in payload
+        contracts = payload['contracts'] if batch else [payload]
+        if not isinstance(contracts, list):
+            return 400, {'error' : "contracts must be a list"}
+
+        results = await asyncio.gather(*(self.price_contract(contract) for contract in contracts))
+        self.contracts += len(contracts)
+        self.errors += sum('error' in result for result in results)
+        return 200, {'results' : results} if batch else results[0]
+
+    async def _handle(self, reader, writer):   #One client connection, requests are answered in order until the client closes it
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                method, path, version = request_line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                try:
+                    status, payload = await self._route(method, path.split('?')[0], body)
+                except Exception as error:
+                    status, payload = 500, {'error' : f"internal error: {error}"}
+                data = json.dumps(payload).encode()
+                writer.write(f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(data)}\r\n\r\n".encode() + data)
+                await writer.drain()
+
+                self.requests += 1
+                if path == '/price':
+                    self.latencies.append(time.perf_counter() - start)
+                if headers.get('connection', '').lower() == 'close' or version == 'HTTP/1.0':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass    #client went away or sent a malformed request line
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+
+async def request(reader, writer, method, path, payload = None):  #Sends one request on an open keep-alive connection, returns (status, JSON payload)
+
+    body = json.dumps(payload).encode() if payload is not None else b''
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+def random_contract(rng, simulation_fraction = 0.0):   #Random contract around S0 = 100, a fraction of them priced by simulation with a small path count
+
+    style = 'American' if rng.random() < 0.3 else 'European'
+    contract = {'style' : style, 'type' : 'Call' if rng.random() < 0.5 else 'Put', 'S0' : 100.0, 'K' : float(rng.uniform(70, 130)),
+                'T' : float(rng.uniform(0.1, 2)), 'r' : 0.05, 'q' : 0.02, 'sigma' : float(rng.uniform(0.1, 0.5)), 'greeks' : bool(rng.random() < 0.5)}
+    if rng.random() < simulation_fraction:
+        contract.update({'engine' : SIMULATION[style], 'n_paths' : 20000, 'greeks' : style == 'European' and contract['greeks']})
+    return contract
+
+
+async def run_load(host = '127.0.0.1', port = 8765, unix = None, n_requests = 2000, concurrency = 32, batch_size = 1, simulation_fraction = 0.0, seed = 0):   #Load generator, returns client-side throughput, latency percentiles and the service /stats
+
+    rng = np.random.default_rng(seed)
+    payloads = []
+    for _ in range(n_requests):
+        contracts = [random_contract(rng, simulation_fraction) for _ in range(batch_size)]
+        payloads.append({'contracts' : contracts} if batch_size > 1 else contracts[0])
+
+    latencies, failures = [], 0
+    pending = collections.deque(payloads)
+
+    async def client():
+        nonlocal failures
+        reader, writer = await (asyncio.open_unix_connection(unix) if unix else asyncio.open_connection(host, port))
+        while pending:
+            payload = pending.popleft()
+            start = time.perf_counter()
+            status, result = await request(reader, writer, 'POST', '/price', payload)
+            latencies.append(time.perf_counter() - start)
+            results = result['results'] if batch_size > 1 else [result]
+            failures += status != 200 or any('error' in item for item in results)
+        writer.close()
+        await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await (asyncio.open_unix_connection(unix) if unix else asyncio.open_connection(host, port))
+    _, server_stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+    await writer.wait_closed()
+
+    latencies = np.array(latencies) * 1000
+    return {
+        'requests' : n_requests,
+        'contracts' : n_requests * batch_size,
+        'failed_requests' : failures,
+        'seconds' : elapsed,
+        'requests_per_s' : n_requests / elapsed,
+        'contracts_per_s' : n_requests * batch_size / elapsed,
+        'latency_ms' : dict(zip(['p50', 'p90', 'p99', 'max'], np.percentile(latencies, [50, 90, 99, 100]).tolist())),
+        'server' : server_stats
+        }
+
+
+async def _serve(args):
+    service = PricingService(args.workers, args.n_nodes, args.max_batch, args.max_delay_ms / 1000)
+    server = await service.start(args.host, args.port, args.unix)
+    print(f"Pricing service listening on {args.unix or f'http://{args.host}:{args.port}'}", file = sys.stderr, flush = True)
+    async with server:
+        await server.serve_forever()
+
+
+async def _load(args):
+    service = None
+    if args.spawn:
+        service = PricingService(args.workers)
+        await service.start(args.host, args.port, args.unix)
+    try:
+        report = await run_load(args.host, args.port, args.unix, args.requests, args.concurrency, args.batch, args.simulation_fraction)
+    finally:
+        if service:
+            await service.close()
+    print(json.dumps(report, indent = 2))
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(prog = 'python Pricing_Service.py', description = "Local pricing service with micro-batching and its load generator")
+    commands = parser.add_subparsers(dest = 'command', required = True)
+    for name in ('serve', 'load'):
+        command = commands.add_parser(name)
+        command.add_argument('--host', default = '127.0.0.1')
+        command.add_argument('--port', type = int, default = 8765)
+        command.add_argument('--unix', help = "Unix socket path instead of TCP")
+        command.add_argument('--workers', type = int, default = None, help = "processes for Monte Carlo and LSMC (default: all cores)")
+
+    serve = commands.choices['serve']
+    serve.add_argument('--n-nodes', type = int, default = 200, help = "binomial tree steps for contracts without n_nodes (default 200)")
+    serve.add_argument('--max-batch', type = int, default = 4096, help = "most contracts priced in one micro-batch (default 4096)")
+    serve.add_argument('--max-delay-ms', type = float, default = 2.0, help = "time the first contract of a batch waits for more (default 2 ms)")
+
+    load = commands.choices['load']
+    load.add_argument('--requests', type = int, default = 2000)
+    load.add_argument('--concurrency', type = int, default = 32, help = "concurrent keep-alive connections")
+    load.add_argument('--batch', type = int, default = 1, help = "contracts per request")
+    load.add_argument('--simulation-fraction', type = float, default = 0.0, help = "fraction of contracts priced with Monte Carlo or LSMC")
+    load.add_argument('--spawn', action = 'store_true', help = "start a service in this process instead of using a running one")
+
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args) if args.command == 'serve' else _load(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,46 +9,33 @@ Created on Tue Jul 22 16:19:42 2025
 #Some visualisations for European Options
 
 import numpy as np
-import matplotlib.pyplot as plt
-import streamlit as st
-from European_Options import European
-from Black_Scholes import Black_Scholes_Comp
+from European_Options import European_grid
+from Black_Scholes import Black_Scholes_Chain
+from Instrumentation import instrumented
 
 
 
-def vis(S0, K, T, r, q, sigma, N, option_type):     #Visualise performance of MC method versus Black-Scholes method for European Options
+@instrumented()
+def vis_figures(S0, K, T, r, q, sigma, N, option_type):     #Figures comparing the MC method with the Black-Scholes method for European Options
    
     #Initializing ranges
     K_range = np.linspace(max(0, K - 30), K + 30, 60)
     S0_range = np.linspace(max(0, S0 - 30), S0 + 30, 60)
     sigma_range = np.linspace(min(0.01, abs(sigma)), min(sigma + 0.2, 1), 60) # volatility
-    option_prices = []
-    bs_prices = []
-    option_prices2 = []
-    bs_prices2 = []
-    option_prices3 = []
-    bs_prices3 = []
     
-    for k in K_range:
-        MC_price, _ = European(S0, k, T, r, q, sigma, N, option_type)
-        option_prices.append(MC_price)
-        BS_price = Black_Scholes_Comp(S0, k, T, r, q, sigma, option_type)
-        bs_prices.append(BS_price)
+    #Monte-Carlo price of each sweep in one pass over a single normal sample
+    option_prices = European_grid(S0, K_range, T, r, q, sigma, N, option_type)
+    option_prices2 = European_grid(S0_range, K, T, r, q, sigma, N, option_type)
+    option_prices3 = European_grid(S0, K, T, r, q, sigma_range, N, option_type)
     
-    for s in S0_range:
-        MC_price2, _ = European(s, K, T, r, q, sigma, N, option_type)
-        option_prices2.append(MC_price2)
-        BS_price2 = Black_Scholes_Comp(s, K, T, r, q, sigma, option_type)
-        bs_prices2.append(BS_price2)
-        
-    for sig in sigma_range:
-        MC_price3, _ = European(S0, K, T, r, q, sig, N, option_type)
-        option_prices3.append(MC_price3)
-        BS_price3 = Black_Scholes_Comp(S0, K, T, r, q, sig, option_type)
-        bs_prices3.append(BS_price3)
+    #Black-Scholes reference for each sweep in one vectorized call
+    bs_prices = Black_Scholes_Chain(S0, K_range, T, r, q, sigma, option_type)['price']
+    bs_prices2 = Black_Scholes_Chain(S0_range, K, T, r, q, sigma, option_type)['price']
+    bs_prices3 = Black_Scholes_Chain(S0, K, T, r, q, sigma_range, option_type)['price']
 
     #Plotting
 
+    import matplotlib.pyplot as plt
     fig1, axs = plt.subplots(3, 1, figsize=(12, 14))
     fig1.tight_layout(pad=5.0)
         
@@ -79,18 +66,14 @@ def vis(S0, K, T, r, q, sigma, N, option_type):     #Visualise performance of MC
     axs[2].grid('True')
     
     
-    st.pyplot(fig1)
     
     #Plotting 3D Figure for behaviour Option Price under Spot price and Volatility
     
     #Grid of spot prices and volatilities
     S0_grid, sigma_grid = np.meshgrid(S0_range, sigma_range)
-    price_grid = np.zeros_like(S0_grid)
        
-    #Filling surface
-    for i in range (len(S0_range)):
-         for j in range(len(sigma_range)):
-               price_grid[j, i], _ = European(S0_range[i], K, T, r, q, sigma_range[j], N, option_type)
+    #Filling surface, one sorted sample per volatility serves the whole row of spot prices
+    price_grid = European_grid(S0_grid, K, T, r, q, sigma_grid, N, option_type)
   
         #Plot 3D  
     fig2 = plt.figure(figsize = (12,14))
@@ -101,6 +84,14 @@ def vis(S0, K, T, r, q, sigma, N, option_type):     #Visualise performance of MC
     axs.set_ylabel('Volatility')
     axs.set_zlabel('Option Price')
         
+    return fig1, fig2
+
+
+def vis(S0, K, T, r, q, sigma, N, option_type):     #Visualise performance of MC method versus Black-Scholes method for European Options
+    
+    import streamlit as st
+    fig1, fig2 = vis_figures(S0, K, T, r, q, sigma, N, option_type)
+    st.pyplot(fig1)
     st.pyplot(fig2)
     
 
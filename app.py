@@ -8,13 +8,40 @@ Created on Tue Jul 22 16:16:47 2025
 
 #Streamlit File 
 
+import io
 import streamlit as st
 
-from European_Options import European, plot_european
+from European_Options import European, European_VR, European_stream, plot_european
 from American_Options import American, plot_american
 from Black_Scholes import Black_Scholes_Comp
-from Greeks import compute_greeks_european, compute_greeks_american, plot_greeks_european, plot_greeks_american
-from Vis_European_Options import vis
+from Greeks import compute_greeks_european, compute_greeks_american, greeks_figure_european, greeks_figure_american
+from Vis_European_Options import vis_figures
+from Pricing_Cache import pricing_cache
+import Instrumentation
+from Instrumentation import instrumented
+
+@instrumented('render figure')
+def figure_png(builder, *args, **kwargs):    #PNG of every figure builder(*args, **kwargs) returns, with the same settings as st.pyplot, the figures are closed once rendered
+    import matplotlib.pyplot as plt
+    figures = builder(*args, **kwargs)
+    pngs = []
+    for fig in figures if isinstance(figures, tuple) else (figures,):
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format = 'png', dpi = 200, bbox_inches = 'tight')
+        plt.close(fig)
+        pngs.append(buffer.getvalue())
+    return tuple(pngs)
+
+def show_figure(builder, *args, **kwargs):     #Shows the figures of builder(*args, **kwargs), the PNGs are cached on the inputs so an unchanged figure is neither rebuilt nor rendered on a rerun
+    for png in pricing_cache.call(figure_png, builder, *args, **kwargs):
+        st.image(png)   #wide PNGs are scaled down to the column width, as st.pyplot does
+
+def european_histogram(S0, K, T, r, q, sigma, N, option_type):     #Histogram of the terminal prices from the streamed 50-bin counts, so the N simulated prices are never held in the cache
+    return plot_european(K, European_stream(S0, K, T, r, q, sigma, N, option_type, hist_bins = 50)[3])
+
+def american_histograms(S0, K, T, r, q, sigma, n_sim, n_steps, option_type):    #Exercise time and payoff histograms of the cached LSMC run, keyed on its scalar inputs rather than its path arrays
+    _, dt, cashflow, exercise_time = pricing_cache.call(American, S0, K, T, r, q, sigma, n_sim, n_steps, option_type, seed = 69)
+    return plot_american(dt, cashflow, exercise_time)
 
 def streamlt():    
     st.title("Option Pricing Calculator")
@@ -25,6 +52,17 @@ def streamlt():
     
         st.text("Use Monte-Carlo (European) or Longstaff-Schwartz-Monte-Carlo (American) simulations to estimate option prices")
         
+        #Opt-in per-stage timings of this run, the table is filled in at the end of the run
+        panel = st.expander("Performance instrumentation")
+        with panel:
+            profiling = st.checkbox("Record stage timings for this run", value = False)
+            trace_memory = st.checkbox("Also trace peak memory (slower)", value = False, disabled = not profiling)
+        Instrumentation.reset()
+        if profiling:
+            Instrumentation.enable(memory = trace_memory)
+        else:
+            Instrumentation.disable()
+        
         #General setup and initialization of values and variables
         
        
@@ -44,12 +82,19 @@ def streamlt():
         
         if option_style == 'European':
             N = st.slider("Number of Simulations for Monte-Carlo (European)", 1000, 50000, 10000, step=10)
-            price, _ = European(S0, K, T, r, q, sigma, N, option_type)
-            st.success(f"Estimated {option_style.capitalize()} {option_type.capitalize()} Option Price Calculated Using Monte Carlo: {price.item():.4f}")
+            variance_reduction = st.selectbox("Variance reduction for Monte-Carlo", ['None', 'Antithetic', 'Control variate', 'Sobol (quasi-random)'], index = 0)
+            if variance_reduction == 'None':
+                price, _ = pricing_cache.call(European, S0, K, T, r, q, sigma, N, option_type, return_ST = False)
+                st.success(f"Estimated {option_style.capitalize()} {option_type.capitalize()} Option Price Calculated Using Monte Carlo: {price.item():.4f}")
+            else:
+                vr_method = {'Antithetic' : 'antithetic', 'Control variate' : 'control', 'Sobol (quasi-random)' : 'sobol'}[variance_reduction]
+                price, std_error, ci, n_paths = pricing_cache.call(European_VR, S0, K, T, r, q, sigma, N, option_type, method = vr_method)
+                st.success(f"Estimated {option_style.capitalize()} {option_type.capitalize()} Option Price Calculated Using Monte Carlo ({variance_reduction}): {price.item():.4f}")
+                st.write(f"Standard error: {std_error:.4f}, 95% confidence interval: [{ci[0]:.4f}, {ci[1]:.4f}], from {n_paths} paths")
             BS_price = Black_Scholes_Comp(S0, K, T, r, q, sigma, option_type)
             st.success(f"Analytical European {option_type.capitalize()} Option Black-Scholes price: {BS_price:.4f}")
                 
-            greeks = compute_greeks_european(S0, K, r, q, sigma, T, N, option_type, h)
+            greeks = pricing_cache.call(compute_greeks_european, S0, K, r, q, sigma, T, N, option_type, h)
             st.subheader(f"European {option_type.capitalize()} Option Greeks Calculated Using Monte-Carlo Method: " )
             
             for greek, value in greeks[option_type].items():
@@ -59,16 +104,13 @@ def streamlt():
             
             
             if visu == 'Yes':
-                option_price, ST = European(S0, K, T, r, q, sigma, N, option_type)
-                fig = plot_european(K, ST)
-                st.pyplot(fig)
-                
-                vis(S0, K, T, r, q, sigma, N, option_type)
+                show_figure(european_histogram, S0, K, T, r, q, sigma, N, option_type)
+                show_figure(vis_figures, S0, K, T, r, q, sigma, N, option_type)
                  
                 greek_vis = st.selectbox("Do you want visualisations of option greeks as well?", ['Yes', 'No'], index = 1)
                 
                 if greek_vis == "Yes":
-                    plot_greeks_european(S0, K, r, q, sigma, T, N, option_type, h)
+                    show_figure(greeks_figure_european, S0, K, r, q, sigma, T, N, option_type, h)
             
            
             
@@ -80,11 +122,13 @@ def streamlt():
         elif option_style == 'American':
             n_sim = st.slider("Number of Simulations for Longstaff-Schwartz-Monte-Carlo (American)", 1000, 50000, 10000, step=10)
             n_steps =st.slider("Number of discrete time steps in Longstaff-Schwartz-Monte-Carlo (American)", 10, 500, 100, step=1) 
-            n_nodes =st.slider("Number of tree nodes in Cox-Ross-Rubenstein Binomial Tree for American Option Greek Calculations", 10, 500, 100, step=1) 
-            price, _, _, _ = American(S0, K, T, r, q, sigma, n_sim, n_steps, option_type)
+            greeks_engine = st.selectbox("Engine for the American Option Greeks", ['Cox-Ross-Rubenstein Binomial Tree', 'Crank-Nicolson Finite Differences'], index = 0)
+            greeks_method = 'tree' if greeks_engine == 'Cox-Ross-Rubenstein Binomial Tree' else 'pde'
+            n_nodes =st.slider("Number of tree nodes (binomial tree) or time steps (Crank-Nicolson) for American Option Greek Calculations", 10, 500, 100, step=1) 
+            price, _, _, _ = pricing_cache.call(American, S0, K, T, r, q, sigma, n_sim, n_steps, option_type, seed = 69)
             st.success(f"Estimated {option_style.capitalize()} {option_type.capitalize()} Option Price Calculated Using Longstaff Schwartz Monte Carlo: {price.item():.4f}")
-            greeks = compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h)
-            st.subheader(f" American {option_type.capitalize()} Option Greeks Calculated Using CRR Binomial Tree: " )
+            greeks = pricing_cache.call(compute_greeks_american, S0, K, r, q, sigma, T, n_nodes, option_type, h, method = greeks_method, kernel = 'auto')
+            st.subheader(f" American {option_type.capitalize()} Option Greeks Calculated Using {greeks_engine}: " )
             
             for greek, value in greeks[option_type].items():
                 st.write(f"{greek.capitalize()}: {value:.4f}")
@@ -93,14 +137,27 @@ def streamlt():
             
             if visu == 'Yes':
                 
-                option_price, dt, cashflow, exercise_time = American(S0, K, T, r, q, sigma, n_sim, n_steps, option_type)
-                fig2 = plot_american(dt, cashflow, exercise_time)
-                st.pyplot(fig2)
+                show_figure(american_histograms, S0, K, T, r, q, sigma, n_sim, n_steps, option_type)
     
                 greek_vis = st.selectbox("Do you want visualisations of option greeks as well?", ['Yes', 'No'], index = 1)
                 
                 if greek_vis == "Yes":
-                    plot_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h)
+                    show_figure(greeks_figure_american, S0, K, r, q, sigma, T, n_nodes, option_type, h, method = greeks_method, kernel = 'auto')
+        
+        stats = pricing_cache.stats()
+        st.caption(f"Pricing cache: {stats['hits']} hits, {stats['misses']} misses, {stats['size']}/{stats['maxsize']} entries")
+        
+        if profiling:
+            Instrumentation.disable()
+            rows = [{'stage' : name, 'calls' : entry['calls'], 'total (s)' : entry['total_s'], 'max (s)' : entry['max_s'],
+                     'peak memory (MB)' : entry['peak_bytes'] / 2**20, 'output arrays (MB)' : entry['output_bytes'] / 2**20}
+                    for name, entry in Instrumentation.report().items()]
+            with panel:
+                if rows:
+                    st.caption("Times include nested stages, results served from the pricing cache are not recomputed and do not appear")
+                    st.dataframe(rows, hide_index = True)
+                else:
+                    st.caption("Every result of this run came from the pricing cache")
         
     with tab2:
           st.subheader("User Instructions") 
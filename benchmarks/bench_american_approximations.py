@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 18:12:40 2026
+
+@author: jesseruijer
+"""
+
+#Accuracy and throughput of the American approximations (American_Approximations.py) against a 2,001-step Richardson-extrapolated LR tree,
+#on random contracts from 1 week to 5 years, and the error of the 'auto' policy on the contracts it does not send to the tree
+#Run from the repository root with: python -m benchmarks.bench_american_approximations
+
+import time
+import numpy as np
+from American_Options import american_binomial, american_binomial_batch
+from American_Approximations import barone_adesi_whaley, bjerksund_stensland, american_approximation
+
+def main(n = 400, tol = 0.01):
+
+    rng = np.random.default_rng(1)
+    S0, K = rng.uniform(70, 130, n), np.full(n, 100.0)
+    T = rng.choice([7 / 365, 0.1, 0.25, 0.5, 1, 2, 5], n)
+    r, q, sigma = rng.uniform(0, 0.1, n), rng.uniform(0, 0.08, n), rng.uniform(0.1, 0.6, n)
+    is_call = rng.random(n) < 0.5
+    kernel = 'auto'     #the reference trees use the compiled kernel when Numba is installed
+    reference = np.array([american_binomial(S0[i], K[i], T[i], r[i], q[i], sigma[i], 2001, 'Call' if is_call[i] else 'Put', kernel = kernel, tree = 'lrr')
+                          for i in range(n)])
+
+    tree = american_binomial_batch(S0, K, T, r, q, sigma, 200, is_call)
+    prices = {'baw' : barone_adesi_whaley(S0, K, T, r, q, sigma, is_call), 'bs2002' : bjerksund_stensland(S0, K, T, r, q, sigma, is_call), 'tree 200' : tree}
+    print(f"Max |error| against the reference over {n} contracts, per maturity")
+    print(f"{'T':>8s}" + ''.join(f"{name:>12s}" for name in prices))
+    for maturity in np.unique(T):
+        rows = T == maturity
+        print(f"{maturity:8.3f}" + ''.join(f"{np.max(np.abs(price[rows] - reference[rows])):12.4f}" for price in prices.values()))
+
+    approximation = american_approximation(S0, K, T, r, q, sigma, is_call, tol)
+    safe = approximation['safe']
+    print(f"\n'auto' with tol = {tol}: {np.mean(safe):.0%} of the contracts priced by Bjerksund-Stensland, "
+          f"max |error| {np.max(np.abs(approximation['price'][safe] - reference[safe])):.4f}")
+
+    #Throughput on a short-dated screen of 100,000 contracts
+    m = 100_000
+    S0, T, is_call = rng.uniform(80, 120, m), rng.choice([7 / 365, 30 / 365, 0.25, 0.5], m), rng.random(m) < 0.5
+    print(f"\nThroughput on {m:,} contracts with T <= 6 months")
+    for name, func in (('baw', barone_adesi_whaley), ('bs2002', bjerksund_stensland), ('american_approximation', american_approximation)):
+        start = time.perf_counter()
+        func(S0, 100, T, 0.04, 0.01, 0.25, is_call)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:24s} {elapsed:7.3f} s   {m / elapsed:12,.0f} contracts/s")
+    start = time.perf_counter()
+    american_binomial_batch(S0[:2048], 100, T[:2048], 0.04, 0.01, 0.25, 200, is_call[:2048])
+    elapsed = time.perf_counter() - start
+    print(f"  {'tree (200 nodes)':24s} {elapsed:7.3f} s   {2048 / elapsed:12,.0f} contracts/s (2,048 contracts)")
+    print(f"  safe for 'auto': {np.mean(american_approximation(S0, 100, T, 0.04, 0.01, 0.25, is_call, tol)['safe']):.0%}")
+
+
+if __name__ == "__main__":
+    main()
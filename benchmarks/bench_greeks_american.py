@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:40 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of American Greeks: tree builds and wall time per Greeks request, single-tree versus bump-and-reprice
+#Run from the repository root with: python -m benchmarks.bench_greeks_american
+
+import time
+import Greeks
+import American_Options
+
+def count_trees(func, *args, **kwargs):     #Calls func while counting every CRR tree that gets built, returns (result, number of trees)
+    
+    counter = {'trees' : 0}
+    original_binomial = Greeks.american_binomial
+    original_binomial_greeks = Greeks.american_binomial_greeks
+    
+    def counting_binomial(*a, **kw):
+        counter['trees'] += 1
+        return original_binomial(*a, **kw)
+    
+    def counting_binomial_greeks(*a, **kw):
+        counter['trees'] += 1
+        return original_binomial_greeks(*a, **kw)
+    
+    Greeks.american_binomial = counting_binomial
+    Greeks.american_binomial_greeks = counting_binomial_greeks
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        Greeks.american_binomial = original_binomial
+        Greeks.american_binomial_greeks = original_binomial_greeks
+        
+    return result, counter['trees']
+
+
+def main():
+    
+    #App defaults, plus the slider maximum for the number of tree nodes
+    S0, K, T, r, q, sigma = 100, 95, 0.25, 0.05, 0.01, 0.25
+    h = 0.01 * S0
+    
+    print(f"{'nodes':>6} {'method':>6} {'side':>5} {'trees':>6} {'time (ms)':>10}")
+    for n_nodes in [100, 500]:
+        for method in ['bump', 'tree']:
+            for option_type in ['Put', 'Both']:
+                start = time.perf_counter()
+                greeks, trees = count_trees(Greeks.compute_greeks_american, S0, K, r, q, sigma, T, n_nodes, option_type, h, method = method)
+                elapsed = (time.perf_counter() - start) * 1e3
+                print(f"{n_nodes:>6} {method:>6} {option_type:>5} {trees:>6} {elapsed:>10.2f}")
+    
+    #Agreement between the two methods at the slider maximum
+    bump = Greeks.compute_greeks_american(S0, K, r, q, sigma, T, 500, 'Put', h, method = 'bump')['Put']
+    tree = Greeks.compute_greeks_american(S0, K, r, q, sigma, T, 500, 'Put', h, method = 'tree')['Put']
+    for greek in bump:
+        print(f"{greek:>6}: bump {bump[greek]: .6f}  tree {tree[greek]: .6f}")
+    
+    #Single-tree price equals the plain CRR price at the same node count
+    price, _, _, _ = American_Options.american_binomial_greeks(S0, K, T, r, q, sigma, 500, 'Put')
+    print(f"price : {price:.10f} vs {American_Options.american_binomial(S0, K, T, r, q, sigma, 500, 'Put'):.10f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 11:52:36 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of the Greek profiles against spot: greeks_profile_* against one compute_greeks_* call per spot
+#Run from the repository root with: python -m benchmarks.bench_greeks_profile
+
+import time
+import numpy as np
+from Greeks import compute_greeks_european, compute_greeks_american, greeks_profile_european, greeks_profile_american, GREEKS, SIDES
+
+def loop_profile(compute, S_range, *args):     #Profile the way the plots used to build it, one full Greeks computation per spot
+    greeks = [compute(S, *args) for S in S_range]
+    return np.array([[[g[side][greek] for side in SIDES] for greek in GREEKS] for g in greeks])
+
+
+def main():
+    
+    K, r, q, sigma, T, h = 100, 0.05, 0.02, 0.3, 1, 0.5
+    N, n_nodes, n_points = 50_000, 200, 200
+    S_range = np.linspace(70, 130, n_points)
+    
+    cases = [
+        ("European (pathwise, N = 50,000)", lambda S: greeks_profile_european(S, K, r, q, sigma, T, N),
+         lambda S: loop_profile(compute_greeks_european, S, K, r, q, sigma, T, N, "Both", h)),
+        (f"American ({n_nodes}-node CRR tree)", lambda S: greeks_profile_american(S, K, r, q, sigma, T, n_nodes, h),
+         lambda S: loop_profile(compute_greeks_american, S, K, r, q, sigma, T, n_nodes, "Both", h)),
+        (f"American ({n_nodes}-node CRR tree, 2 processes)", lambda S: greeks_profile_american(S, K, r, q, sigma, T, n_nodes, h, backend = 'process', n_workers = 2),
+         lambda S: loop_profile(compute_greeks_american, S, K, r, q, sigma, T, n_nodes, "Both", h)),
+        ]
+    
+    for name, profile, loop in cases:
+        start = time.perf_counter()
+        result = profile(S_range)
+        profile_time = time.perf_counter() - start
+        
+        #The loop is timed on every 10th spot and scaled up
+        start = time.perf_counter()
+        reference = loop(S_range[::10])
+        loop_time = (time.perf_counter() - start) * 10
+        
+        print(f"{name}, {n_points} spots")
+        print(f"  profile : {profile_time:8.3f} s")
+        print(f"  loop    : {loop_time:8.3f} s (estimated), speedup {loop_time / profile_time:.0f}x, max |difference| {np.max(np.abs(result[::10] - reference)):.2e}")
+
+
+if __name__ == "__main__":
+    main()
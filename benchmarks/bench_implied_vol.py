@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:02:55 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of the vectorized implied volatility solvers against a scalar scipy.optimize.brentq loop
+#Run from the repository root with: python -m benchmarks.bench_implied_vol
+
+import time
+import numpy as np
+from scipy.optimize import brentq
+from Black_Scholes import Black_Scholes_Comp, Black_Scholes_Chain
+from American_Options import american_binomial, american_binomial_batch
+from Implied_Volatility import implied_vol, implied_vol_american, CONVERGED
+
+def quotes(n, seed = 69):   #Random chain of quotes around S0 = 100
+    rng = np.random.default_rng(seed)
+    K = rng.uniform(60, 160, n)
+    T = rng.uniform(0.05, 2, n)
+    sigma = rng.uniform(0.1, 0.8, n)
+    is_call = rng.random(n) < 0.5
+    return K, T, sigma, is_call
+
+
+def main():
+    
+    S0, r, q = 100, 0.05, 0.02
+    
+    #European: 50,000 quotes vectorized, brentq on a subset of 1,000 quotes
+    K, T, sigma, is_call = quotes(50_000)
+    chain = Black_Scholes_Chain(S0, K, T, r, q, sigma, is_call)
+    price = chain['price']
+    identifiable = chain['vega'] > 1e-4   #quotes whose price moves by more than 1e-4 for a 1% volatility change
+    
+    start = time.perf_counter()
+    iv, status = implied_vol(price, S0, K, T, r, q, is_call)
+    vector_time = time.perf_counter() - start
+    ok = status == CONVERGED
+    checked = ok & identifiable
+    
+    start = time.perf_counter()
+    iv_brentq = [brentq(lambda s: Black_Scholes_Comp(S0, K[i], T[i], r, q, s, 'Call' if is_call[i] else 'Put') - price[i], 1e-4, 5, xtol = 1e-10)
+                 for i in range(1000)]
+    brentq_time = time.perf_counter() - start
+    
+    print("European implied volatility")
+    print(f"  vectorized : {len(K) / vector_time:12,.0f} quotes/s, {ok.mean():.2%} converged, max |error| {np.max(np.abs(iv - sigma)[checked]):.2e} over identifiable quotes")
+    print(f"  brentq     : {1000 / brentq_time:12,.0f} quotes/s, max |difference| {np.nanmax(np.abs(iv[:1000] - iv_brentq)[checked[:1000]]):.2e}")
+    
+    #American: 500 quotes in batches of trees, brentq on a subset of 20 quotes
+    n_nodes = 200
+    K, T, sigma, is_call = quotes(500)
+    price = american_binomial_batch(S0, K, T, r, q, sigma, n_nodes, is_call)
+    identifiable = np.abs(american_binomial_batch(S0, K, T, r, q, sigma + 0.01, n_nodes, is_call) - price) > 1e-4
+    
+    start = time.perf_counter()
+    iv, status = implied_vol_american(price, S0, K, T, r, q, is_call, n_nodes = n_nodes)
+    vector_time = time.perf_counter() - start
+    ok = status == CONVERGED
+    checked = ok & identifiable
+    
+    start = time.perf_counter()
+    iv_brentq = [brentq(lambda s: american_binomial(S0, K[i], T[i], r, q, s, n_nodes, 'Call' if is_call[i] else 'Put') - price[i], 0.01, 3, xtol = 1e-6)
+                 for i in range(20)]
+    brentq_time = time.perf_counter() - start
+    
+    print(f"American implied volatility ({n_nodes}-node CRR tree)")
+    print(f"  vectorized : {len(K) / vector_time:12,.0f} quotes/s, {ok.mean():.2%} converged, max |error| {np.max(np.abs(iv - sigma)[checked]):.2e} over identifiable quotes")
+    print(f"  brentq     : {20 / brentq_time:12,.0f} quotes/s, max |difference| {np.nanmax(np.abs(iv[:20] - iv_brentq)[checked[:20]]):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 10:17:53 2026
+
+@author: jesseruijer
+"""
+
+#Incremental repricing (Incremental_Repricing.py) of a book of European and American options over two trading days of one-minute spot ticks,
+#against a full revaluation on every tick: number of full valuations, wall time and the error of the expansion
+#Run from the repository root with: python -m benchmarks.bench_incremental
+
+import time
+import numpy as np
+from Black_Scholes import Black_Scholes_Chain
+from American_Options import american_binomial
+from Incremental_Repricing import IncrementalRepricer
+
+def main(n = 1000, n_ticks = 2 * 390, tol = 0.01):
+
+    rng = np.random.default_rng(7)
+    K, T0 = rng.uniform(80, 120, n), rng.choice([0.1, 0.25, 0.5, 1], n)
+    is_call = rng.random(n) < 0.5
+    style = np.where(rng.random(n) < 0.5, 'American', 'European')
+    r, q, sigma, dt = 0.05, 0.02, 0.25, 1 / 252 / 390
+    S = 100 * np.exp(np.cumsum(sigma * np.sqrt(dt) * rng.standard_normal(n_ticks)))
+    american = style == 'American'
+
+    for tree in ('crr', 'lrr'):
+        repricer = IncrementalRepricer(K, r, q, sigma, is_call, style, tol = tol, tree = tree, kernel = 'auto')
+        start = time.perf_counter()
+        repricer.price(S[0], T0)
+        first_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for tick in range(1, n_ticks):
+            result = repricer.price(S[tick], T0 - tick * dt)
+        elapsed = time.perf_counter() - start
+        stats = repricer.stats()
+        print(f"tree {tree}: {n:,} contracts x {n_ticks} ticks, {stats['full']:,} full and {stats['incremental']:,} incremental valuations")
+        print(f"  initial full valuation {first_time:.3f} s, then {elapsed / (n_ticks - 1) * 1e3:.2f} ms per tick "
+              f"(a full valuation on every tick would take about {first_time * (n_ticks - 1):.0f} s)")
+
+        #Error at the last tick: Europeans against Black-Scholes, Americans against a 1,001-step LRR tree
+        T = T0 - (n_ticks - 1) * dt
+        error = np.abs(result['price'] - Black_Scholes_Chain(S[-1], K, T, r, q, sigma, is_call)['price'])
+        reference = [american_binomial(S[-1], K[i], T[i], r, q, sigma, 1001, 'Call' if is_call[i] else 'Put', kernel = 'auto', tree = 'lrr')
+                     for i in np.flatnonzero(american)]
+        error[american] = np.abs(result['price'][american] - reference)
+        print(f"  last tick (spot {S[-1]:.2f}): max |error| European {error[~american].max():.4f}, American {error[american].max():.4f}, "
+              f"max estimated error {result['error'].max():.4f}\n")
+
+
+if __name__ == "__main__":
+    main()
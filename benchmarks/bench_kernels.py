@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 15:21:37 2026
+
+@author: jesseruijer
+"""
+
+#Equivalence and speed of the compiled kernels (Kernels.py) against the NumPy implementation: CRR prices and tree Greeks up to 10,000 nodes,
+#GBM paths and LSMC prices from the same random numbers. Needs Numba, run from the repository root with: python -m benchmarks.bench_kernels
+#Exit status 1 if a compiled result differs from the NumPy one beyond the tolerance, the same checks run under pytest in tests/test_kernels.py
+
+import sys
+import time
+import numpy as np
+import Kernels
+from American_Options import American, american_binomial, american_binomial_greeks, _simulate_paths
+
+def timed(func, repeat = 3):    #Best wall time of repeat calls and the result of the last one
+
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check(label, numpy_time, numba_time, difference, tolerance):
+
+    ok = difference <= tolerance
+    print(f"{label:44s} numpy {numpy_time * 1e3:9.2f} ms   numba {numba_time * 1e3:8.2f} ms   {numpy_time / numba_time:6.1f}x   "
+          f"max |difference| {difference:.2e} {'ok' if ok else 'FAILED'}")
+    return ok
+
+
+def main():
+
+    if not Kernels.available():
+        print("Numba is not installed, nothing to compare ('pip install numba')")
+        return 0
+
+    start = time.perf_counter()
+    Kernels.load('numba')
+    american_binomial(100, 100, 1, 0.05, 0.02, 0.25, 10, 'Put', kernel = 'numba')
+    American(100, 100, 1, 0.05, 0.02, 0.25, 100, 10, 'Put', seed = 1, kernel = 'numba')
+    print(f"First use (compilation or loading the cache): {time.perf_counter() - start:.2f} s\n")
+
+    ok = True
+    S0, K, r, q, sigma = 100, 100, 0.05, 0.02, 0.3
+    for T, n_nodes in ((1, 500), (5, 2000), (10, 5000), (10, 10000)):
+        for option_type in ('Call', 'Put'):
+            numpy_time, numpy_price = timed(lambda: american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type))
+            numba_time, numba_price = timed(lambda: american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type, kernel = 'numba'))
+            ok &= check(f"american_binomial {option_type} T = {T}, {n_nodes} nodes", numpy_time, numba_time, abs(numpy_price - numba_price), 1e-12)
+
+        numpy_time, numpy_greeks = timed(lambda: american_binomial_greeks(S0, K, T, r, q, sigma, n_nodes, 'Put'))
+        numba_time, numba_greeks = timed(lambda: american_binomial_greeks(S0, K, T, r, q, sigma, n_nodes, 'Put', kernel = 'numba'))
+        ok &= check(f"american_binomial_greeks Put {n_nodes} nodes", numpy_time, numba_time, np.max(np.abs(np.subtract(numpy_greeks, numba_greeks))), 1e-12)
+
+    print()
+    for dtype, tolerance in ((np.float64, 1e-12), (np.float32, 1e-5)):
+        paths = lambda kernel: _simulate_paths(S0, (r - q - 0.5 * sigma**2) / 100, sigma, 1 / 100, 50_000, 100, np.random.default_rng(69), dtype, kernel)
+        numpy_time, numpy_paths = timed(lambda: paths('numpy'))
+        numba_time, numba_paths = timed(lambda: paths('numba'))
+        ok &= check(f"paths 50,000 x 100 {np.dtype(dtype).name} (relative)", numpy_time, numba_time, np.max(np.abs(numba_paths / numpy_paths - 1)), tolerance)
+
+    for n_sim, n_steps in ((10_000, 100), (50_000, 500)):
+        numpy_time, numpy_result = timed(lambda: American(S0, K, 1, r, q, sigma, n_sim, n_steps, 'Put', seed = 69), repeat = 1)
+        numba_time, numba_result = timed(lambda: American(S0, K, 1, r, q, sigma, n_sim, n_steps, 'Put', seed = 69, kernel = 'numba'), repeat = 1)
+        ok &= check(f"American LSMC {n_sim:,} paths x {n_steps} steps", numpy_time, numba_time, abs(numpy_result[0] - numba_result[0]), 1e-10)
+
+    print("\nAll compiled kernels match the NumPy implementation" if ok else "\nSome compiled kernels differ from the NumPy implementation")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:21:37 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of the LSMC regression: solvers and bases at 50,000 paths, per-step cost and conditioning
+#Run from the repository root with: python -m benchmarks.bench_lsmc_regression
+
+import time
+import numpy as np
+from American_Options import American, _fill_basis
+
+def per_step_legacy(X, Y):  #The original per-step regression: fresh design matrix and an SVD based lstsq
+    A = np.vstack([np.ones_like(X), X, X**2]).T
+    coeffs = np.linalg.lstsq(A, Y, rcond=None)[0]
+    return A @ coeffs
+
+
+def per_step_normal(B, X, Y, K, basis, scale):  #Buffered basis and normal equations, as in American with solver = 'normal'
+    B = B[:, :len(X)]
+    _fill_basis(B, X, K, basis, scale)
+    coeffs = np.linalg.solve(B @ B.T, B @ Y)
+    return coeffs @ B
+
+
+def per_step_qr(B, X, Y, K, basis, scale):  #Buffered basis and a reduced QR, as in American with solver = 'qr'
+    B = B[:, :len(X)]
+    _fill_basis(B, X, K, basis, scale)
+    Q, R = np.linalg.qr(B.T)
+    coeffs = np.linalg.lstsq(R, Q.T @ Y, rcond=None)[0]
+    return coeffs @ B
+
+
+def best_of(func, *args, repeats = 20):     #Best wall time over a number of repeats, in milliseconds
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times) * 1e3
+
+
+def main():
+    
+    #One regression step on 50,000 in-the-money paths
+    rng = np.random.default_rng(69)
+    K, scale = 1000, 0.25 * np.sqrt(0.5)
+    X = K * np.exp(scale * rng.standard_normal(50_000) - 0.1)
+    Y = np.maximum(K - X * np.exp(0.05 * rng.standard_normal(50_000)), 0)
+    B = np.empty((3, 50_000))
+    print("One regression step, 50,000 paths, degree 2, S ~ 1000")
+    print(f"  legacy vstack + lstsq : {best_of(per_step_legacy, X, Y):8.3f} ms")
+    print(f"  buffer + normal       : {best_of(per_step_normal, B, X, Y, K, 'monomial', scale):8.3f} ms")
+    print(f"  buffer + qr           : {best_of(per_step_qr, B, X, Y, K, 'monomial', scale):8.3f} ms")
+    
+    #Conditioning of the design matrix at S ~ 1000
+    print("\nCondition number of the design matrix, S ~ 1000")
+    for basis in ['raw', 'monomial', 'laguerre', 'hermite']:
+        for degree in [2, 4]:
+            B = np.empty((degree + 1, len(X)))
+            _fill_basis(B, X, K, basis, scale)
+            print(f"  {basis:>9} degree {degree}: {np.linalg.cond(B.T):10.3e}")
+    
+    #Full pricing at 50,000 paths x 100 steps
+    print("\nAmerican put, 50,000 paths x 100 steps")
+    print(f"{'basis':>9} {'degree':>6} {'solver':>6} {'price':>9} {'time (s)':>9}")
+    for basis in ['raw', 'monomial', 'laguerre', 'hermite']:
+        for degree in [2, 4]:
+            for solver in ['lstsq', 'qr', 'normal']:
+                start = time.perf_counter()
+                price = American(100, 95, 0.25, 0.05, 0.01, 0.25, 50_000, 100, 'Put', seed = 69, basis = basis, degree = degree, solver = solver)[0]
+                print(f"{basis:>9} {degree:>6} {solver:>6} {price:>9.5f} {time.perf_counter() - start:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:48:02 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of a 40-strike American put strip: one shared path set (American_strip) versus one American call per strike
+#Run from the repository root with: python -m benchmarks.bench_lsmc_strip
+
+import time
+import numpy as np
+from American_Options import American, American_strip, american_binomial
+
+def main():
+    
+    S0, T, r, q, sigma = 100, 0.5, 0.05, 0.01, 0.25
+    n_sim, n_steps = 50_000, 100
+    K = np.linspace(80, 120, 40)
+    
+    start = time.perf_counter()
+    strip = American_strip(S0, K, T, r, q, sigma, n_sim, n_steps, 'Put', seed = 69)['price']
+    strip_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    single = np.array([American(S0, k, T, r, q, sigma, n_sim, n_steps, 'Put', seed = 69)[0] for k in K])
+    single_time = time.perf_counter() - start
+    
+    tree = np.array([american_binomial(S0, k, T, r, q, sigma, 1000, 'Put') for k in K])
+    
+    print(f"40 strikes, {n_sim:,} paths x {n_steps} steps")
+    print(f"  shared paths : {strip_time:7.3f} s, max |error| vs 1000-node tree {np.max(np.abs(strip - tree)):.4f}")
+    print(f"  per strike   : {single_time:7.3f} s, max |error| vs 1000-node tree {np.max(np.abs(single - tree)):.4f}")
+    print(f"  speedup      : {single_time / strip_time:7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:05:11 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of the process backend: speedup versus number of worker processes for the streaming European MC and for LSMC
+#Run from the repository root with: python -m benchmarks.bench_parallel
+
+import os
+import time
+from European_Options import European_stream
+from American_Options import American
+
+def timed(func, *args, **kwargs):   #Returns (result, wall time in seconds)
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    
+    S0, K, T, r, q, sigma = 100, 95, 0.25, 0.05, 0.01, 0.25
+    max_workers = os.cpu_count() or 1
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, max_workers})
+    worker_counts = [n for n in worker_counts if n <= max_workers]
+    
+    print(f"European MC, 20,000,000 paths ({max_workers} cores available)")
+    print(f"{'workers':>8} {'price':>10} {'time (s)':>9} {'speedup':>8}")
+    for n_workers in worker_counts:
+        backend = 'process' if n_workers > 1 else 'serial'
+        (price, _, _, _), elapsed = timed(European_stream, S0, K, T, r, q, sigma, 20_000_000, 'Call', n_streams = n_workers, backend = backend, n_workers = n_workers)
+        if n_workers == 1:
+            baseline = elapsed
+        print(f"{n_workers:>8} {price:>10.5f} {elapsed:>9.3f} {baseline / elapsed:>8.2f}")
+    
+    #App slider maxima for the number of simulations and time steps
+    print("\nLSMC, 50,000 paths x 500 steps")
+    print(f"{'workers':>8} {'price':>10} {'time (s)':>9} {'speedup':>8}")
+    for n_workers in worker_counts:
+        backend = 'process' if n_workers > 1 else 'serial'
+        (price, _, _, _), elapsed = timed(American, S0, K, T, r, q, sigma, 50_000, 500, 'Put', seed = 69, backend = backend, n_workers = n_workers)
+        if n_workers == 1:
+            baseline = elapsed
+        print(f"{n_workers:>8} {price:>10.5f} {elapsed:>9.3f} {baseline / elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 20:24:18 2026
+
+@author: jesseruijer
+"""
+
+#Accuracy and speed of the Crank-Nicolson American engine (American_PDE.py): price and Greeks at the money against a 2,001-step
+#Richardson-extrapolated LR tree, Brennan-Schwartz against PSOR, and the Greek profile against spot against the batched tree profile
+#Run from the repository root with: python -m benchmarks.bench_pde
+
+import time
+import numpy as np
+import Kernels
+from American_Options import american_binomial
+from American_PDE import american_pde
+from Greeks import compute_greeks_american, greeks_profile_american, GREEKS
+
+def timed(func):    #Wall time and result of one call
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+
+    K, h = 100, 0.5
+    contracts = [(100, 1, 0.05, 0.02, 0.3, 'Put'), (100, 1, 0.05, 0.02, 0.3, 'Call'), (90, 0.5, 0.08, 0.0, 0.2, 'Put'), (110, 2, 0.03, 0.07, 0.35, 'Call')]
+    kernels = ['numpy'] + (['numba'] if Kernels.available() else [])
+    for kernel in kernels[1:]:
+        american_pde(100, K, 1, 0.05, 0.02, 0.3, 'Put', kernel = kernel)    #compile or load the cached kernel
+
+    print("Error against the reference at S0 (401 x 200 grid, 3 solves)")
+    print(f"{'contract':42s}{'solver':18s}{'ms':>8s}{'price':>10s}" + ''.join(f"{greek:>10s}" for greek in GREEKS))
+    for S0, T, r, q, sigma, option_type in contracts:
+        reference = american_binomial(S0, K, T, r, q, sigma, 2001, option_type, kernel = 'auto', tree = 'lrr')
+        greeks = compute_greeks_american(S0, K, r, q, sigma, T, 1001, option_type, h, kernel = 'auto', tree = 'lrr')[option_type]
+        for solver, kernel in [('brennan_schwartz', kernel) for kernel in kernels] + [('psor', 'numpy')]:
+            elapsed, grid = timed(lambda: american_pde(S0, K, T, r, q, sigma, option_type, solver = solver, kernel = kernel))
+            i = grid['index']
+            label = f"{option_type} S0={S0} T={T} r={r} q={q} s={sigma}"
+            print(f"{label:42s}{solver + ' ' + kernel if solver != 'psor' else solver:18s}{elapsed * 1e3:8.1f}{grid['price'][i] - reference:10.5f}"
+                  + ''.join(f"{grid[greek][i] - greeks[greek]:10.5f}" for greek in GREEKS))
+
+    #Greek profile of the call and put against spot, as the app plots it
+    S0, T, r, q, sigma, n_nodes = 100, 1, 0.05, 0.02, 0.3, 200
+    S_range = np.linspace(70, 130, 200)
+    tree_time, tree_profile = timed(lambda: greeks_profile_american(S_range, K, r, q, sigma, T, n_nodes, h))
+    print(f"\nProfile over {len(S_range)} spots: batched {n_nodes}-node trees {tree_time:.3f} s")
+    for kernel in kernels:
+        pde_time, pde_profile = timed(lambda: greeks_profile_american(S_range, K, r, q, sigma, T, n_nodes, h, method = 'pde', kernel = kernel))
+        print(f"  pde ({kernel}) {pde_time:.3f} s ({tree_time / pde_time:.1f}x)")
+    print("Max |pde - tree| per Greek: " + ', '.join(f"{greek} {np.max(np.abs(pde_profile[:, i] - tree_profile[:, i])):.5f}" for i, greek in enumerate(GREEKS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 10:41:07 2026
+
+@author: jesseruijer
+"""
+
+#Benchmark of the 60 x 60 spot/volatility surface of Vis_European_Options: European_grid against one European call per grid point
+#Run from the repository root with: python -m benchmarks.bench_vis_grid
+
+import time
+import numpy as np
+from European_Options import European, European_grid
+
+def main():
+
+    S0, K, T, r, q, sigma, N = 100, 100, 1, 0.05, 0.02, 0.25, 50_000
+    S0_range = np.linspace(S0 - 30, S0 + 30, 60)
+    sigma_range = np.linspace(0.01, sigma + 0.2, 60)
+    S0_grid, sigma_grid = np.meshgrid(S0_range, sigma_range)
+
+    for option_type in ('Call', 'Put'):
+        start = time.perf_counter()
+        grid = European_grid(S0_grid, K, T, r, q, sigma_grid, N, option_type)
+        grid_time = time.perf_counter() - start
+
+        #The loop is timed on one row of the surface (60 of the 3,600 calls) and scaled up
+        start = time.perf_counter()
+        row = [European(s, K, T, r, q, sigma_range[30], N, option_type)[0] for s in S0_range]
+        loop_time = (time.perf_counter() - start) * len(sigma_range)
+
+        print(f"{option_type} surface, 3,600 contracts at N = {N:,}")
+        print(f"  European_grid  : {grid_time:8.3f} s")
+        print(f"  European loop  : {loop_time:8.3f} s (estimated), speedup {loop_time / grid_time:.0f}x, max |difference| {np.max(np.abs(grid[30] - row)):.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 16:37:12 2026
+
+@author: jesseruijer
+"""
+
+#Import-time budget of the headless pricing modules: each is imported in a fresh interpreter, as a spawned worker process would,
+#its wall time is compared against the budget and it must not pull in matplotlib or streamlit
+#Run from the repository root with: python -m benchmarks.import_budget [--budget 0.75]    (exit status 1 if a module is over budget)
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#The modules a batch job or worker process needs, none of them may import a plotting or UI library
+HEADLESS = ['Black_Scholes', 'European_Options', 'American_Options', 'Greeks', 'Implied_Volatility', 'Pricing_Cache', 'Instrumentation', 'Kernels', 'American_Approximations', 'American_PDE', 'Incremental_Repricing', 'Portfolio', 'Batch_Pricing']
+FORBIDDEN = ['matplotlib', 'streamlit']
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds' : elapsed, 'loaded' : [name for name in {forbidden} if name in sys.modules]}}))
+"""
+
+
+def import_time(module, runs = 5):     #Fastest of runs fresh-interpreter imports of module (the first runs warm the disk cache), and the forbidden modules it loaded
+
+    results = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', PROBE.format(module = module, forbidden = FORBIDDEN)],
+                                cwd = ROOT, capture_output = True, text = True, check = True).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+    return min(result['seconds'] for result in results), results[-1]['loaded']
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(prog = 'python -m benchmarks.import_budget', description = "Import-time budget of the headless pricing modules")
+    parser.add_argument('--budget', type = float, default = 0.75, help = "maximum import time per module in seconds (default 0.75)")
+    parser.add_argument('--runs', type = int, default = 5)
+    args = parser.parse_args(argv)
+
+    baseline, _ = import_time('numpy', args.runs)
+    print(f"{'numpy (reference)':22s} {baseline:8.3f} s")
+
+    failures = 0
+    for module in HEADLESS:
+        seconds, loaded = import_time(module, args.runs)
+        problems = ([f"over budget of {args.budget} s"] if seconds > args.budget else []) + [f"imports {name}" for name in loaded]
+        failures += bool(problems)
+        print(f"{module:22s} {seconds:8.3f} s   {'; '.join(problems) if problems else 'ok'}")
+
+    print(f"{failures} module(s) failed the budget" if failures else "All headless modules within budget")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 13:20:48 2026
+
+@author: jesseruijer
+"""
+
+#Regression benchmark suite for every pricing engine: wall time, peak memory and accuracy against reference values on fixed inputs
+#The bench_* scripts next to this file are one-off studies of a single optimization, this suite is what to run before and after a change
+#
+#Run from the repository root with:
+#   python -m benchmarks.suite run                          #prints a table, add --output results.json for the JSON results
+#   python -m benchmarks.suite run --save-baseline          #stores the results as the baseline of this machine
+#   python -m benchmarks.suite compare results.json         #flags cases that got slower, use more memory or lost accuracy
+#Results only compare meaningfully against a baseline saved on the same machine
+
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+import scipy
+from Black_Scholes import Black_Scholes_Comp, Black_Scholes_Chain
+from European_Options import European, European_VR, European_grid
+from American_Options import American, american_binomial
+from Greeks import compute_greeks_european, compute_greeks_american, greeks_profile_european, greeks_profile_american
+from Implied_Volatility import implied_vol, CONVERGED
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'baseline.json')
+
+#The app's default inputs
+S0, K, T, r, q, sigma, h = 100, 95, 0.25, 0.05, 0.01, 0.25, 1.0
+
+#The app's slider defaults and maxima
+N_DEFAULT, N_MAX = 10000, 50000
+N_SIM_DEFAULT, N_SIM_MAX = 10000, 50000
+N_STEPS_DEFAULT, N_STEPS_MAX = 100, 500
+N_NODES_DEFAULT, N_NODES_MAX = 100, 500
+
+GREEKS = ('delta', 'gamma', 'vega', 'rho', 'theta')
+
+
+def _reference_european(option_type):     #Black-Scholes price and Greeks in the units of Greeks.py
+    chain = Black_Scholes_Chain(S0, K, T, r, q, sigma, option_type)
+    return {key : float(value) for key, value in chain.items()}
+
+
+def _reference_american(option_type, n_nodes = 5000):  #Price on a fine binomial tree, the CRR error is O(1/n_nodes)
+    return american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type)
+
+
+def _reference_american_greeks(option_type, n_nodes = 2000):   #Greeks on a fine binomial tree
+    return compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, option_type, h)[option_type]
+
+
+def _greeks_error(greeks, reference):  #Largest absolute error over the five Greeks
+    return max(abs(greeks[greek] - reference[greek]) for greek in GREEKS)
+
+
+def _chain():   #Fixed chain of 10,000 contracts around the app's default spot
+    rng = np.random.default_rng(2025)
+    n = 10000
+    return rng.uniform(60, 160, n), rng.uniform(0.05, 2, n), rng.uniform(0.1, 0.8, n), rng.random(n) < 0.5
+
+
+def _implied_vol_error():  #Largest volatility error over the quotes whose price moves by more than 1e-4 per volatility point
+    strikes, maturities, vols, is_call = _chain()
+    chain = Black_Scholes_Chain(S0, strikes, maturities, r, q, vols, is_call)
+    iv, status = implied_vol(chain['price'], S0, strikes, maturities, r, q, is_call)
+    checked = (status == CONVERGED) & (chain['vega'] > 1e-4)
+    return float(np.max(np.abs(iv - vols)[checked]))
+
+
+def cases():    #Benchmark cases as (name, function to time, function of its result returning the error against the reference)
+
+    strikes, maturities, vols, is_call = _chain()
+    chain = Black_Scholes_Chain(S0, strikes, maturities, r, q, vols, is_call)
+    spots = np.linspace(S0 - 30, S0 + 30, 200)
+    S0_grid, sigma_grid = np.meshgrid(np.linspace(S0 - 30, S0 + 30, 60), np.linspace(0.01, sigma + 0.2, 60))
+
+    reference = {option_type : _reference_european(option_type) for option_type in ('Call', 'Put')}
+
+    result = [
+        ('black_scholes/default', lambda: Black_Scholes_Comp(S0, K, T, r, q, sigma, 'Call'),
+         lambda price: abs(price - reference['Call']['price'])),
+        ('black_scholes_chain/10000', lambda: Black_Scholes_Chain(S0, strikes, maturities, r, q, vols, is_call),
+         lambda greeks: float(np.max(np.abs(greeks['price'] - chain['price'])))),
+        ('implied_vol/10000', lambda: implied_vol(chain['price'], S0, strikes, maturities, r, q, is_call),
+         lambda _: _implied_vol_error()),
+        ('european_grid/60x60', lambda: European_grid(S0_grid, K, T, r, q, sigma_grid, N_MAX, 'Call'),
+         lambda prices: float(np.max(np.abs(prices - Black_Scholes_Chain(S0_grid, K, T, r, q, sigma_grid, 'Call')['price'])))),
+        ('greeks_profile_european/200', lambda: greeks_profile_european(spots, K, r, q, sigma, T, N_MAX),
+         None),
+        ('greeks_profile_american/200', lambda: greeks_profile_american(spots, K, r, q, sigma, T, N_NODES_DEFAULT, h),
+         None),
+        ]
+
+    for label, N in (('default', N_DEFAULT), ('max', N_MAX)):
+        result += [
+            (f'european/{label}', lambda N = N: European(S0, K, T, r, q, sigma, N, 'Call')[0],
+             lambda price: abs(price - reference['Call']['price'])),
+            (f'european_vr_antithetic/{label}', lambda N = N: European_VR(S0, K, T, r, q, sigma, N, 'Call', method = 'antithetic')[0],
+             lambda price: abs(price - reference['Call']['price'])),
+            (f'greeks_european/{label}', lambda N = N: compute_greeks_european(S0, K, r, q, sigma, T, N, 'Call', h)['Call'],
+             lambda greeks: _greeks_error(greeks, reference['Call'])),
+            ]
+
+    for label, n_sim, n_steps in (('default', N_SIM_DEFAULT, N_STEPS_DEFAULT), ('max', N_SIM_MAX, N_STEPS_MAX)):
+        result.append((f'american_lsmc/{label}', lambda n_sim = n_sim, n_steps = n_steps: American(S0, K, T, r, q, sigma, n_sim, n_steps, 'Put', seed = 69)[0],
+                       lambda price: abs(price - _reference_american('Put'))))
+
+    for label, n_nodes in (('default', N_NODES_DEFAULT), ('max', N_NODES_MAX)):
+        result += [
+            (f'american_binomial/{label}', lambda n_nodes = n_nodes: american_binomial(S0, K, T, r, q, sigma, n_nodes, 'Put'),
+             lambda price: abs(price - _reference_american('Put'))),
+            (f'greeks_american/{label}', lambda n_nodes = n_nodes: compute_greeks_american(S0, K, r, q, sigma, T, n_nodes, 'Put', h)['Put'],
+             lambda greeks: _greeks_error(greeks, _reference_american_greeks('Put'))),
+            ]
+        for tree in ('lrr', 'bbsr'):
+            result.append((f'american_binomial_{tree}/{label}', lambda n_nodes = n_nodes, tree = tree: american_binomial(S0, K, T, r, q, sigma, n_nodes, 'Put', tree = tree),
+                           lambda price: abs(price - _reference_american('Put'))))
+
+    return result
+
+
+def measure(func, repeat, min_time = 0.05):    #Peak traced memory of one call, then repeat timings of the mean time per call, returns (result, peak bytes, times)
+
+    tracemalloc.start()     #NumPy reports its array allocations to tracemalloc, the traced call also warms up the caches
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    #Fast cases are timed over enough calls to take at least min_time, as timeit does, so timer resolution and noise do not dominate
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        number *= 10
+
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+
+    return result, peak, times
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output = True, text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pattern = '*', repeat = 5, quick = False):   #Runs the matching cases, quick skips the slider-maximum cases, returns the JSON-serializable results
+
+    results = {}
+    for name, func, error in cases():
+        if not fnmatch.fnmatch(name, pattern) or (quick and name.endswith('/max')):
+            continue
+        value, peak, times = measure(func, repeat)
+        results[name] = {
+            'time_s' : min(times),
+            'time_median_s' : float(np.median(times)),
+            'peak_memory_mb' : peak / 2**20,
+            'error' : float(error(value)) if error else None,
+            'repeat' : repeat
+            }
+        error_text = f"{results[name]['error']:10.3g}" if error else f"{'-':>10s}"
+        print(f"{name:32s} {min(times):10.4f} s {peak / 2**20:10.2f} MB   error {error_text}", flush = True)
+
+    meta = {
+        'timestamp' : time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit' : _git_commit(),
+        'python' : platform.python_version(),
+        'numpy' : np.__version__,
+        'scipy' : scipy.__version__,
+        'platform' : platform.platform(),
+        'machine' : platform.node(),
+        'cpu_count' : os.cpu_count()
+        }
+    return {'meta' : meta, 'results' : results}
+
+
+def compare(current, baseline, threshold = 0.25, error_tolerance = 1e-9):  #Cases where time or memory grew by more than threshold (relative), or the error grew by more than threshold plus error_tolerance
+
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f"{name:32s} new case, no baseline")
+            continue
+
+        time_ratio = now['time_s'] / before['time_s']
+        memory_ratio = now['peak_memory_mb'] / before['peak_memory_mb'] if before['peak_memory_mb'] > 0 else 1.0
+        flags = []
+        if time_ratio > 1 + threshold:
+            flags.append('time')
+        if memory_ratio > 1 + threshold:
+            flags.append('memory')
+        if now['error'] is not None and before['error'] is not None and now['error'] > before['error'] * (1 + threshold) + error_tolerance:
+            flags.append('accuracy')
+
+        print(f"{name:32s} time x{time_ratio:6.2f}   memory x{memory_ratio:6.2f}   {'REGRESSION (' + ', '.join(flags) + ')' if flags else 'ok'}")
+        if flags:
+            regressions.append((name, flags))
+
+    return regressions
+
+
+def main(argv = None):
+
+    parser = argparse.ArgumentParser(prog = 'python -m benchmarks.suite', description = "Benchmark suite for the pricing engines")
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    run_parser = commands.add_parser('run', help = "run the benchmarks")
+    run_parser.add_argument('--output', help = "write the JSON results to this file")
+    run_parser.add_argument('--save-baseline', nargs = '?', const = BASELINE, metavar = 'PATH', help = f"also store the results as baseline (default {os.path.relpath(BASELINE)})")
+    run_parser.add_argument('--filter', default = '*', help = "only run cases matching this glob, e.g. 'american*'")
+    run_parser.add_argument('--repeat', type = int, default = 5, help = "timings per case, the fastest is reported")
+    run_parser.add_argument('--quick', action = 'store_true', help = "skip the slider-maximum cases")
+
+    compare_parser = commands.add_parser('compare', help = "compare results against a baseline, exits with status 1 on regressions")
+    compare_parser.add_argument('results', help = "JSON results of a run")
+    compare_parser.add_argument('--baseline', default = BASELINE)
+    compare_parser.add_argument('--threshold', type = float, default = 0.25, help = "allowed relative increase in time, memory and error (default 0.25)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.filter, args.repeat, args.quick)
+        for path in (args.output, args.save_baseline):
+            if path:
+                os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+                with open(path, 'w') as file:
+                    json.dump(results, file, indent = 2)
+                print(f"Results written to {path}")
+        return 0
+
+    with open(args.results) as file:
+        current = json.load(file)
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    regressions = compare(current, baseline, args.threshold)
+    print(f"{len(regressions)} regression(s) above {args.threshold:.0%}" if regressions else "No regressions")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
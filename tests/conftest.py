@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:02:11 2026
+
+@author: jesseruijer
+"""
+
+#The modules live at the repository root and are imported as top-level modules, as app.py and the benchmarks do
+#Run the suite from the repository root with: python -m pytest
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:04:37 2026
+
+@author: jesseruijer
+"""
+
+#Cross-checks of the pricing engines against each other: Black-Scholes parity and Greeks, Monte Carlo against Black-Scholes,
+#the binomial trees against Black-Scholes where early exercise is never optimal, and LSMC, the PDE and the approximations against the trees
+
+import numpy as np
+import pytest
+from Black_Scholes import Black_Scholes_Comp, Black_Scholes_Chain
+from European_Options import European, European_VR, European_stream, European_greeks, European_adaptive
+from American_Options import American, American_strip, american_binomial, american_binomial_greeks, american_binomial_batch, american_binomial_greeks_batch
+from American_PDE import american_pde
+from American_Approximations import barone_adesi_whaley, bjerksund_stensland, american_fast
+from Implied_Volatility import implied_vol, CONVERGED
+from Greeks import compute_greeks_american
+
+S0, K, T, r, q, sigma = 100, 95, 0.5, 0.05, 0.02, 0.25
+
+
+def test_black_scholes_put_call_parity():
+
+    S = np.linspace(60, 140, 9)
+    call = Black_Scholes_Chain(S, K, T, r, q, sigma, True)
+    put = Black_Scholes_Chain(S, K, T, r, q, sigma, False)
+    assert np.allclose(call['price'] - put['price'], S * np.exp(-q * T) - K * np.exp(-r * T), atol = 1e-12)
+    assert np.allclose(call['delta'] - put['delta'], np.exp(-q * T), atol = 1e-12)
+    assert np.allclose(call['gamma'], put['gamma'])
+    assert np.allclose(call['vega'], put['vega'])
+
+
+def test_black_scholes_chain_matches_scalar_and_finite_differences():
+
+    for option_type in ('Call', 'Put'):
+        chain = Black_Scholes_Chain(S0, K, T, r, q, sigma, option_type == 'Call')
+        price = lambda S = S0, T = T, r = r, sigma = sigma: Black_Scholes_Comp(S, K, T, r, q, sigma, option_type)
+        assert chain['price'] == pytest.approx(price(), abs = 1e-12)
+        assert chain['delta'] == pytest.approx((price(S = S0 + 1e-4) - price(S = S0 - 1e-4)) / 2e-4, abs = 1e-6)
+        assert chain['gamma'] == pytest.approx((price(S = S0 + 1e-2) - 2 * price() + price(S = S0 - 1e-2)) / 1e-4, abs = 1e-5)
+        assert chain['vega'] == pytest.approx((price(sigma = sigma + 1e-5) - price(sigma = sigma - 1e-5)) / 2e-5 / 100, abs = 1e-6)   #per 1% vol
+        assert chain['rho'] == pytest.approx((price(r = r + 1e-5) - price(r = r - 1e-5)) / 2e-5 / 100, abs = 1e-6)     #per 1% rate
+        assert chain['theta'] == pytest.approx(-(price(T = T + 1e-5) - price(T = T - 1e-5)) / 2e-5 / 252, abs = 1e-6)  #daily
+
+
+@pytest.mark.parametrize('option_type', ['Call', 'Put'])
+def test_monte_carlo_matches_black_scholes(option_type):
+
+    exact = Black_Scholes_Comp(S0, K, T, r, q, sigma, option_type)
+    price, _ = European(S0, K, T, r, q, sigma, 200_000, option_type)
+    assert price == pytest.approx(exact, abs = 0.1)
+    for method in ('plain', 'antithetic', 'control', 'sobol'):
+        price, std_error, ci, _ = European_VR(S0, K, T, r, q, sigma, 50_000, option_type, method = method)
+        assert abs(price - exact) < 4 * std_error, method
+        assert ci[0] < price < ci[1]
+    price, std_error, _, _ = European_stream(S0, K, T, r, q, sigma, 200_000, option_type, chunk_size = 30_000, n_streams = 3)
+    assert abs(price - exact) < 4 * std_error
+
+
+def test_variance_reduction_never_simulates_more_than_n_paths():
+
+    for method, N, used in (('plain', 1, 1), ('antithetic', 3, 2), ('antithetic', 1001, 1000), ('control', 10, 10), ('sobol', 100, 64)):
+        _, _, _, n_paths = European_VR(S0, K, T, r, q, sigma, N, 'Call', method = method)
+        assert n_paths == used, method
+    for method, N in (('antithetic', 1), ('sobol', 31)):
+        with pytest.raises(ValueError):
+            European_VR(S0, K, T, r, q, sigma, N, 'Call', method = method)
+
+
+def test_monte_carlo_greeks_match_black_scholes():
+
+    _, greeks, std_errors = European_greeks(S0, K, T, r, q, sigma, 400_000)
+    for option_type in ('Call', 'Put'):
+        exact = Black_Scholes_Chain(S0, K, T, r, q, sigma, option_type == 'Call')
+        for greek in ('delta', 'vega', 'rho', 'theta'):
+            assert abs(greeks[option_type][greek] - exact[greek]) < 5 * std_errors[option_type][greek] + 1e-12, (option_type, greek)
+
+
+def test_adaptive_monte_carlo_stops_for_single_path_batches():
+
+    price, std_error, _, n_paths = European_adaptive(S0, K, T, r, q, sigma, 'Call', batch_size = 1, max_paths = 5, min_batches = 1, target_se = 0)
+    assert n_paths <= 5
+    _, _, _, n_paths = European_adaptive(S0, K, T, r, q, sigma, 'Call', method = 'plain', batch_size = 3, max_paths = 10, target_se = 0)
+    assert n_paths == 9
+
+
+@pytest.mark.parametrize('tree', ['crr', 'lr', 'lrr', 'bbs', 'bbsr'])
+def test_binomial_call_without_dividends_matches_black_scholes(tree):
+
+    #Early exercise of a call on a non-dividend stock is never optimal, so the American tree prices the European call
+    exact = Black_Scholes_Comp(S0, K, T, r, 0.0, sigma, 'Call')
+    assert american_binomial(S0, K, T, r, 0.0, sigma, 500, 'Call', tree = tree) == pytest.approx(exact, abs = 0.01)
+
+
+def test_richardson_trees_converge_to_a_fine_reference():
+
+    #The American Leisen-Reimer error is of first order, which is what the extrapolation weights assume
+    for contract in ((S0, 110, 1, 0.06, 0.0, 0.2, 'Put'), (S0, 100, 0.5, 0.05, 0.02, 0.3, 'Put'), (S0, 90, 1, 0.03, 0.06, 0.25, 'Call')):
+        reference = {'lr' : american_binomial(*contract[:6], 5000, contract[6], tree = 'bbsr'), 'bbs' : american_binomial(*contract[:6], 5000, contract[6], tree = 'lrr')}
+        error = lambda n, tree, base: abs(american_binomial(*contract[:6], n, contract[6], tree = tree) - reference[base])
+        assert 1.5 < error(200, 'lr', 'lr') / error(400, 'lr', 'lr') < 3
+        for tree, base in (('lrr', 'lr'), ('bbsr', 'bbs')):
+            assert error(800, tree, base) < 5e-4, (contract, tree)
+        assert error(800, 'lrr', 'lr') < error(800, 'lr', 'lr')
+
+
+def test_binomial_batch_and_greeks_match_the_scalar_tree():
+
+    S = np.array([80, 100, 120.0])
+    for is_call, option_type in ((True, 'Call'), (False, 'Put')):
+        batch = american_binomial_batch(S, K, T, r, q, sigma, 200, is_call)
+        assert np.allclose(batch, [american_binomial(s, K, T, r, q, sigma, 200, option_type) for s in S], atol = 1e-10)
+    price, delta, gamma, _ = american_binomial_greeks(S0, K, T, r, q, sigma, 200, 'Put', tree = 'lrr')
+    bumped = [american_binomial(S0 + h, K, T, r, q, sigma, 200, 'Put', tree = 'lrr') for h in (-0.5, 0.5)]
+    assert price == pytest.approx(american_binomial(S0, K, T, r, q, sigma, 200, 'Put', tree = 'lrr'), abs = 1e-10)
+    assert delta == pytest.approx((bumped[1] - bumped[0]) / 1, abs = 2e-3)
+    assert gamma == pytest.approx((bumped[1] - 2 * price + bumped[0]) / 0.25, abs = 2e-3)
+
+
+def test_american_put_bounds():
+
+    european = Black_Scholes_Comp(S0, 110, T, r, q, sigma, 'Put')
+    american = american_binomial(S0, 110, T, r, q, sigma, 500, 'Put')
+    assert american > european
+    assert american >= 110 - S0
+
+
+@pytest.mark.parametrize('method', ['tree', 'pde', 'fd'])
+def test_american_greeks_of_an_expired_contract(method):
+
+    greeks = compute_greeks_american(S0, K, r, q, sigma, 0.0, 100, 'Both', 1.0, method = method)
+    assert american_binomial(S0, K, 0.0, r, q, sigma, 100, 'Call') == S0 - K
+    assert american_binomial(S0, K, 0.0, r, q, sigma, 100, 'Put') == 0
+    for option_type, delta in (('Call', 1.0), ('Put', 0.0)):
+        assert greeks[option_type]['delta'] == delta
+        assert all(np.isfinite(value) for value in greeks[option_type].values())
+        assert greeks[option_type]['gamma'] == 0 and greeks[option_type]['vega'] == 0
+
+
+@pytest.mark.parametrize('method', ['tree', 'pde', 'fd'])
+def test_american_greeks_without_volatility(method):
+
+    #The spot grows deterministically: the call is best exercised at maturity, the out-of-the-money put is worthless
+    greeks = compute_greeks_american(S0, K, r, q, 0.0, T, 100, 'Both', 1.0, method = method)
+    forward_value = S0 * np.exp(-q * T) - K * np.exp(-r * T)
+    assert american_binomial(S0, K, T, r, q, 0.0, 100, 'Call') == pytest.approx(forward_value)
+    assert american_binomial(S0, K, T, r, q, 0.0, 100, 'Call') == pytest.approx(american_binomial(S0, K, T, r, q, 1e-3, 2000, 'Call'), abs = 1e-4)
+    assert greeks['Call']['delta'] == pytest.approx(np.exp(-q * T))
+    assert greeks['Call']['theta'] == pytest.approx(-(r * K * np.exp(-r * T) - q * S0 * np.exp(-q * T)) / 252, rel = 1e-6)
+    assert all(value == pytest.approx(0, abs = 1e-10) for value in greeks['Put'].values())
+    #A deep in-the-money put is exercised at once, in the batch as in the scalar tree
+    price, delta, gamma, theta = american_binomial_greeks_batch([S0, 80], 110, T, r, q, [0.0, sigma], 100, False)
+    assert price[0] == 110 - S0 and delta[0] == -1 and gamma[0] == 0 and theta[0] == 0
+    assert price[1] == pytest.approx(american_binomial(80, 110, T, r, q, sigma, 100, 'Put'))
+
+
+def test_lsmc_matches_the_tree():
+
+    reference = american_binomial(S0, 110, 1, 0.06, 0.0, 0.2, 500, 'Put', tree = 'lrr')
+    for basis in ('monomial', 'laguerre', 'raw'):
+        price, _, _, _ = American(S0, 110, 1, 0.06, 0.0, 0.2, 50_000, 50, 'Put', seed = 1, basis = basis)
+        assert price == pytest.approx(reference, abs = 0.1), basis
+    #Without volatility every path exercises where the discounted intrinsic value is largest, here at once
+    price, _, _, _ = American(S0, 110, 1, 0.06, 0.0, 0.0, 1000, 50, 'Put', seed = 1)
+    assert price == pytest.approx(10, abs = 0.15)
+
+
+def test_lsmc_is_worth_at_least_immediate_exercise():
+
+    #Deep in the money the root has to compare the continuation value with exercising at once
+    K_ = np.array([90, 110, 120, 130, 140])
+    T_ = np.array([0.5, 0.5, 0.5, 1, 1])
+    intrinsic = np.maximum(K_ - S0, 0)
+    strip = American_strip(S0, K_, T_, 0.06, 0.0, 0.2, 5000, 20, 'Put', seed = 1)
+    assert np.all(strip['price'] >= intrinsic)
+    assert np.all(strip['early_exercise_fraction'][strip['price'] == intrinsic] == 1)
+    for K_c, T_c, intrinsic_c in zip(K_, T_, intrinsic):
+        price, _, _, _ = American(S0, K_c, T_c, 0.06, 0.0, 0.2, 5000, 20, 'Put', seed = 1)
+        assert price >= intrinsic_c
+
+
+@pytest.mark.parametrize('option_type', ['Call', 'Put'])
+def test_pde_matches_the_tree(option_type):
+
+    grid = american_pde(S0, K, T, r, 0.04, sigma, option_type, n_space = 801, n_time = 400)
+    i = grid['index']
+    assert grid['S'][i] == pytest.approx(S0)
+    tree = american_binomial_greeks(S0, K, T, r, 0.04, sigma, 401, option_type, tree = 'lrr')
+    for value, reference, tolerance in zip((grid['price'][i], grid['delta'][i], grid['gamma'][i], grid['theta'][i]), tree, (5e-3, 1e-3, 1e-3, 1e-4)):
+        assert value == pytest.approx(reference, abs = tolerance)
+
+
+def test_approximations_are_close_to_the_tree():
+
+    rng = np.random.default_rng(5)
+    n = 200
+    S, T_, r_, q_, sigma_ = rng.uniform(80, 120, n), rng.uniform(0.1, 2, n), rng.uniform(0.0, 0.08, n), rng.uniform(0.0, 0.08, n), rng.uniform(0.1, 0.5, n)
+    is_call = rng.random(n) < 0.5
+    tree = american_binomial_batch(S, 100, T_, r_, q_, sigma_, 1000, is_call)
+    european = Black_Scholes_Chain(S, 100, T_, r_, q_, sigma_, is_call)['price']
+    #Barone-Adesi-Whaley is known to drift further from the tree at long maturities than Bjerksund-Stensland
+    for approximation, max_error in ((barone_adesi_whaley, 0.5), (bjerksund_stensland, 0.2)):
+        price = approximation(S, 100, T_, r_, q_, sigma_, is_call)
+        assert np.all(price >= european - 1e-10)
+        assert np.max(np.abs(price - tree)) < max_error
+        assert np.mean(np.abs(price - tree)) < 0.05
+    assert np.max(np.abs(american_fast(S, 100, T_, r_, q_, sigma_, is_call, tol = 0.01, n_nodes = 1000) - tree)) < 0.01
+    #Strongly negative carry at low volatility used to send the Barone-Adesi-Whaley critical price below zero
+    assert barone_adesi_whaley(120.9, 100, 4.68, 0.0083, 0.058, 0.023, 'Call') == pytest.approx(20.9, abs = 1e-6)
+
+
+def test_implied_vol_round_trip():
+
+    K_ = np.linspace(70, 130, 13)
+    vols = np.linspace(0.1, 0.6, 13)
+    for is_call in (True, False):
+        prices = Black_Scholes_Chain(S0, K_, T, r, q, vols, is_call)['price']
+        implied, _ = implied_vol(prices, S0, K_, T, r, q, is_call)
+        assert np.allclose(implied, vols, atol = 1e-6)
+
+
+def test_implied_vol_of_deep_in_the_money_quotes():
+
+    #Deep in the money at low volatility the time value is close to the rounding of the price, quotes are either accurate or not CONVERGED
+    rng = np.random.default_rng(11)
+    n = 2000
+    K_ = rng.uniform(100, 200, n)
+    T_ = rng.uniform(0.05, 2, n)
+    vols = rng.uniform(0.05, 0.15, n)
+    for is_call in (True, False):
+        strikes = 2e4 / K_ if is_call else K_
+        prices = Black_Scholes_Chain(S0, strikes, T_, r, q, vols, is_call)['price']
+        implied, status = implied_vol(prices, S0, strikes, T_, r, q, is_call)
+        converged = status == CONVERGED
+        assert converged.mean() > 0.5
+        assert np.allclose(implied[converged], vols[converged], atol = 1e-7)
+    implied, status = implied_vol(Black_Scholes_Chain(100, 188.6, 0.77, 0.05, 0.02, 0.096, False)['price'], 100, 188.6, 0.77, 0.05, 0.02, False)
+    assert status != CONVERGED or abs(implied - 0.096) < 1e-7
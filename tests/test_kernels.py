@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:31:08 2026
+
+@author: jesseruijer
+"""
+
+#The compiled kernels (Kernels.py) against the NumPy implementation on the same inputs and random numbers, skipped without Numba
+#Results agree to rounding rather than bit for bit: the compiled CRR rollback flushes values below 1e-280 to 0 and fuses the arithmetic differently
+
+import numpy as np
+import pytest
+
+pytest.importorskip('numba')
+
+from American_Options import American, american_binomial, american_binomial_greeks, _simulate_paths
+from American_PDE import american_pde
+
+S0, K, r, q, sigma = 100, 100, 0.05, 0.02, 0.3
+
+
+@pytest.mark.parametrize('tree', ['crr', 'lr', 'bbsr'])
+@pytest.mark.parametrize('option_type', ['Call', 'Put'])
+def test_binomial_tree(option_type, tree):
+
+    for T, n_nodes in ((1, 500), (10, 5000)):
+        numpy_price = american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type, tree = tree)
+        numba_price = american_binomial(S0, K, T, r, q, sigma, n_nodes, option_type, kernel = 'numba', tree = tree)
+        assert numba_price == pytest.approx(numpy_price, rel = 1e-12, abs = 1e-12)
+    numpy_greeks = american_binomial_greeks(S0, K, 1, r, q, sigma, 1000, option_type, tree = tree)
+    numba_greeks = american_binomial_greeks(S0, K, 1, r, q, sigma, 1000, option_type, kernel = 'numba', tree = tree)
+    assert np.allclose(numba_greeks, numpy_greeks, rtol = 1e-10, atol = 1e-12)
+
+
+@pytest.mark.parametrize('dtype, tolerance', [(np.float64, 1e-12), (np.float32, 1e-5)])
+def test_gbm_paths(dtype, tolerance):
+
+    paths = lambda kernel: _simulate_paths(S0, (r - q - 0.5 * sigma**2) / 100, sigma, 1 / 100, 5000, 100, np.random.default_rng(69), dtype, kernel)
+    numpy_paths, numba_paths = paths('numpy'), paths('numba')
+    assert numba_paths.dtype == numpy_paths.dtype
+    assert np.max(np.abs(numba_paths / numpy_paths - 1)) < tolerance
+
+
+def test_lsmc():
+
+    numpy_price = American(S0, K, 1, r, q, sigma, 20_000, 100, 'Put', seed = 69)[0]
+    numba_price = American(S0, K, 1, r, q, sigma, 20_000, 100, 'Put', seed = 69, kernel = 'numba')[0]
+    assert numba_price == pytest.approx(numpy_price, abs = 1e-10)
+
+
+@pytest.mark.parametrize('option_type', ['Call', 'Put'])
+def test_brennan_schwartz(option_type):
+
+    numpy_grid = american_pde(S0, K, 1, r, 0.04, sigma, option_type)
+    numba_grid = american_pde(S0, K, 1, r, 0.04, sigma, option_type, kernel = 'numba')
+    for name in ('price', 'delta', 'gamma', 'vega', 'rho', 'theta'):
+        assert np.allclose(numba_grid[name], numpy_grid[name], rtol = 1e-9, atol = 1e-10), name